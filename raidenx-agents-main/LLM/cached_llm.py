@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, Optional, Sequence, Tuple
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, MessageRole
+
+from commons.cache import TTLCache
+from config import settings
+from utils.output_parser import ReActOutputParser, get_tool_calls
+
+OBSERVATION_PREFIX = "Observation:"
+
+
+def without_observations(messages: Sequence[ChatMessage]) -> bool:
+    """
+    Whether a prompt holds no tool output of the current run
+
+    Such steps only plan the tool calls (or answer from the conversation), so
+    their output does not depend on how fresh the market data is.
+    """
+    return not any(
+        message.role == MessageRole.USER and (message.content or "").startswith(OBSERVATION_PREFIX)
+        for message in messages
+    )
+
+
+def _is_tool_call(response: ChatResponse) -> bool:
+    try:
+        return bool(get_tool_calls(ReActOutputParser().parse(response.message.content or "")))
+    except (ValueError, IndexError):
+        return False
+
+
+def _replayed(response: ChatResponse) -> ChatResponse:
+    """A stored response as the single chunk of a stream"""
+    return ChatResponse(
+        message=response.message,
+        delta=response.message.content,
+        raw=response.raw,
+        additional_kwargs=response.additional_kwargs,
+    )
+
+
+class LLMResponseCache(TTLCache):
+    """TTLCache of LLM responses that also counts the calls that were not eligible"""
+
+    def __init__(self, name: str, ttl: float, max_size: int = 10000):
+        super().__init__(name, ttl, max_size)
+        self.bypassed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns size, hit/miss/coalesced counters and calls that bypassed the cache"""
+        return {**super().stats(), "bypassed": self.bypassed}
+
+
+class _StreamFlight:
+    """A streamed call in progress whose final response other sync callers can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[ChatResponse] = None
+
+
+class CachedLLM:
+    """
+    Wraps an LLM so identical prompts are answered from an in-process cache.
+
+    The key is a hash of the model parameters and the formatted messages. Only
+    prompts accepted by `cacheable` (by default those without tool observations)
+    are cached; the others go straight to the LLM. Concurrent identical calls
+    reach the LLM once: the first caller streams as usual and the others replay
+    its response when it is done. A stream closed by its consumer is stored as
+    far as it was read only if that part is a complete tool call, which is where
+    the ReAct worker stops reading. Callers waiting on a first call for longer
+    than flight_timeout call the LLM themselves. Other attributes are the
+    wrapped LLM's.
+    """
+
+    def __init__(
+        self,
+        llm,
+        cache: LLMResponseCache,
+        cacheable: Callable[[Sequence[ChatMessage]], bool] = without_observations,
+        flight_timeout: float = 30.0,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.cacheable = cacheable
+        self.flight_timeout = flight_timeout
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _StreamFlight] = {}
+        self._async_flights: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _key(self, messages: Sequence[ChatMessage], kwargs: Dict[str, Any]) -> Optional[str]:
+        """Cache key of a call, or None when the call must reach the LLM"""
+        if not self.cacheable(messages):
+            self.cache.count("bypassed")
+            return None
+        payload = {
+            "llm": type(self.llm).__name__,
+            "model": self.llm.metadata.model_name,
+            "temperature": getattr(self.llm, "temperature", None),
+            "max_tokens": getattr(self.llm, "max_tokens", None),
+            "kwargs": kwargs,
+            "messages": [(message.role.value, message.content, message.additional_kwargs) for message in messages],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        key = self._key(messages, kwargs)
+        if key is None:
+            return self.llm.chat(messages, **kwargs)
+        return self.cache.get_or_load(key, lambda: self.llm.chat(messages, **kwargs))
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        key = self._key(messages, kwargs)
+        if key is None:
+            return await self.llm.achat(messages, **kwargs)
+        return await self.cache.aget_or_load(key, lambda: self.llm.achat(messages, **kwargs))
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Generator[ChatResponse, None, None]:
+        key = self._key(messages, kwargs)
+        if key is None:
+            yield from self.llm.stream_chat(messages, **kwargs)
+            return
+
+        while True:
+            found, response = self.cache.get(key)
+            if found:
+                self.cache.count("hits")
+                yield _replayed(response)
+                return
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _StreamFlight()
+            if leader:
+                break
+            self.cache.count("coalesced")
+            if not flight.done.wait(self.flight_timeout):
+                # the first call is stuck or its stream is held unread: stop waiting on it
+                yield from self.llm.stream_chat(messages, **kwargs)
+                return
+            if flight.response is not None:
+                yield _replayed(flight.response)
+                return
+            # the first call was not stored, e.g. it failed: make our own
+
+        self.cache.count("misses")
+        chat_stream = self.llm.stream_chat(messages, **kwargs)
+        response, complete = None, False
+        try:
+            for response in chat_stream:
+                yield response
+            complete = True
+        finally:
+            chat_stream.close()
+            if response is not None and (complete or _is_tool_call(response)):
+                self.cache.set(key, response)
+                flight.response = response
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncGenerator[ChatResponse, None]:
+        key = self._key(messages, kwargs)
+        if key is None:
+            return await self.llm.astream_chat(messages, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        while True:
+            found, response = self.cache.get(key)
+            if found:
+                self.cache.count("hits")
+                return self._areplay(response)
+            future = self._async_flights.get(flight_key)
+            if future is None:
+                break
+            self.cache.count("coalesced")
+            try:
+                response = await asyncio.wait_for(asyncio.shield(future), self.flight_timeout)
+            except asyncio.TimeoutError:
+                # the first call is stuck or its stream is held unread: stop waiting on it
+                return await self.llm.astream_chat(messages, **kwargs)
+            if response is not None:
+                return self._areplay(response)
+
+        future = self._async_flights[flight_key] = loop.create_future()
+        self.cache.count("misses")
+        try:
+            chat_stream = await self.llm.astream_chat(messages, **kwargs)
+        except BaseException:
+            self._end_flight(flight_key, future, None)
+            raise
+        stream = self._astream_and_store(key, flight_key, future, chat_stream)
+        # a stream dropped without being iterated never runs its finally, end the flight when it is collected
+        weakref.finalize(stream, self._end_flight_soon, loop, flight_key, future)
+        return stream
+
+    def _end_flight(self, flight_key: Tuple[int, str], future: asyncio.Future, response: Optional[ChatResponse]) -> None:
+        """Hand the response (None if not stored) to the waiters of a call and forget it; safe to repeat"""
+        if not future.done():
+            future.set_result(response)
+        if self._async_flights.get(flight_key) is future:
+            del self._async_flights[flight_key]
+
+    def _end_flight_soon(self, loop: asyncio.AbstractEventLoop, flight_key: Tuple[int, str], future: asyncio.Future) -> None:
+        # called by the garbage collector, possibly from another thread
+        try:
+            loop.call_soon_threadsafe(self._end_flight, flight_key, future, None)
+        except RuntimeError:
+            # the loop is closed, nobody can be waiting on it
+            self._async_flights.pop(flight_key, None)
+
+    async def _areplay(self, response: ChatResponse) -> AsyncGenerator[ChatResponse, None]:
+        yield _replayed(response)
+
+    async def _astream_and_store(
+        self,
+        key: str,
+        flight_key: Tuple[int, str],
+        future: asyncio.Future,
+        chat_stream: AsyncGenerator[ChatResponse, None],
+    ) -> AsyncGenerator[ChatResponse, None]:
+        response, complete = None, False
+        try:
+            async for response in chat_stream:
+                yield response
+            complete = True
+        finally:
+            if response is None or not (complete or _is_tool_call(response)):
+                response = None
+            else:
+                self.cache.set(key, response)
+            self._end_flight(flight_key, future, response)
+            await chat_stream.aclose()
+
+
+llm_response_cache = LLMResponseCache(
+    "llm_responses",
+    ttl=settings.llm_cache.ttl,
+    max_size=settings.llm_cache.max_entries,
+)
@@ -0,0 +1,393 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+
+from LLM.rate_limiter import call_progress
+from commons.stats import RollingStats
+
+# runs the blocking calls of sync hedged requests, one thread per attempt in flight
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+# marks the end of a stream read by HedgedLLM._apump
+_END = object()
+
+# seconds between checks of an attempt waiting for its rate limit
+_QUEUED_POLL = 0.05
+
+
+def _close(stream: Any) -> None:
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+async def _aclose(stream: Any) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class ModelStats:
+    """Latency, wins and errors of each model behind hedged LLMs, shared in process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[str, RollingStats] = {}
+        self.wins: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.hedges = 0
+        self.failovers = 0
+
+    def _latency(self, name: str) -> RollingStats:
+        with self._lock:
+            if name not in self.latency:
+                self.latency[name] = RollingStats()
+            return self.latency[name]
+
+    def won(self, name: str, elapsed: float) -> None:
+        self._latency(name).add(elapsed)
+        with self._lock:
+            self.wins[name] = self.wins.get(name, 0) + 1
+
+    def lost(self, name: str, elapsed: float) -> None:
+        # censored sample: the call was cancelled, it would have taken at least this long;
+        # without it the slow calls that get hedged would vanish from the model's tail
+        self._latency(name).add(elapsed)
+
+    def failed(self, name: str, e: BaseException) -> None:
+        print(f"LLM {name} failed: {str(e)}")
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def extra_attempt(self, hedge: bool) -> None:
+        with self._lock:
+            if hedge:
+                self.hedges += 1
+            else:
+                self.failovers += 1
+
+    def samples(self, name: str) -> int:
+        """Latency samples seen for a model, cancelled calls included"""
+        return self._latency(name).count
+
+    def percentile(self, name: str, pct: float, min_samples: int) -> Optional[float]:
+        """Latency percentile of a model, or None before min_samples calls"""
+        stats = self._latency(name)
+        if stats.count < min_samples:
+            return None
+        return stats.percentile(pct)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns hedge/failover counters and, per model, wins, errors and latency"""
+        with self._lock:
+            names = list(self.latency)
+            hedges, failovers = self.hedges, self.failovers
+            wins, errors = dict(self.wins), dict(self.errors)
+        return {
+            "hedges": hedges,
+            "failovers": failovers,
+            "models": {
+                name: {
+                    "wins": wins.get(name, 0),
+                    "errors": errors.get(name, 0),
+                    "latency_seconds": self.latency[name].summary(),
+                }
+                for name in names
+            },
+        }
+
+
+model_stats = ModelStats()
+
+
+class _Attempt:
+    """One model's try at a call, timed from when it leaves the rate limiter's queue."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.in_flight = True
+
+    def progress(self, in_flight: bool) -> None:
+        self.in_flight = in_flight
+        if in_flight:
+            self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class HedgedLLM:
+    """
+    Composite LLM that hedges slow calls and fails over on errors.
+
+    A call goes to the first model. If it has not answered (for streams: sent its
+    first chunk) after the hedge delay of that model, the same call is also sent
+    to the next model; the first valid answer is used and the other call is
+    cancelled. A call that fails hands over to the next model right away. The
+    hedge delay is the model's recent p95 latency, measured in process; calls
+    that lost a race count with the time they ran, a lower bound of their
+    latency. Until min_samples calls were seen, the delay is also capped at
+    default_delay. Only time spent at the provider counts: a call waiting for
+    its rate limit (queued, or paused after a 429) is not hedged, since that
+    would add load to a saturated provider. Other attributes are the first
+    model's.
+    """
+
+    def __init__(
+        self,
+        models: List[Tuple[str, Any]],
+        default_delay: float = 4.0,
+        min_delay: float = 0.5,
+        percentile: float = 95,
+        min_samples: int = 20,
+        stats: ModelStats = model_stats,
+    ):
+        if not models:
+            raise ValueError("HedgedLLM needs at least one model")
+        self.models = models
+        self.llm = models[0][1]
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait for a model before hedging its call"""
+        latency = self.stats.percentile(name, self.percentile, min_samples=1)
+        if latency is None:
+            return self.default_delay
+        delay = max(self.min_delay, latency)
+        if self.stats.samples(name) < self.min_samples:
+            # a few samples give a rough percentile, never wait longer than the default on it
+            delay = min(delay, self.default_delay)
+        return delay
+
+    def _hedge_timeout(self, latest: _Attempt) -> float:
+        """Seconds until the latest attempt should be hedged"""
+        if not latest.in_flight:
+            return _QUEUED_POLL
+        return max(0.0, self.hedge_delay(latest.name) - latest.elapsed)
+
+    def _hedge_due(self, latest: _Attempt) -> bool:
+        return latest.in_flight and latest.elapsed >= self.hedge_delay(latest.name)
+
+    def _lost(self, attempts: Iterable[_Attempt]) -> None:
+        """Record the attempts cancelled because another one won"""
+        for attempt in attempts:
+            if attempt.in_flight:
+                self.stats.lost(attempt.name, attempt.elapsed)
+
+    @staticmethod
+    async def _aattempt(attempt: _Attempt, call: Callable[[Any], Awaitable[Any]], llm: Any) -> Any:
+        # the task runs in its own context, the rate limiter reports to this attempt only
+        call_progress.set(attempt.progress)
+        return await call(llm)
+
+    @staticmethod
+    def _attempt(attempt: _Attempt, call: Callable[[Any], Any], llm: Any) -> Any:
+        call_progress.set(attempt.progress)
+        return call(llm)
+
+    async def _arace(self, call: Callable[[Any], Awaitable[Any]], release: Callable[[Any], Awaitable[None]]) -> Any:
+        """
+        Run call(llm) on the models, hedging and failing over, and return the first result
+
+        Args:
+            call: Opens the call on one model, e.g. up to the first chunk of a stream
+            release: Frees the result of a call that lost the race
+        """
+        tasks: Dict[asyncio.Task, _Attempt] = {}
+        next_model = 0
+        error: Optional[BaseException] = None
+
+        def start() -> None:
+            nonlocal next_model
+            name, llm = self.models[next_model]
+            next_model += 1
+            attempt = _Attempt(name)
+            tasks[asyncio.ensure_future(self._aattempt(attempt, call, llm))] = attempt
+
+        start()
+        try:
+            while tasks:
+                latest = list(tasks.values())[-1]
+                timeout = None
+                if next_model < len(self.models):
+                    timeout = self._hedge_timeout(latest)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self._hedge_due(latest):
+                        self.stats.extra_attempt(hedge=True)
+                        start()
+                    continue
+                for task in done:
+                    attempt = tasks.pop(task)
+                    if task.exception() is None:
+                        self.stats.won(attempt.name, attempt.elapsed)
+                        self._lost(tasks.values())
+                        return task.result()
+                    error = task.exception()
+                    self.stats.failed(attempt.name, error)
+                if not tasks and next_model < len(self.models):
+                    self.stats.extra_attempt(hedge=False)
+                    start()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if not isinstance(result, BaseException):
+                    await release(result)
+
+    def _race(self, call: Callable[[Any], Any], release: Callable[[Any], None]) -> Any:
+        """Sync version of _arace, running each attempt in a thread"""
+        futures: Dict[Future, _Attempt] = {}
+        next_model = 0
+        error: Optional[BaseException] = None
+
+        def start() -> None:
+            nonlocal next_model
+            name, llm = self.models[next_model]
+            next_model += 1
+            attempt = _Attempt(name)
+            context = contextvars.copy_context()
+            futures[_executor.submit(context.run, self._attempt, attempt, call, llm)] = attempt
+
+        def release_when_done(future: Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                release(future.result())
+
+        start()
+        try:
+            while futures:
+                latest = list(futures.values())[-1]
+                timeout = None
+                if next_model < len(self.models):
+                    timeout = self._hedge_timeout(latest)
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if self._hedge_due(latest):
+                        self.stats.extra_attempt(hedge=True)
+                        start()
+                    continue
+                for future in done:
+                    attempt = futures.pop(future)
+                    if future.exception() is None:
+                        self.stats.won(attempt.name, attempt.elapsed)
+                        self._lost(futures.values())
+                        return future.result()
+                    error = future.exception()
+                    self.stats.failed(attempt.name, error)
+                if not futures and next_model < len(self.models):
+                    self.stats.extra_attempt(hedge=False)
+                    start()
+            raise error
+        finally:
+            # a blocking call cannot be interrupted: free the losers when they return
+            for future in futures:
+                if not future.cancel():
+                    future.add_done_callback(release_when_done)
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return self._race(lambda llm: llm.chat(messages, **kwargs), lambda response: None)
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        async def call(llm: Any) -> ChatResponse:
+            return await llm.achat(messages, **kwargs)
+
+        async def release(response: ChatResponse) -> None:
+            pass
+
+        return await self._arace(call, release)
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Generator[ChatResponse, None, None]:
+        def call(llm: Any) -> Tuple[ChatResponse, Any]:
+            chat_stream = llm.stream_chat(messages, **kwargs)
+            for first in chat_stream:
+                return first, chat_stream
+            raise ValueError("LLM returned an empty stream")
+
+        first, chat_stream = self._race(call, lambda opened: _close(opened[1]))
+        try:
+            yield first
+            yield from chat_stream
+        finally:
+            _close(chat_stream)
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncGenerator[ChatResponse, None]:
+        loop = asyncio.get_running_loop()
+
+        async def call(llm: Any) -> Tuple[asyncio.Queue, asyncio.Task]:
+            queue: asyncio.Queue = asyncio.Queue()
+            first = loop.create_future()
+            pump = asyncio.ensure_future(self._apump(llm, messages, kwargs, queue, first))
+            try:
+                await first
+            except BaseException:
+                pump.cancel()
+                raise
+            return queue, pump
+
+        async def release(opened: Tuple[asyncio.Queue, asyncio.Task]) -> None:
+            opened[1].cancel()
+            await asyncio.gather(opened[1], return_exceptions=True)
+
+        queue, pump = await self._arace(call, release)
+        return self._arest(queue, pump)
+
+    async def _apump(
+        self,
+        llm: Any,
+        messages: Sequence[ChatMessage],
+        kwargs: Dict[str, Any],
+        queue: asyncio.Queue,
+        first: asyncio.Future,
+    ) -> None:
+        """
+        Read a model's stream into a queue, resolving first at its first chunk
+
+        The stream is opened, read and closed in this one task, which providers
+        whose clients are bound to the task that opened them require.
+        """
+        try:
+            chat_stream = await llm.astream_chat(messages, **kwargs)
+            try:
+                async for chunk in chat_stream:
+                    if not first.done():
+                        first.set_result(True)
+                    await queue.put(chunk)
+            finally:
+                await _aclose(chat_stream)
+            if not first.done():
+                first.set_exception(ValueError("LLM returned an empty stream"))
+            await queue.put(_END)
+        except Exception as e:
+            if not first.done():
+                first.set_exception(e)
+            else:
+                await queue.put(e)
+
+    async def _arest(self, queue: asyncio.Queue, pump: asyncio.Task) -> AsyncGenerator[ChatResponse, None]:
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _END:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            pump.cancel()
@@ -1,15 +1,30 @@
-from llama_index.llms.gemini import Gemini
-from llama_index.llms.deepseek import DeepSeek
-from llama_index.llms.anthropic import Anthropic
+import importlib
 import os
+import threading
 from dotenv import load_dotenv
 
+from LLM.cached_llm import CachedLLM, llm_response_cache
+from LLM.hedged_llm import HedgedLLM
+from LLM.metered_llm import MeteredLLM
+from LLM.rate_limiter import RateLimitedLLM, get_rate_limiter
+from config import settings
+
 load_dotenv()
 
+# llama-index integration of each provider, imported on first use
+SDK_MODULES = {
+    "gemini": "llama_index.llms.gemini",
+    "deepseek": "llama_index.llms.deepseek",
+    "anthropic": "llama_index.llms.anthropic",
+}
+
 class LLMSettingsManager:
     """Manages settings and initialization of different LLM models."""
     
     def __init__(self):
+        # LLMs already built, shared by every caller asking for the same parameters
+        self._instances = {}
+        self._lock = threading.RLock()
         self.api_keys = {
             "deepseek": os.getenv("DEEPSEEK_API_KEY"),
             "anthropic": os.getenv("ANTHROPIC_API_KEY"),
@@ -52,18 +67,40 @@ class LLMSettingsManager:
             raise ValueError(f"Invalid provider: {provider}")
         return self.available_models
     
+    def _shared(self, key, build):
+        """Return the instance built for key, building it on first use"""
+        with self._lock:
+            if key not in self._instances:
+                self._instances[key] = build()
+            return self._instances[key]
+    
     def get_llm(self, provider: str, **kwargs):
         """
-        Initialize and return an LLM instance based on the chosen provider.
+        Get the LLM instance of a provider, model and temperature.
+        
+        The instance is built on first use and shared by later calls with the same
+        parameters, so its client and connection pool are reused.
         
         Args:
             provider (str): LLM provider name ("gemini", "deepseek", "anthropic")
-            **kwargs: Additional parameters for LLM initialization
+            **kwargs: Additional parameters for LLM initialization; cache=False skips
+                the response cache (on by default with LLM_CACHE_ENABLED)
             
         Returns:
             Corresponding LLM instance
         """
         provider = provider.lower()
+        key = (
+            "llm",
+            provider,
+            kwargs.get("model"),
+            kwargs.get("temperature", 0.1),
+            kwargs.get("cache", settings.llm_cache.enabled),
+        )
+        return self._shared(key, lambda: self._build_llm(provider, **kwargs))
+    
+    def _build_llm(self, provider: str, **kwargs):
+        """Initialize an LLM instance based on the chosen provider"""
         if provider not in self.available_models:
             raise ValueError(f"Invalid provider: {provider}")
             
@@ -76,23 +113,144 @@ class LLMSettingsManager:
             raise ValueError(f"Invalid model for {provider}: {model}")
             
         temperature = kwargs.get("temperature", 0.1)
+        # 429s are retried by the rate limiter, which honours Retry-After
+        max_retries = 0 if settings.llm_rate_limit.enabled else 3
             
+        # provider SDKs take seconds to import, only load the ones in use
         if provider == "gemini":
-            return Gemini(model=model, temperature=temperature)
+            from llama_index.llms.gemini import Gemini
+            llm = Gemini(model=model, temperature=temperature)
             
         elif provider == "deepseek":
-            return DeepSeek(
+            from llama_index.llms.deepseek import DeepSeek
+            llm = DeepSeek(
                 model=model,
                 api_key=self.api_keys["deepseek"],
                 temperature=temperature,
+                max_retries=max_retries,
             )
             
         elif provider == "anthropic":
-            return Anthropic(
+            from llama_index.llms.anthropic import Anthropic
+            llm = Anthropic(
                 model=model,
                 api_key=self.api_keys["anthropic"],
                 temperature=temperature,
+                max_retries=max_retries,
             )
+
+        llm = MeteredLLM(llm, provider, model)
+
+        if settings.llm_rate_limit.enabled:
+            llm = RateLimitedLLM(
+                llm,
+                get_rate_limiter(f"{provider}:{model}"),
+                completion_tokens=settings.llm_rate_limit.completion_tokens,
+                max_retries=settings.llm_rate_limit.max_retries,
+                backoff=settings.llm_rate_limit.backoff,
+            )
+
+        if kwargs.get("cache", settings.llm_cache.enabled):
+            return CachedLLM(llm, llm_response_cache, flight_timeout=settings.llm_cache.flight_timeout)
+        return llm
+    
+    def get_provider_llm(self, provider: str, **kwargs):
+        """
+        Get the provider client inside the get_llm(provider, cache=False) instance.
+
+        Calls made on it skip the metrics, rate limiter and response cache, and are
+        seen by no HedgedLLM, while sharing the client and connection pool of the
+        instance the agent uses.
+        
+        Args:
+            provider (str): LLM provider name ("gemini", "deepseek", "anthropic")
+            **kwargs: Parameters of the LLM, as for get_llm
+            
+        Returns:
+            The llama-index LLM of the provider
+        """
+        llm = self.get_llm(provider, **{**kwargs, "cache": False})
+        while isinstance(llm, (CachedLLM, RateLimitedLLM, MeteredLLM)):
+            llm = llm.llm
+        return llm
+    
+    def get_hedged_llm(self, provider: str, **kwargs):
+        """
+        Initialize an LLM backed by the LLM_HEDGE_MODELS models.
+
+        Slow calls are hedged and failed calls retried on those models, see HedgedLLM.
+        
+        Args:
+            provider (str): Main LLM provider name ("gemini", "deepseek", "anthropic")
+            **kwargs: Parameters of the main LLM, as for get_llm
+            
+        Returns:
+            HedgedLLM over the main and hedge models, or the main LLM alone when no
+            hedge model is configured; built on first use and shared like get_llm
+        """
+        provider = provider.lower()
+        key = (
+            "hedged",
+            provider,
+            kwargs.get("model"),
+            kwargs.get("temperature", 0.1),
+            kwargs.get("cache", settings.llm_cache.enabled),
+        )
+        return self._shared(key, lambda: self._build_hedged_llm(provider, **kwargs))
+    
+    def _build_hedged_llm(self, provider: str, **kwargs):
+        """Initialize a HedgedLLM over the main and hedge models"""
+        primary = self.get_llm(provider, **{**kwargs, "cache": False})
+        model = kwargs.get("model", self.available_models[provider][0])
+        models = [(f"{provider}:{model}", primary)]
+        
+        for spec in settings.llm_hedge.models.split(","):
+            spec = spec.strip()
+            if not spec or spec == models[0][0]:
+                continue
+            hedge_provider, _, hedge_model = spec.partition(":")
+            try:
+                hedge = self.get_llm(
+                    hedge_provider,
+                    model=hedge_model,
+                    temperature=kwargs.get("temperature", 0.1),
+                    cache=False,
+                )
+            except Exception as e:
+                print(f"Skipping hedge model {spec}: {str(e)}")
+                continue
+            models.append((spec, hedge))
+            
+        llm = primary
+        if len(models) > 1:
+            llm = HedgedLLM(
+                models,
+                default_delay=settings.llm_hedge.default_delay,
+                min_delay=settings.llm_hedge.min_delay,
+                percentile=settings.llm_hedge.percentile,
+            )
+        if kwargs.get("cache", settings.llm_cache.enabled):
+            return CachedLLM(llm, llm_response_cache, flight_timeout=settings.llm_cache.flight_timeout)
+        return llm
+    
+    def import_sdks(self, provider: str):
+        """
+        Import the SDKs of a provider and of the LLM_HEDGE_MODELS models, without
+        building any client.
+        
+        A server that preloads the app before forking its workers calls this so
+        the SDKs are loaded once and shared; clients are still built per worker.
+        
+        Args:
+            provider (str): Main LLM provider name, as passed to get_hedged_llm
+        """
+        providers = {provider.lower()}
+        for spec in settings.llm_hedge.models.split(","):
+            if spec.strip():
+                providers.add(spec.strip().partition(":")[0].lower())
+        for name in providers:
+            if name in SDK_MODULES:
+                importlib.import_module(SDK_MODULES[name])
     
     def get_default_llm(self):
         """Returns the default LLM instance (Anthropic Claude)"""
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Generator, Sequence
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+
+from commons.metrics import llm_request_seconds, llm_requests, outcome
+
+
+class MeteredLLM:
+    """
+    Wraps an LLM to record the latency and outcome of each provider call.
+
+    Streams are timed until they end or their consumer closes them, which is
+    where the ReAct worker stops at a tool call. Calls closed or cancelled by the
+    caller (e.g. the slower call of a hedged pair) are not errors. It sits under
+    the rate limiter, so time spent waiting for budget is not counted. Other
+    attributes are the wrapped LLM's.
+    """
+
+    def __init__(self, llm, provider: str, model: str):
+        self.llm = llm
+        self.latency = llm_request_seconds.labels(provider, model)
+        self.provider = provider
+        self.model = model
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _record(self, started: float, error: bool) -> None:
+        self.latency.observe(time.perf_counter() - started)
+        llm_requests.labels(self.provider, self.model, outcome(error)).inc()
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        started, error = time.perf_counter(), True
+        try:
+            response = self.llm.chat(messages, **kwargs)
+            error = False
+            return response
+        finally:
+            self._record(started, error)
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        started, error = time.perf_counter(), True
+        try:
+            response = await self.llm.achat(messages, **kwargs)
+            error = False
+            return response
+        except asyncio.CancelledError:
+            error = False
+            raise
+        finally:
+            self._record(started, error)
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Generator[ChatResponse, None, None]:
+        started, error = time.perf_counter(), True
+        chat_stream = None
+        try:
+            chat_stream = self.llm.stream_chat(messages, **kwargs)
+            yield from chat_stream
+            error = False
+        except GeneratorExit:
+            error = False
+            raise
+        finally:
+            if chat_stream is not None:
+                chat_stream.close()
+            self._record(started, error)
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncGenerator[ChatResponse, None]:
+        started = time.perf_counter()
+        try:
+            chat_stream = await self.llm.astream_chat(messages, **kwargs)
+        except asyncio.CancelledError:
+            self._record(started, False)
+            raise
+        except BaseException:
+            self._record(started, True)
+            raise
+        return self._arest(started, chat_stream)
+
+    async def _arest(self, started: float, chat_stream: Any) -> AsyncGenerator[ChatResponse, None]:
+        error = True
+        try:
+            async for chunk in chat_stream:
+                yield chunk
+            error = False
+        except (GeneratorExit, asyncio.CancelledError):
+            error = False
+            raise
+        finally:
+            self._record(started, error)
+            await chat_stream.aclose()
@@ -0,0 +1,362 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Generator, Optional, Sequence, Tuple
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+
+from commons.stats import RollingStats
+from config import settings
+from utils.context_builder import count_message_tokens, provider_of
+from utils.request_context import get_request_context
+
+
+# set by callers that need to know whether their call is waiting for budget (HedgedLLM):
+# called with False while the call is queued and True once it is sent to the provider
+call_progress: ContextVar[Optional[Callable[[bool], None]]] = ContextVar("llm_call_progress", default=None)
+
+
+def _report_progress(in_flight: bool) -> None:
+    callback = call_progress.get()
+    if callback is not None:
+        callback(in_flight)
+
+
+def rate_limit_delay(e: BaseException, default: float) -> Optional[float]:
+    """
+    Seconds to wait after a provider error, if it is a rate limit (HTTP 429)
+
+    Args:
+        e (BaseException): Error raised by the provider client
+        default (float): Delay used when the response has no usable Retry-After header
+
+    Returns:
+        Optional[float]: Retry-After delay, default, or None for other errors
+    """
+    response = getattr(e, "response", None)
+    statuses = (getattr(e, "status_code", None), getattr(response, "status_code", None), getattr(e, "code", None))
+    if 429 not in statuses and type(e).__name__ not in ("ResourceExhausted", "RateLimitError"):
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return default
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    """A call waiting for budget; grant() wakes it up."""
+
+    __slots__ = ("user", "tokens", "grant", "enqueued")
+
+    def __init__(self, user: str, tokens: int, grant: Callable[[], None]):
+        self.user = user
+        self.tokens = tokens
+        self.grant = grant
+        self.enqueued = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Request and token budgets of one provider model, shared by every call in the process.
+
+    Both budgets refill continuously at their per-minute rate and hold at most
+    burst_seconds worth of it, so a full minute of budget is never spent in one
+    burst the provider would reject. Calls that do not fit wait in one queue
+    per user, served round robin so a user sending many messages cannot starve
+    the others. After a 429 the limiter is paused for the provider's
+    Retry-After delay.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 10):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._max_requests = max(1.0, requests_per_minute * burst_seconds / 60)
+        self._max_tokens = tokens_per_minute * burst_seconds / 60
+        self._lock = threading.Lock()
+        self._requests = self._max_requests
+        self._tokens = self._max_tokens
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._timer: Optional[threading.Timer] = None
+        self.wait_time = RollingStats()
+        self.granted = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._max_requests, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self._max_tokens, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _dispatch(self) -> None:
+        """Grant budget to the waiting calls that fit, round robin by user; lock held"""
+        now = time.monotonic()
+        self._refill(now)
+        while self._queues and now >= self._paused_until:
+            user, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            # a prompt larger than the bucket waits for a full bucket
+            tokens = min(waiter.tokens, self._max_tokens)
+            if self._requests < 1 or self._tokens < tokens:
+                break
+            self._requests -= 1
+            self._tokens -= tokens
+            queue.popleft()
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            self.granted += 1
+            self.wait_time.add(now - waiter.enqueued)
+            waiter.grant()
+        self._schedule(now)
+
+    def _schedule(self, now: float) -> None:
+        """Wake up when the next waiting call can go; lock held"""
+        if not self._queues or self._timer is not None:
+            return
+        waiter = next(iter(self._queues.values()))[0]
+        tokens = min(waiter.tokens, self._max_tokens)
+        delay = max(
+            0.001,
+            self._paused_until - now,
+            (1 - self._requests) * 60 / self.requests_per_minute,
+            (tokens - self._tokens) * 60 / self.tokens_per_minute,
+        )
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._queues.setdefault(waiter.user, deque()).append(waiter)
+            self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        with self._lock:
+            queue = self._queues.get(waiter.user)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[waiter.user]
+
+    def acquire(self, tokens: int, user: str) -> None:
+        """
+        Wait until a call of this size fits the budgets
+
+        Args:
+            tokens (int): Estimated prompt and completion tokens of the call
+            user (str): Key the queue is fair across
+        """
+        granted = threading.Event()
+        self._enqueue(_Waiter(user, tokens, granted.set))
+        granted.wait()
+
+    async def aacquire(self, tokens: int, user: str) -> None:
+        """
+        Async version of acquire
+
+        Args:
+            tokens (int): Estimated prompt and completion tokens of the call
+            user (str): Key the queue is fair across
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = _Waiter(user, tokens, lambda: loop.call_soon_threadsafe(_resolve, future))
+        self._enqueue(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            raise
+
+    def pause(self, seconds: float) -> None:
+        """Hold every call for seconds, after the provider answered 429"""
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns budgets, queue depth, grant/429 counters and queue wait time"""
+        with self._lock:
+            queued = sum(len(queue) for queue in self._queues.values())
+            paused = max(0.0, self._paused_until - time.monotonic())
+            granted, throttled = self.granted, self.throttled
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queued": queued,
+            "granted": granted,
+            "throttled": throttled,
+            "paused_seconds": round(paused, 4),
+            "wait_time_seconds": self.wait_time.summary(),
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _configured_limits() -> Dict[str, Tuple[float, float]]:
+    """LLM_RATE_LIMITS entries: "provider:model=rpm/tpm" """
+    limits = {}
+    for entry in settings.llm_rate_limit.limits.split(","):
+        name, _, budget = entry.strip().rpartition("=")
+        if not name:
+            continue
+        requests, _, tokens = budget.partition("/")
+        limits[name] = (float(requests), float(tokens or settings.llm_rate_limit.tokens_per_minute))
+    return limits
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    Get the limiter of a provider model, creating it with its configured budgets
+
+    Args:
+        name (str): "provider:model"
+
+    Returns:
+        RateLimiter: The process-wide limiter of that model
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            requests, tokens = _configured_limits().get(
+                name,
+                (settings.llm_rate_limit.requests_per_minute, settings.llm_rate_limit.tokens_per_minute),
+            )
+            _limiters[name] = RateLimiter(name, requests, tokens)
+        return _limiters[name]
+
+
+def rate_limiter_metrics() -> Dict[str, Any]:
+    """Returns the metrics of every limiter created so far, by "provider:model" """
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.metrics() for name, limiter in limiters.items()}
+
+
+class RateLimitedLLM:
+    """
+    Wraps an LLM so every call first waits for its provider's budget.
+
+    The cost of a call is its prompt tokens plus the expected completion. A call
+    rejected with 429 pauses the limiter for the Retry-After delay (or an
+    exponential backoff) and is queued again, up to max_retries times; for
+    streams this covers errors raised before the first chunk. Callers can follow
+    whether a call is queued or sent through call_progress. Other attributes
+    are the wrapped LLM's.
+    """
+
+    def __init__(
+        self,
+        llm,
+        limiter: RateLimiter,
+        completion_tokens: int = 512,
+        max_retries: int = 3,
+        backoff: float = 2.0,
+    ):
+        self.llm = llm
+        self.limiter = limiter
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _cost(self, messages: Sequence[ChatMessage]) -> int:
+        return count_message_tokens(messages, provider_of(self.llm)) + self.completion_tokens
+
+    @staticmethod
+    def _user() -> str:
+        return get_request_context().jwt_token or "anonymous"
+
+    def _retry_delay(self, e: Exception, attempt: int) -> Optional[float]:
+        """Delay before retrying a call that failed, or None to raise the error"""
+        if attempt >= self.max_retries:
+            return None
+        delay = rate_limit_delay(e, self.backoff * 2 ** attempt)
+        if delay is not None:
+            self.limiter.pause(delay)
+        return delay
+
+    def _call(self, messages: Sequence[ChatMessage], call: Callable[[], Any]) -> Any:
+        cost, user = self._cost(messages), self._user()
+        attempt = 0
+        while True:
+            _report_progress(False)
+            self.limiter.acquire(cost, user)
+            _report_progress(True)
+            try:
+                return call()
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+
+    async def _acall(self, messages: Sequence[ChatMessage], call: Callable[[], Any]) -> Any:
+        cost, user = self._cost(messages), self._user()
+        attempt = 0
+        while True:
+            _report_progress(False)
+            await self.limiter.aacquire(cost, user)
+            _report_progress(True)
+            try:
+                return await call()
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return self._call(messages, lambda: self.llm.chat(messages, **kwargs))
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return await self._acall(messages, lambda: self.llm.achat(messages, **kwargs))
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Generator[ChatResponse, None, None]:
+        def call() -> Tuple[Optional[ChatResponse], Any]:
+            chat_stream = self.llm.stream_chat(messages, **kwargs)
+            return next(chat_stream, None), chat_stream
+
+        first, chat_stream = self._call(messages, call)
+        try:
+            if first is not None:
+                yield first
+                yield from chat_stream
+        finally:
+            chat_stream.close()
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncGenerator[ChatResponse, None]:
+        async def call() -> Tuple[Optional[ChatResponse], Any]:
+            chat_stream = await self.llm.astream_chat(messages, **kwargs)
+            async for first in chat_stream:
+                return first, chat_stream
+            return None, chat_stream
+
+        first, chat_stream = await self._acall(messages, call)
+        return self._arest(first, chat_stream)
+
+    async def _arest(self, first: Optional[ChatResponse], chat_stream: Any) -> AsyncGenerator[ChatResponse, None]:
+        try:
+            if first is not None:
+                yield first
+                async for chunk in chat_stream:
+                    yield chunk
+        finally:
+            await chat_stream.aclose()
@@ -1,8 +1,10 @@
-from typing import List, Optional, Sequence
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from functools import wraps
+import asyncio
 import inspect
 
 from llama_index.core import PromptTemplate
-from llama_index.core.agent import ReActAgent
+from llama_index.core.agent import AgentRunner
 from llama_index.core.agent.react.formatter import (
     ReActChatFormatter,
     get_react_tool_descriptions,
@@ -16,6 +18,7 @@ from llama_index.core.agent.react.types import (
     ObservationReasoningStep,
 )
 from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.chat_engine.types import StreamingAgentChatResponse
 from llama_index.core.tools import BaseTool, FunctionTool
 from llama_index.core.tools import BaseTool, ToolOutput
 from utils.output_parser import ReActOutputParser
@@ -28,15 +31,63 @@ from tools import (
     get_all_positions,
     scan_token,
     get_trending_pairs,
+    aget_wallet_balance,
+    asearch_token,
+    abuy_token,
+    asell_token,
+    aget_all_positions,
+    ascan_token,
+    aget_trending_pairs,
 )
 
 from prompts.react import REACT_CHAT_SYSTEM_HEADER_CUSTOM
+from intent_router import intent_router
 from LLM.llm_settings_manager import LLMSettingsManager
 from utils.tool_history import ToolHistoryLogger
+from utils.request_context import get_request_context, request_context
+from utils.agent_events import agent_event_handler, emit_agent_event
+from utils.react_worker import StreamingReActAgentWorker
+from utils.context_builder import count_tokens
 
 llm_manager = LLMSettingsManager()
 
-llm = llm_manager.get_llm("gemini", model="models/gemini-1.5-pro")
+
+LLM_PROVIDER = "gemini"
+LLM_MODEL = "models/gemini-1.5-pro"
+
+
+def get_llm():
+    """
+    The agent LLM, built on first use and shared by every request of the process
+
+    Building it creates the provider clients, so it is left out of import time
+    and done by the startup warm-up instead.
+    """
+    return llm_manager.get_hedged_llm(LLM_PROVIDER, model=LLM_MODEL)
+
+
+def get_provider_llm():
+    """The provider client of the agent's main model, bypassing its wrappers"""
+    return llm_manager.get_provider_llm(LLM_PROVIDER, model=LLM_MODEL)
+
+
+def preload() -> None:
+    """
+    Load everything the agent needs that can be shared between forked workers
+
+    Imports the LLM SDKs and loads the tokenizer, without building clients or
+    opening connections, which each worker does in its own warm-up.
+    """
+    llm_manager.import_sdks(LLM_PROVIDER)
+    count_tokens("preload")
+
+
+def __getattr__(name: str):
+    # `from agents import llm` still works, building the LLM when first imported
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 tool_logger = ToolHistoryLogger()
 
@@ -65,6 +116,49 @@ class CustomReActChatFormatter(ReActChatFormatter):
         super().__init__(system_header=system_header, context=context)
         self._kwargs = kwargs
         self._current_reasoning = []
+        self._header_cache: Dict[Tuple, ChatMessage] = {}
+
+    def _system_message(self, tools: Sequence[BaseTool]) -> ChatMessage:
+        """
+        Get the system message for a tool set, rendering it on first use.
+
+        The header only depends on the template, the context and the tools, so it is
+        rendered once per combination instead of on every ReAct iteration.
+        """
+        key = (
+            self.system_header,
+            self.context,
+            tuple((tool.metadata.get_name(), tool.metadata.description) for tool in tools),
+        )
+        message = self._header_cache.get(key)
+        if message is None:
+            format_args = {
+                "tool_desc": "\n".join(get_react_tool_descriptions(tools)),
+                "tool_names": ", ".join([tool.metadata.get_name() for tool in tools]),
+            }
+
+            if self.context:
+                format_args["context"] = self.context
+
+            combined_args = {**format_args, **self._kwargs}
+            message = ChatMessage(
+                role=MessageRole.SYSTEM,
+                content=self.system_header.format(**combined_args),
+            )
+            self._header_cache[key] = message
+        return message
+
+    @staticmethod
+    def _reasoning_message(reasoning_step: BaseReasoningStep) -> ChatMessage:
+        if isinstance(reasoning_step, ObservationReasoningStep):
+            return ChatMessage(
+                role=MessageRole.USER,
+                content=reasoning_step.get_content(),
+            )
+        return ChatMessage(
+            role=MessageRole.ASSISTANT,
+            content=reasoning_step.get_content(),
+        )
 
     def format(
         self,
@@ -74,36 +168,27 @@ class CustomReActChatFormatter(ReActChatFormatter):
         **kwargs,
     ) -> List[ChatMessage]:
         """Format chat history into list of ChatMessage."""
-        self._current_reasoning = current_reasoning or []
-
-        format_args = {
-            "tool_desc": "\n".join(get_react_tool_descriptions(tools)),
-            "tool_names": ", ".join([tool.metadata.get_name() for tool in tools]),
-        }
-
-        if self.context:
-            format_args["context"] = self.context
-
-        combined_args = {**format_args, **self._kwargs}
-        fmt_sys_header = self.system_header.format(**combined_args)
-        reasoning_history = []
-        for reasoning_step in self.reasoning_steps:
-            if isinstance(reasoning_step, ObservationReasoningStep):
-                message = ChatMessage(
-                    role=MessageRole.USER,
-                    content=reasoning_step.get_content(),
-                )
-            else:
-                message = ChatMessage(
-                    role=MessageRole.ASSISTANT,
-                    content=reasoning_step.get_content(),
-                )
-            reasoning_history.append(message)
+        current_reasoning = current_reasoning or []
+        self._current_reasoning = current_reasoning
+
+        # Reasoning steps only get appended during a run, so the messages built for
+        # earlier steps are kept in the request context and only new steps are formatted.
+        cached = get_request_context().reasoning_messages
+        reused = 0
+        while (
+            reused < len(cached)
+            and reused < len(current_reasoning)
+            and cached[reused][0] is current_reasoning[reused]
+        ):
+            reused += 1
+        del cached[reused:]
+        for reasoning_step in current_reasoning[reused:]:
+            cached.append((reasoning_step, self._reasoning_message(reasoning_step)))
 
         return [
-            ChatMessage(role=MessageRole.SYSTEM, content=fmt_sys_header),
+            self._system_message(tools),
             *chat_history,
-            *reasoning_history,
+            *(message for _, message in cached),
         ]
 
     @classmethod
@@ -130,11 +215,43 @@ def custom_failure_handler(callback_manager, exception):
     return ToolOutput(content=error_message, tool_name="Error Handler")
 
 
+def with_request_jwt(fn):
+    """
+    Hide a tool's jwt_token parameter from the LLM and fill it from the request context.
+
+    Tools are wrapped once at import time; the token of the user being served is read
+    from the RequestContext set by react_chat / react_chat_async.
+    """
+    signature = inspect.signature(fn)
+    if 'jwt_token' not in signature.parameters:
+        return fn
+
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def wrapped_fn(**kwargs):
+            kwargs['jwt_token'] = get_request_context().jwt_token
+            return await fn(**kwargs)
+    else:
+        @wraps(fn)
+        def wrapped_fn(**kwargs):
+            kwargs['jwt_token'] = get_request_context().jwt_token
+            return fn(**kwargs)
+
+    wrapped_fn.__signature__ = signature.replace(
+        parameters=[
+            param for name, param in signature.parameters.items()
+            if name != 'jwt_token'
+        ]
+    )
+    return wrapped_fn
+
+
 react_system_prompt = PromptTemplate(REACT_CHAT_SYSTEM_HEADER_CUSTOM)
 
 tools = [
     FunctionTool.from_defaults(
         fn=get_trending_pairs,
+        async_fn=aget_trending_pairs,
         name="get_trending_pairs", 
         description=(
             "Get trending trading pairs on the market."
@@ -145,7 +262,8 @@ tools = [
         ),
     ),
     FunctionTool.from_defaults(
-        fn=get_wallet_balance,
+        fn=with_request_jwt(get_wallet_balance),
+        async_fn=with_request_jwt(aget_wallet_balance),
         name="get_wallet_balance",
         description=(
             "Check user's wallet balances."
@@ -153,7 +271,8 @@ tools = [
         ),
     ),
     FunctionTool.from_defaults(
-        fn=search_token,
+        fn=with_request_jwt(search_token),
+        async_fn=with_request_jwt(asearch_token),
         name="search_token",
         description=(
             "Search for token information to assist with buying decisions. "
@@ -163,7 +282,8 @@ tools = [
         ),
     ),
     FunctionTool.from_defaults(
-        fn=buy_token,
+        fn=with_request_jwt(buy_token),
+        async_fn=with_request_jwt(abuy_token),
         name="buy_token",
         description=(
             "Buy tokens."
@@ -175,7 +295,8 @@ tools = [
         ),
     ),
     FunctionTool.from_defaults(
-        fn=sell_token,
+        fn=with_request_jwt(sell_token),
+        async_fn=with_request_jwt(asell_token),
         name="sell_token",
         description=(
             "Sell tokens."
@@ -187,7 +308,8 @@ tools = [
         ),
     ),
     FunctionTool.from_defaults(
-        fn=get_all_positions,
+        fn=with_request_jwt(get_all_positions),
+        async_fn=with_request_jwt(aget_all_positions),
         name="get_all_positions",
         description=(
             "Get all token positions from user's wallets to review holdings or prepare for selling."
@@ -196,6 +318,7 @@ tools = [
     ),
     FunctionTool.from_defaults(
         fn=scan_token,
+        async_fn=ascan_token,
         name="scan_token",
         description=(
             "Analyze token's trading metrics."
@@ -207,54 +330,55 @@ tools = [
 ]
 
 
-def react_chat(
-    query: str,
-    llm=None,
-    chat_history: List[ChatMessage] = None,
-    max_iterations=10,
-    jwt_token=None,
-):
-    formatter = CustomReActChatFormatter()
-    
-    tools_with_jwt = []
-    for tool in tools:
-        tool_fn = tool.fn
-        if 'jwt_token' in inspect.signature(tool_fn).parameters:
-            # Create a new function that includes jwt_token in its signature
-            def create_wrapped_fn(original_fn):
-                def wrapped_fn(**kwargs):
-                    kwargs['jwt_token'] = jwt_token
-                    return original_fn(**kwargs)
-                # Copy the original function's signature but remove jwt_token
-                wrapped_fn.__signature__ = inspect.signature(original_fn).replace(
-                    parameters=[
-                        param for name, param in inspect.signature(original_fn).parameters.items()
-                        if name != 'jwt_token'
-                    ]
-                )
-                return wrapped_fn
-                
-            new_tool = FunctionTool.from_defaults(
-                fn=create_wrapped_fn(tool_fn),
-                name=tool.metadata.name,
-                description=tool.metadata.description
-            )
-            tools_with_jwt.append(new_tool)
-        else:
-            tools_with_jwt.append(tool)
-            
-    agent = ReActAgent.from_tools(
-        tools=tools_with_jwt,
+# tools that change the user's holdings; never run concurrently with other tool calls
+TRADE_TOOLS = ("buy_token", "sell_token")
+
+# tools whose output is the answer: the run ends with their raw output as the response
+TERMINAL_TOOLS = ("scan_token", "get_trending_pairs", "get_all_positions", *TRADE_TOOLS)
+
+_agent_workers: Dict[Tuple[int, int], Tuple[object, StreamingReActAgentWorker]] = {}
+
+
+def get_agent_worker(llm, max_iterations: int = 10) -> StreamingReActAgentWorker:
+    """
+    Get the ReAct worker for an LLM, building it on first use.
+
+    The worker holds the tool registry, formatter, output parser and system prompt,
+    none of which change between messages, so it is shared by every request.
+    Conversation state lives in the per-request AgentRunner built by _build_agent.
+    """
+    key = (id(llm), max_iterations)
+    if key not in _agent_workers:
+        # the worker reports tool calls through the llm's callback manager
+        if agent_event_handler not in llm.callback_manager.handlers:
+            llm.callback_manager.add_handler(agent_event_handler)
+        worker = StreamingReActAgentWorker(
+            tools=tools,
+            llm=llm,
+            verbose=True,
+            react_chat_formatter=CustomReActChatFormatter(),
+            max_iterations=max_iterations,
+            output_parser=ReActOutputParser(),
+            serial_tools=TRADE_TOOLS,
+            terminal_tools=TERMINAL_TOOLS,
+        )
+        worker.update_prompts({"system_prompt": react_system_prompt})
+        # keep a reference to the llm so its id cannot be reused by another object
+        _agent_workers[key] = (llm, worker)
+    return _agent_workers[key][1]
+
+
+def _build_agent(llm, chat_history: List[ChatMessage], max_iterations: int) -> AgentRunner:
+    llm = llm or get_llm()
+    return AgentRunner(
+        agent_worker=get_agent_worker(llm, max_iterations),
+        chat_history=chat_history,
         llm=llm,
         verbose=True,
-        chat_history=chat_history,
-        react_chat_formatter=formatter,
-        max_iterations=max_iterations,
-        output_parser=ReActOutputParser()
     )
-    agent.update_prompts({"agent_worker:system_prompt": react_system_prompt})
-    response = agent.chat(query)
-    
+
+
+def _build_response(response) -> dict:
     response_dict = {
         "response": response.response,
         "sources": [
@@ -273,15 +397,122 @@ def react_chat(
     action = None
     
     if response_dict["sources"]:
-        if response_dict["sources"][-1]["tool_name"] in ["scan_token", "get_trending_pairs", "get_all_positions", "buy_token", "sell_token"]:
-            response = str(response_dict["sources"][-1]["raw_output"])
+        if response_dict["sources"][-1]["tool_name"] in TERMINAL_TOOLS:
             action = response_dict["sources"][-1]["tool_name"]
+            # every output of that tool from the last step, e.g. one scan per token asked about
+            last_step = response_dict["sources"][-max(get_request_context().last_tool_outputs, 1):]
+            response = "\n\n".join(
+                str(source["raw_output"]) for source in last_step if source["tool_name"] == action
+            )
             
     
-    response = {
+    return {
             "response": response,
             "action": action
     }
-    
-    agent.reset()
-    return response
\ No newline at end of file
+
+
+def react_chat(
+    query: str,
+    llm=None,
+    chat_history: List[ChatMessage] = None,
+    max_iterations=10,
+    jwt_token=None,
+    message_id=None,
+):
+    with request_context(jwt_token=jwt_token, message_id=message_id):
+        routed = intent_router.route(query, chat_history)
+        if routed is not None:
+            return routed
+        agent = _build_agent(llm, chat_history, max_iterations)
+        response = agent.chat(query)
+        return _build_response(response)
+
+
+async def react_chat_async(
+    query: str,
+    llm=None,
+    chat_history: List[ChatMessage] = None,
+    max_iterations=10,
+    jwt_token=None,
+    message_id=None,
+):
+    """
+    Async version of react_chat: awaits the LLM and the async tool implementations.
+
+    When message_id is given, trades return as soon as the order is submitted and
+    their final status is pushed to the message's thread by the order tracker.
+    Unambiguous commands are answered by the intent router without the LLM.
+    """
+    with request_context(jwt_token=jwt_token, message_id=message_id):
+        routed = await intent_router.aroute(query, chat_history)
+        if routed is not None:
+            return routed
+        agent = _build_agent(llm, chat_history, max_iterations)
+        response = await agent.achat(query)
+        return _build_response(response)
+
+
+
+async def react_chat_stream(
+    query: str,
+    llm=None,
+    chat_history: List[ChatMessage] = None,
+    max_iterations=10,
+    jwt_token=None,
+    message_id=None,
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streaming version of react_chat_async.
+
+    Yields (event, data) tuples as the agent runs: "reasoning" for each action the
+    LLM decides on, "tool_start"/"tool_end" around tool calls, "token" for each
+    chunk of the final answer, then "final" with the same dict react_chat_async
+    returns. Errors are yielded as an "error" event.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def run():
+        with request_context(jwt_token=jwt_token, message_id=message_id, events=events):
+            try:
+                routed = await intent_router.aroute(query, chat_history)
+                if routed is not None:
+                    emit_agent_event("token", {"delta": routed["response"]})
+                    emit_agent_event("final", routed)
+                    return
+
+                agent = _build_agent(llm, chat_history, max_iterations)
+                task = agent.create_task(query)
+                while True:
+                    step_output = await agent.astream_step(task.task_id)
+                    if step_output.is_last:
+                        break
+
+                output = step_output.output
+                streamed = isinstance(output, StreamingAgentChatResponse)
+                if streamed:
+                    async for token in output.async_response_gen():
+                        emit_agent_event("token", {"delta": token})
+
+                response = _build_response(await agent.afinalize_response(task.task_id, step_output))
+                if not streamed:
+                    # e.g. the run ended on a terminal tool
+                    emit_agent_event("token", {"delta": response["response"]})
+                emit_agent_event("final", response)
+            except Exception as e:
+                emit_agent_event("error", {"message": str(e)})
+            finally:
+                events.put_nowait(done)
+
+    # the run gets its own task so its request context is independent of the consumer
+    runner = asyncio.create_task(run())
+    try:
+        while True:
+            item = await events.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        if not runner.done():
+            runner.cancel()
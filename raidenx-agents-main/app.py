@@ -5,12 +5,38 @@ from fastapi import FastAPI, HTTPException, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi import Request
+from contextlib import asynccontextmanager
+import asyncio
 
 
 from routes.health import router as health_router
 from routes.chat_agent import router as chat_agent_router
+from routes.metrics import router as metrics_router
+from commons.http_client import async_http_client
+from commons.job_queue import agent_job_queue
+from commons.tracing import TracingMiddleware, tracer
+from commons.warmup import warmup
+from config import settings
+from tools.check_order import order_tracker
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    agent_job_queue.start()
+    if settings.warmup.enabled:
+        # runs in the background: /v1/health reports 503 until it is done
+        warmup_task = asyncio.create_task(warmup.run())
+    else:
+        warmup.skip()
+    yield
+    if settings.warmup.enabled and not warmup_task.done():
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    await agent_job_queue.stop()
+    await order_tracker.stop()
+    await async_http_client.close()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -28,7 +54,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
 
 v1_router = APIRouter(prefix="/v1")
@@ -71,5 +99,6 @@ async def redirect():
 
 v1_router.include_router(chat_agent_router, prefix="/chat", tags=["Chat"])
 v1_router.include_router(health_router, prefix="/health", tags=["Health"])
+v1_router.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
 
 app.include_router(v1_router)
@@ -24,4 +24,5 @@ def get_jwt(userId: str, userName: str, displayName: str) -> str:
     return token
 
 
-print(get_jwt("2104920255", "harrydang1", "Harry Dang"))
\ No newline at end of file
+if __name__ == "__main__":
+    print(get_jwt("2104920255", "harrydang1", "Harry Dang"))
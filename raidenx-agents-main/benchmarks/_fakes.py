@@ -0,0 +1,46 @@
+"""
+Fake LLMs shared by the agent benchmarks (bench_parallel_tools.py,
+bench_terminal_tools.py).
+"""
+import asyncio
+from typing import Any, List, Sequence
+
+from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+
+
+class ScriptedLLM(CustomLLM):
+    """Returns the next output of its script after a fixed latency"""
+
+    latency: float = 0.4
+    script: List[str] = []
+    calls: int = 0
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="scripted")
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        raise NotImplementedError
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        raise NotImplementedError
+
+    async def _stream(self):
+        await asyncio.sleep(self.latency)
+        text = self.script[self.calls]
+        self.calls += 1
+        yield ChatResponse(message=ChatMessage(role="assistant", content=text), delta=text)
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        return self._stream()
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = None
+        async for response in self._stream():
+            pass
+        return response
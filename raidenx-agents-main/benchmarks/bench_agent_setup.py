@@ -0,0 +1,104 @@
+"""
+Microbenchmark: per-message agent setup cost.
+
+Compares the setup react_chat used to do on every message (rewrap each JWT tool
+with FunctionTool.from_defaults, build a new ReActAgent and update its prompt)
+with the current one (shared ReActAgentWorker, new AgentRunner per message).
+The LLM is llama-index's MockLLM and no message is sent, so only setup is timed.
+
+Usage:
+    python benchmarks/bench_agent_setup.py [iterations]
+"""
+import sys
+import inspect
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.agent import ReActAgent
+from llama_index.core.llms import MockLLM
+from llama_index.core.tools import FunctionTool
+
+import agents
+from utils.output_parser import ReActOutputParser
+from utils.request_context import request_context
+
+RAW_TOOLS = {
+    "get_trending_pairs": agents.get_trending_pairs,
+    "get_wallet_balance": agents.get_wallet_balance,
+    "search_token": agents.search_token,
+    "buy_token": agents.buy_token,
+    "sell_token": agents.sell_token,
+    "get_all_positions": agents.get_all_positions,
+    "scan_token": agents.scan_token,
+}
+
+
+def legacy_setup(llm, jwt_token):
+    """Setup performed by react_chat before the tool registry was built once"""
+    tools_with_jwt = []
+    for tool in agents.tools:
+        tool_fn = RAW_TOOLS[tool.metadata.name]
+        if 'jwt_token' in inspect.signature(tool_fn).parameters:
+            def create_wrapped_fn(original_fn):
+                def wrapped_fn(**kwargs):
+                    kwargs['jwt_token'] = jwt_token
+                    return original_fn(**kwargs)
+                wrapped_fn.__signature__ = inspect.signature(original_fn).replace(
+                    parameters=[
+                        param for name, param in inspect.signature(original_fn).parameters.items()
+                        if name != 'jwt_token'
+                    ]
+                )
+                return wrapped_fn
+
+            tools_with_jwt.append(FunctionTool.from_defaults(
+                fn=create_wrapped_fn(tool_fn),
+                name=tool.metadata.name,
+                description=tool.metadata.description
+            ))
+        else:
+            tools_with_jwt.append(tool)
+
+    agent = ReActAgent.from_tools(
+        tools=tools_with_jwt,
+        llm=llm,
+        verbose=True,
+        chat_history=[],
+        react_chat_formatter=agents.CustomReActChatFormatter(),
+        max_iterations=10,
+        output_parser=ReActOutputParser()
+    )
+    agent.update_prompts({"agent_worker:system_prompt": agents.react_system_prompt})
+    return agent
+
+
+def current_setup(llm, jwt_token):
+    """Setup performed by react_chat now"""
+    with request_context(jwt_token=jwt_token):
+        return agents._build_agent(llm, [], 10)
+
+
+def bench(name, setup, llm, iterations):
+    setup(llm, "warmup")
+    started = time.perf_counter()
+    for i in range(iterations):
+        setup(llm, f"jwt-{i}")
+    elapsed = time.perf_counter() - started
+    per_call_ms = elapsed / iterations * 1000
+    print(f"{name:<10} {per_call_ms:8.3f} ms/message  ({iterations} iterations)")
+    return per_call_ms
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    llm = MockLLM()
+    legacy = bench("legacy", legacy_setup, llm, iterations)
+    current = bench("current", current_setup, llm, iterations)
+    print(f"speedup    {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
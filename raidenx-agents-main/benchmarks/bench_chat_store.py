@@ -0,0 +1,110 @@
+"""
+Benchmark: per-message chat history cost as the number of threads grows.
+
+For each store size, seeds that many threads and then times what a message costs
+the chat routes: read the thread tail, then append the user and assistant
+messages. Compares the previous chat_history.json approach (load every thread,
+rewrite the whole file) with ChatHistoryStore. The JSON approach is only run up
+to --legacy-max threads because it gets slow quickly.
+
+Usage:
+    python benchmarks/bench_chat_store.py [--sizes 1000,10000,100000] [--messages 200] [--legacy-max 10000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.chat_store import ChatHistoryStore
+
+SEED_MESSAGES_PER_THREAD = 4
+
+
+def make_message(role, i):
+    return {
+        "role": role,
+        "content": f"message {i} " + "lorem ipsum " * 10,
+        "time": "2025-01-01 00:00:00",
+        "message_id": f"msg-{i}",
+        "thread_id": f"thread-{i}",
+    }
+
+
+def seed_history(threads):
+    return {
+        f"thread-{t}": [make_message("user" if m % 2 == 0 else "assistant", m) for m in range(SEED_MESSAGES_PER_THREAD)]
+        for t in range(threads)
+    }
+
+
+def bench_legacy(path, threads, messages):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(seed_history(threads), f, ensure_ascii=False, indent=2)
+
+    timings = []
+    for i in range(messages):
+        chat_id = f"thread-{random.randrange(threads)}"
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            history = json.load(f)
+        history.setdefault(chat_id, [])
+        history[chat_id].append(make_message("user", i))
+        history[chat_id].append(make_message("assistant", i))
+        history[chat_id] = history[chat_id][-20:]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_store(path, threads, messages):
+    store = ChatHistoryStore(db_path=path, max_messages=20)
+    conn = store._connect()
+    conn.execute("BEGIN")
+    for chat_id, seeded in seed_history(threads).items():
+        store._insert(conn, chat_id, seeded)
+    conn.execute("COMMIT")
+
+    timings = []
+    for i in range(messages):
+        chat_id = f"thread-{random.randrange(threads)}"
+        started = time.perf_counter()
+        store.tail(chat_id, 10)
+        store.append(chat_id, [make_message("user", i), make_message("assistant", i)])
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name, threads, timings):
+    timings = sorted(timings)
+    avg_ms = sum(timings) / len(timings) * 1000
+    p95_ms = timings[int(0.95 * (len(timings) - 1))] * 1000
+    print(f"{name:<8} {threads:>8} threads  avg {avg_ms:9.3f} ms  p95 {p95_ms:9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--legacy-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in [int(size) for size in args.sizes.split(",")]:
+            if threads <= args.legacy_max:
+                path = os.path.join(tmp, f"legacy-{threads}.json")
+                report("json", threads, bench_legacy(path, threads, min(args.messages, 20)))
+            path = os.path.join(tmp, f"store-{threads}.db")
+            report("sqlite", threads, bench_store(path, threads, args.messages))
+
+
+if __name__ == "__main__":
+    main()
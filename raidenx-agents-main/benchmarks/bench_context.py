@@ -0,0 +1,57 @@
+"""
+Benchmark: chat history size, fixed last-10-messages window vs token-budgeted builder.
+
+Builds the history of threads whose earlier answers are positions / trending
+tables and whose last message is a long paste, and reports the history tokens
+(as counted for Gemini) and the time taken to build it.
+
+Usage:
+    python benchmarks/bench_context.py [turns] [table_rows] [runs]
+"""
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.chat_session import convert_dict_to_chat_messages
+from utils.context_builder import build_chat_history, count_message_tokens
+
+ROW = "**PREZ** `10.0000` | `0x9467f809de80564fa198b2c9a27557bf4ffcf1aa506f28547661b96d8f84a1dc::prez::PREZ` | $0.0100\n"
+
+
+class Gemini:
+    class metadata:
+        model_name = "models/gemini-1.5-pro"
+
+
+def thread(turns: int, table_rows: int):
+    messages = []
+    for index in range(turns):
+        messages.append({"role": "user", "content": f"show my positions {index}"})
+        messages.append({"role": "assistant", "content": "**All Positions**\n\n" + ROW * table_rows})
+    messages.append({"role": "user", "content": "what do you think of this? " + ROW * table_rows * 2})
+    return messages
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    table_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    messages = thread(turns, table_rows)
+
+    for name, build in (
+        ("last 10 messages", lambda: convert_dict_to_chat_messages(messages[-10:])),
+        ("token budget", lambda: build_chat_history(messages, Gemini)),
+    ):
+        started = time.perf_counter()
+        for _ in range(runs):
+            history = build()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+        tokens = count_message_tokens(history, "gemini")
+        print(f"{name:<18} messages {len(history):>3}  tokens {tokens:>7}  build {elapsed_ms:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
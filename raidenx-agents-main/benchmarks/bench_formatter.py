@@ -0,0 +1,92 @@
+"""
+Microbenchmark: prompt formatting cost of one ReAct run.
+
+Formats the prompt after every step of a simulated run (one action/observation
+pair per step), as the agent worker does, once with the previous formatter
+(header and every reasoning message rebuilt each step) and once with
+CustomReActChatFormatter. The worker is built on llama-index's MockLLM, so
+no provider client or credentials are needed.
+
+Usage:
+    python benchmarks/bench_formatter.py [steps] [runs]
+"""
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.agent.react.formatter import get_react_tool_descriptions
+from llama_index.core.agent.react.types import ActionReasoningStep, ObservationReasoningStep
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.llms import MockLLM
+
+import agents
+from utils.request_context import request_context
+
+
+def legacy_format(formatter, tools, chat_history, current_reasoning):
+    """CustomReActChatFormatter.format before the header and messages were cached"""
+    format_args = {
+        "tool_desc": "\n".join(get_react_tool_descriptions(tools)),
+        "tool_names": ", ".join([tool.metadata.get_name() for tool in tools]),
+    }
+    fmt_sys_header = formatter.system_header.format(**format_args)
+    reasoning_history = []
+    for reasoning_step in current_reasoning:
+        if isinstance(reasoning_step, ObservationReasoningStep):
+            message = ChatMessage(role=MessageRole.USER, content=reasoning_step.get_content())
+        else:
+            message = ChatMessage(role=MessageRole.ASSISTANT, content=reasoning_step.get_content())
+        reasoning_history.append(message)
+    return [
+        ChatMessage(role=MessageRole.SYSTEM, content=fmt_sys_header),
+        *chat_history,
+        *reasoning_history,
+    ]
+
+
+def current_format(formatter, tools, chat_history, current_reasoning):
+    return formatter.format(tools, chat_history, current_reasoning=current_reasoning)
+
+
+def simulate_run(format_fn, formatter, steps):
+    chat_history = [ChatMessage(role=MessageRole.USER, content="check my positions")]
+    current_reasoning = []
+    with request_context():
+        for i in range(steps):
+            format_fn(formatter, agents.tools, chat_history, current_reasoning)
+            current_reasoning.append(ActionReasoningStep(
+                thought=f"step {i}", action="scan_token", action_input={"token_address": f"0x{i}"}
+            ))
+            current_reasoning.append(ObservationReasoningStep(observation="metrics " * 50))
+        format_fn(formatter, agents.tools, chat_history, current_reasoning)
+
+
+def bench(name, format_fn, formatter, steps, runs):
+    simulate_run(format_fn, formatter, steps)
+    started = time.perf_counter()
+    for _ in range(runs):
+        simulate_run(format_fn, formatter, steps)
+    per_run_ms = (time.perf_counter() - started) / runs * 1000
+    print(f"{name:<10} {per_run_ms:8.3f} ms/run  ({steps} steps, {runs} runs)")
+    return per_run_ms
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    formatter = agents.get_agent_worker(MockLLM())._react_chat_formatter
+
+    legacy_messages = legacy_format(formatter, agents.tools, [], [])
+    current_messages = current_format(formatter, agents.tools, [], [])
+    assert legacy_messages[0].content == current_messages[0].content
+
+    legacy = bench("legacy", legacy_format, formatter, steps, runs)
+    current = bench("current", current_format, formatter, steps, runs)
+    print(f"speedup    {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
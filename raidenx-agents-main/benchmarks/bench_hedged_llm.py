@@ -0,0 +1,73 @@
+"""
+Benchmark: time to first token of a heavy-tailed model, alone vs hedged with a second model.
+
+The main model sends its first chunk after 300 ms, except for a share of calls
+that take several seconds; the hedge model always takes 500 ms. The hedged run
+hedges past the main model's p95, capped at the default delay while it has
+few samples, so slow calls are hedged from the first ones on. Both runs draw
+from the same seeded sequence, one after the other, so their slow calls differ.
+
+Usage:
+    python benchmarks/bench_hedged_llm.py [calls] [slow_share] [slow_ms]
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.llms import ChatMessage, ChatResponse
+
+from LLM.hedged_llm import HedgedLLM, ModelStats
+
+
+class TimedLLM:
+    """Streams one chunk after a latency drawn for every call"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        async def stream():
+            await asyncio.sleep(self.latency())
+            yield ChatResponse(message=ChatMessage(role="assistant", content="Answer: ok"), delta="Answer: ok")
+        return stream()
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda pct: samples[min(len(samples) - 1, int(pct / 100 * len(samples)))] * 1000
+    return f"p50 {pick(50):7.1f} ms  p95 {pick(95):7.1f} ms  p99 {pick(99):7.1f} ms  max {samples[-1] * 1000:7.1f} ms"
+
+
+async def run(llm, calls: int):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        async for _ in await llm.astream_chat([]):
+            break
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    slow_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+    slow = (float(sys.argv[3]) if len(sys.argv) > 3 else 3000) / 1000
+    random.seed(7)
+    main_model = TimedLLM(lambda: slow if random.random() < slow_share else random.uniform(0.25, 0.35))
+    hedge_model = TimedLLM(lambda: 0.5)
+
+    for name, llm in (
+        ("main model alone", main_model),
+        ("hedged", HedgedLLM([("main", main_model), ("hedge", hedge_model)], stats=ModelStats())),
+    ):
+        print(f"{name:<18} {percentiles(asyncio.run(run(llm, calls)))}")
+
+
+if __name__ == "__main__":
+    main()
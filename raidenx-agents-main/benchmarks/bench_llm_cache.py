@@ -0,0 +1,95 @@
+"""
+Benchmark: a burst of identical "what's hot?" turns with and without the LLM response cache.
+
+A local LLM answers after a fixed latency and get_trending_pairs waits a fixed
+upstream latency. Every turn plans the same tool call from the same prompt; with
+the cache the concurrent turns share one LLM call for that step, and later turns
+are answered from the cache.
+
+Usage:
+    python benchmarks/bench_llm_cache.py [users] [llm_latency_ms] [tool_latency_ms]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.agent import AgentRunner
+from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from llama_index.core.tools import FunctionTool
+
+from LLM.cached_llm import CachedLLM, LLMResponseCache
+from utils.output_parser import ReActOutputParser
+from utils.react_worker import StreamingReActAgentWorker
+
+TOOL_CALL = 'Thought: I need the trending pairs.\nAction: get_trending_pairs\nAction Input: {"resolution": "5m"}'
+
+
+class SlowLLM(CustomLLM):
+    """Plans the same tool call for every prompt after a fixed latency"""
+
+    latency: float = 0.4
+    calls: int = 0
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="slow")
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        raise NotImplementedError
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        raise NotImplementedError
+
+    async def _stream(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        yield ChatResponse(message=ChatMessage(role="assistant", content=TOOL_CALL), delta=TOOL_CALL)
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        return self._stream()
+
+
+async def run(cached: bool, users: int, llm_latency: float, tool_latency: float):
+    slow = SlowLLM(latency=llm_latency)
+    llm = CachedLLM(slow, LLMResponseCache("bench", ttl=60)) if cached else slow
+
+    async def aget_trending_pairs(resolution: str) -> str:
+        await asyncio.sleep(tool_latency)
+        return f"**Trending Pairs ({resolution})**"
+
+    tool = FunctionTool.from_defaults(fn=lambda resolution: "", async_fn=aget_trending_pairs, name="get_trending_pairs")
+    worker = StreamingReActAgentWorker(
+        tools=[tool], llm=llm, output_parser=ReActOutputParser(), terminal_tools=("get_trending_pairs",)
+    )
+
+    async def turn():
+        await AgentRunner(agent_worker=worker, llm=slow).achat("what's hot?")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(turn() for _ in range(users)))
+    burst_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    await turn()
+    return burst_ms, (time.perf_counter() - started) * 1000, slow.calls
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    llm_latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 400) / 1000
+    tool_latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 100) / 1000
+    for name, cached in (("no cache", False), ("cache", True)):
+        burst_ms, next_ms, llm_calls = asyncio.run(run(cached, users, llm_latency, tool_latency))
+        print(f"{name:<10} {users} users  llm calls {llm_calls:>3}  burst {burst_ms:8.1f} ms  next turn {next_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: upstream calls and latency for a burst of scans of one token.
+
+Starts a local fake top-pair endpoint with a fixed latency, points
+RAIDENX_API_COMMON_URL at it and fires N concurrent scans of the same token,
+first straight through the HTTP client (previous behaviour), then through
+ascan_token and its single-flight TTL cache.
+
+Usage:
+    python benchmarks/bench_market_cache.py [concurrency] [upstream_latency_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+TOKEN = "0x9467f809de80564fa198b2c9a27557bf4ffcf1aa506f28547661b96d8f84a1dc::prez::PREZ"
+upstream_calls = 0
+
+
+def make_app(latency: float) -> web.Application:
+    async def top_pair(request):
+        global upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(latency)
+        return web.json_response({
+            "network": "sui",
+            "pairId": "pair-1",
+            "tokenBase": {"name": "Prez", "symbol": "PREZ", "address": request.match_info["token"], "priceUsd": "0.01"},
+            "dex": {"name": "cetus"},
+            "marketCapUsd": "12345",
+            "liquidityUsd": "2222",
+            "stats": {"percent": {"5m": 1}, "volume": {}, "buyTxn": {}, "sellTxn": {}},
+        })
+
+    app = web.Application()
+    app.router.add_get("/api/v1/sui/tokens/{token}/top-pair", top_pair)
+    return app
+
+
+async def run(concurrency: int, latency: float):
+    global upstream_calls
+    runner = web.AppRunner(make_app(latency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    os.environ["RAIDENX_API_COMMON_URL"] = f"http://127.0.0.1:{port}"
+
+    from commons.http_client import async_http_client
+    from tools.get_top_pair import _top_pair_url, top_pair_cache
+    from tools.scan_token import ascan_token, _format_scan
+
+    async def uncached():
+        response = await async_http_client.get(_top_pair_url(TOKEN))
+        return _format_scan(response, TOKEN)
+
+    for name, scan in (("uncached", uncached), ("cached", lambda: ascan_token(TOKEN))):
+        top_pair_cache.invalidate(TOKEN)
+        upstream_calls = 0
+        started = time.perf_counter()
+        results = await asyncio.gather(*(scan() for _ in range(concurrency)))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        assert all(result == results[0] for result in results)
+        print(f"{name:<10} {concurrency} scans  upstream calls {upstream_calls:>4}  total {elapsed_ms:8.1f} ms")
+
+    print(top_pair_cache.stats())
+    await async_http_client.close()
+    await runner.cleanup()
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(run(concurrency, latency_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
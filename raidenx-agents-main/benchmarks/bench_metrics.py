@@ -0,0 +1,82 @@
+"""
+Microbenchmark: cost of the Prometheus metrics of an agent turn, and of a scrape.
+
+An agent turn records about 10 observations (turn, iterations, LLM calls, tools,
+upstream requests). Times recording them in-process and in multiprocess mode,
+where each worker writes its values to mmapped files, then times rendering
+/v1/metrics in multiprocess mode with the files of several workers. The mode is
+picked when prometheus_client is imported, so each one runs in a subprocess.
+
+Usage:
+    python benchmarks/bench_metrics.py [turns] [workers]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+OBSERVATIONS_PER_TURN = 10
+
+
+def turn(metrics) -> None:
+    for _ in range(2):
+        metrics.llm_request_seconds.labels("gemini", "models/gemini-1.5-pro").observe(1.2)
+        metrics.llm_requests.labels("gemini", "models/gemini-1.5-pro", "ok").inc()
+        metrics.tool_call_seconds.labels("scan_token").observe(0.3)
+        metrics.tool_calls.labels("scan_token", "ok").inc()
+    metrics.upstream_request_seconds.labels("api.raidenx.io", "GET", "2xx").observe(0.08)
+    metrics.agent_iterations.observe(2)
+
+
+def child(mode: str, turns: int, workers: int) -> None:
+    from commons import metrics
+
+    if mode == "scrape":
+        # each pid gets its own files, as the gunicorn workers do
+        for _ in range(workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                turn(metrics)
+                os._exit(0)
+            os.waitpid(pid, 0)
+        turn(metrics)
+        started = time.perf_counter()
+        for _ in range(turns):
+            metrics.render()
+        print(f"{'scrape, ' + str(workers) + ' workers':<22} {(time.perf_counter() - started) / turns * 1e3:7.2f} ms/scrape")
+        return
+
+    started = time.perf_counter()
+    for _ in range(turns):
+        turn(metrics)
+    per_observation_us = (time.perf_counter() - started) / (turns * OBSERVATIONS_PER_TURN) * 1e6
+    print(f"{mode:<22} {per_observation_us:7.2f} us/observation")
+
+
+def run(mode: str, turns: int, workers: int, multiproc_dir: str = "") -> None:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir}
+    if not multiproc_dir:
+        del env["PROMETHEUS_MULTIPROC_DIR"]
+    subprocess.run([sys.executable, __file__, "--child", mode, str(turns), str(workers)], env=env, check=True)
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run("in-process", turns, workers)
+    with tempfile.TemporaryDirectory() as directory:
+        run("multiprocess", turns, workers, directory)
+    with tempfile.TemporaryDirectory() as directory:
+        run("scrape", 200, workers, directory)
+
+
+if __name__ == "__main__":
+    main()
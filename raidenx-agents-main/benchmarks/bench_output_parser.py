@@ -0,0 +1,73 @@
+"""
+Microbenchmark: ReAct output parsing, previous regex parser vs single-pass parser.
+
+Parses every output of benchmarks/output_parser_corpus.py with both parsers,
+reports where their results differ, then times the real outputs and each
+pathological output at growing sizes.
+
+Usage:
+    python benchmarks/bench_output_parser.py [runs] [max_size]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llama_index.core.agent.react.types import ActionReasoningStep
+
+from legacy_output_parser import ReActOutputParser as LegacyReActOutputParser
+from output_parser_corpus import PATHOLOGICAL, REAL
+
+from utils.output_parser import ReActOutputParser
+
+
+def outcome(parser, output):
+    try:
+        step = parser.parse(output)
+    except (ValueError, IndexError) as e:
+        return ("error", type(e).__name__, str(e).split("\n")[0])
+    if isinstance(step, ActionReasoningStep):
+        # dirtyjson returns AttributedDict, compare the decoded values
+        return ("action", step.thought, step.action, json.dumps(step.action_input, sort_keys=True))
+    return ("response", step.thought, step.response)
+
+
+def timed(parser, outputs, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        for output in outputs:
+            outcome(parser, output)
+    return (time.perf_counter() - started) * 1000 / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    legacy, current = LegacyReActOutputParser(), ReActOutputParser()
+
+    sizes = [size for size in (1_000, 10_000, 100_000, 1_000_000) if size <= max_size]
+    corpus = [("real", output) for output in REAL]
+    corpus += [(name, build(size)) for name, build in PATHOLOGICAL.items() for size in sizes[:1]]
+    differences = 0
+    for name, output in corpus:
+        expected, actual = outcome(legacy, output), outcome(current, output)
+        if expected != actual:
+            differences += 1
+            print(f"differs [{name}] {output[:60]!r}\n  legacy:  {str(expected)[:140]}\n  current: {str(actual)[:140]}")
+    print(f"{len(corpus) - differences}/{len(corpus)} outputs parsed identically\n")
+
+    print(f"{'corpus':<26}{'size':>9}{'legacy ms':>12}{'current ms':>12}")
+    print(f"{'real':<26}{len(REAL):>9}{timed(legacy, REAL, runs):>12.3f}{timed(current, REAL, runs):>12.3f}")
+    for name, build in PATHOLOGICAL.items():
+        for size in sizes:
+            output = [build(size)]
+            repeat = max(1, runs * 1_000 // size)
+            print(f"{name:<26}{size:>9}{timed(legacy, output, repeat):>12.3f}{timed(current, output, repeat):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: "compare N tokens" with one tool call per step vs one step calling every tool.
+
+A local LLM answers after a fixed latency and scan_token waits a fixed upstream
+latency. The one-call-per-step run uses the stock ReActAgentWorker and a model
+scanning one token per step (N + 1 LLM calls, N sequential scans); the parallel
+run uses StreamingReActAgentWorker and a model writing the N actions in one
+step (2 LLM calls, scans run concurrently).
+
+Usage:
+    python benchmarks/bench_parallel_tools.py [tokens] [llm_latency_ms] [tool_latency_ms]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llama_index.core.agent import AgentRunner, ReActAgentWorker
+from llama_index.core.tools import FunctionTool
+
+from _fakes import ScriptedLLM
+from utils.output_parser import ReActOutputParser
+from utils.react_worker import StreamingReActAgentWorker
+
+
+def action(index: int) -> str:
+    return f'Action: scan_token\nAction Input: {{"token_address": "0x{index}::t{index}::T{index}"}}\n'
+
+
+async def run(worker_cls, script: List[str], llm_latency: float, tool_latency: float):
+    llm = ScriptedLLM(latency=llm_latency, script=script)
+
+    async def ascan_token(token_address: str) -> str:
+        await asyncio.sleep(tool_latency)
+        return f"{token_address} | $0.0100"
+
+    tool = FunctionTool.from_defaults(fn=lambda token_address: "", async_fn=ascan_token, name="scan_token")
+    worker = worker_cls(tools=[tool], llm=llm, output_parser=ReActOutputParser())
+    agent = AgentRunner(agent_worker=worker, llm=llm)
+    started = time.perf_counter()
+    await agent.achat("compare the tokens")
+    return (time.perf_counter() - started) * 1000, llm.calls
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    llm_latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 400) / 1000
+    tool_latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 300) / 1000
+    answer = "Thought: I can compare them now.\nAnswer: compared"
+
+    sequential = [f"Thought: I need token {index}.\n" + action(index) for index in range(tokens)] + [answer]
+    parallel = ["Thought: I need every token.\n" + "".join(action(index) for index in range(tokens)), answer]
+    for name, worker_cls, script in (
+        ("one call per step", ReActAgentWorker, sequential),
+        ("parallel calls", StreamingReActAgentWorker, parallel),
+    ):
+        elapsed_ms, llm_calls = asyncio.run(run(worker_cls, script, llm_latency, tool_latency))
+        print(f"{name:<20} {tokens} tokens  llm calls {llm_calls:>3}  total {elapsed_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Memory report: per-worker unique RSS with and without preload-then-fork.
+
+Starts the API twice with the same number of workers: with `uvicorn --workers`,
+where every worker imports the app on its own, and with gunicorn.conf.py, where
+the master preloads the app and forks the workers. Once /v1/health answers,
+it reads /proc/<pid>/smaps_rollup of every process and reports per worker:
+
+    RSS  resident memory, shared pages included
+    USS  unique memory (private clean + private dirty), freed if the worker exits
+    PSS  proportional memory, shared pages split between the processes using them
+
+The PSS total of all processes (master included) is what the container uses.
+Linux only.
+
+Usage:
+    python benchmarks/bench_preload_memory.py [workers] [settle_seconds]
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def descendants(pid: int) -> list:
+    children = []
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        pass
+    return [pid for child in children for pid in (child, *descendants(child))]
+
+
+def is_worker(pid: int) -> bool:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        cmdline = f.read()
+    # uvicorn --workers spawns a multiprocessing resource tracker next to the workers
+    return b"resource_tracker" not in cmdline
+
+
+def wait_ready(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/v1/health", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.5)
+    raise TimeoutError(f"server on port {port} not ready after {timeout}s")
+
+
+def measure(name: str, command: list, workers: int, settle: float) -> None:
+    port = free_port()
+    env = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "WORKERS": str(workers)}
+    server = subprocess.Popen(
+        [part.format(port=port, workers=workers) for part in command],
+        cwd=project_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        wait_ready(port, timeout=180)
+        # let the other workers finish starting and warming up
+        time.sleep(settle)
+        pids = [pid for pid in descendants(server.pid) if is_worker(pid)]
+        master = memory_kb(server.pid)
+        per_worker = [memory_kb(pid) for pid in pids]
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=60)
+
+    def avg(key: str) -> float:
+        return sum(memory[key] for memory in per_worker) / len(per_worker) / 1024
+
+    total_pss = (master["pss"] + sum(memory["pss"] for memory in per_worker)) / 1024
+    print(
+        f"{name:<18} workers {len(per_worker)}  per worker: RSS {avg('rss'):7.1f} MB"
+        f"  USS {avg('uss'):7.1f} MB  PSS {avg('pss'):7.1f} MB  |  total PSS {total_pss:7.1f} MB"
+    )
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    settle = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    measure(
+        "uvicorn --workers",
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", "{port}", "--workers", "{workers}"],
+        workers,
+        settle,
+    )
+    measure("gunicorn preload", [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"], workers, settle)
+
+
+if __name__ == "__main__":
+    main()
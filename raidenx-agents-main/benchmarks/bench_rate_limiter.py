@@ -0,0 +1,109 @@
+"""
+Benchmark: a burst of LLM calls against a provider ceiling, blind retries vs the rate limiter.
+
+A local provider accepts `limit` calls per second and answers 429 with
+Retry-After: 1 beyond that. Users send their calls at once; without the limiter
+each 429 is retried after a short random backoff (as client libraries do), with
+it calls are queued for budget fairly across users. Reports the 429s received,
+the calls that failed after all retries, total time and the time until the
+single call of the lightest user completed.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [calls] [limit_per_second] [users]
+"""
+import asyncio
+import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Sequence
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.llms import ChatMessage, ChatResponse
+
+from LLM.rate_limiter import RateLimitedLLM, RateLimiter, rate_limit_delay
+from utils.request_context import request_context
+
+
+class TooManyRequests(Exception):
+    status_code = 429
+
+    class response:
+        status_code = 429
+        headers = {"retry-after": "1"}
+
+
+class CeilingProvider:
+    """Accepts limit calls per sliding second, answers after 50 ms"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.accepted = deque()
+        self.rejected = 0
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        now = time.monotonic()
+        while self.accepted and self.accepted[0] <= now - 1:
+            self.accepted.popleft()
+        if len(self.accepted) >= self.limit:
+            self.rejected += 1
+            raise TooManyRequests()
+        self.accepted.append(now)
+        await asyncio.sleep(0.05)
+        return ChatResponse(message=ChatMessage(role="assistant", content="Answer: ok"))
+
+
+class BlindRetries:
+    """Retries 429s after a short random backoff, up to 10 times"""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        for attempt in range(10):
+            try:
+                return await self.llm.achat(messages, **kwargs)
+            except Exception as e:
+                if rate_limit_delay(e, 0) is None or attempt == 9:
+                    raise
+                await asyncio.sleep(random.uniform(0.05, 0.3))
+
+
+async def run(limited: bool, calls: int, limit: int, users: int):
+    provider = CeilingProvider(limit)
+    llm = RateLimitedLLM(provider, RateLimiter("bench", limit * 60, 1e12, burst_seconds=1), max_retries=10) if limited else BlindRetries(provider)
+    done = {}
+    failed = []
+    started = time.perf_counter()
+
+    async def call(user: str):
+        with request_context(jwt_token=user):
+            try:
+                await llm.achat([ChatMessage(role="user", content="what's hot?")])
+            except Exception:
+                failed.append(user)
+        done[user] = time.perf_counter() - started
+
+    # user 0 sends one call, the others share the rest
+    await asyncio.gather(call("user-0"), *(call(f"user-{1 + index % (users - 1)}") for index in range(calls - 1)))
+    return provider.rejected, len(failed), (time.perf_counter() - started) * 1000, done["user-0"] * 1000
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    users = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    random.seed(7)
+    for name, limited in (("blind retries", False), ("rate limiter", True)):
+        rejected, failed, total_ms, light_ms = asyncio.run(run(limited, calls, limit, users))
+        print(
+            f"{name:<14} {calls} calls  429s {rejected:>5}  failed {failed:>3}  "
+            f"total {total_ms:8.1f} ms  light user done {light_ms:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
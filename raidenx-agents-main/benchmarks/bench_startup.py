@@ -0,0 +1,58 @@
+"""
+Benchmark: worker startup, import time and resident memory of `import app`.
+
+Each run imports the app in a fresh interpreter, as every uvicorn worker does,
+and reports the wall time of the import and the peak RSS of the process. The
+"eager" row also imports the three LLM provider SDKs and the Telegram
+libraries, which app used to load at import; "lazy" is the app as it is now.
+Multiply by the number of workers (5 in runserver.sh) for a full restart.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+EAGER_IMPORTS = (
+    "import llama_index.llms.gemini, llama_index.llms.deepseek, llama_index.llms.anthropic\n"
+    "import telegram.ext, telethon\n"
+)
+
+PROBE = """
+import json, resource, time
+started = time.perf_counter()
+{imports}
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def measure(imports: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(imports=imports)],
+        cwd=project_root,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for name, imports in (("eager", EAGER_IMPORTS), ("lazy", "")):
+        samples = [measure(imports) for _ in range(runs)]
+        seconds = sorted(sample["seconds"] for sample in samples)[runs // 2]
+        rss_mb = sorted(sample["rss_mb"] for sample in samples)[runs // 2]
+        print(f"{name:<6} import {seconds:6.2f} s  peak RSS {rss_mb:7.1f} MB  ({runs} runs, median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: LLM calls and latency of a "scan this token" turn with and without terminal tools.
+
+A local LLM answers after a fixed latency and scan_token waits a fixed upstream
+latency. Without terminal tools the model is asked again to write an answer
+after the scan; with scan_token declared terminal the run ends on its output.
+
+Usage:
+    python benchmarks/bench_terminal_tools.py [llm_latency_ms] [tool_latency_ms]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Sequence
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llama_index.core.agent import AgentRunner
+from llama_index.core.tools import FunctionTool
+
+from _fakes import ScriptedLLM
+from utils.output_parser import ReActOutputParser
+from utils.react_worker import StreamingReActAgentWorker
+
+SCRIPT = [
+    'Thought: I need to scan the token.\nAction: scan_token\nAction Input: {"token_address": "0x1::prez::PREZ"}',
+    "Thought: I can answer.\nAnswer: PREZ | $0.0100",
+]
+
+
+async def run(terminal_tools: Sequence[str], llm_latency: float, tool_latency: float):
+    llm = ScriptedLLM(latency=llm_latency, script=SCRIPT)
+
+    async def ascan_token(token_address: str) -> str:
+        await asyncio.sleep(tool_latency)
+        return f"{token_address} | $0.0100"
+
+    tool = FunctionTool.from_defaults(fn=lambda token_address: "", async_fn=ascan_token, name="scan_token")
+    worker = StreamingReActAgentWorker(
+        tools=[tool], llm=llm, output_parser=ReActOutputParser(), terminal_tools=terminal_tools
+    )
+    agent = AgentRunner(agent_worker=worker, llm=llm)
+    started = time.perf_counter()
+    await agent.achat("scan 0x1::prez::PREZ")
+    return (time.perf_counter() - started) * 1000, llm.calls
+
+
+def main():
+    llm_latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 400) / 1000
+    tool_latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+    for name, terminal_tools in (("no terminal tools", ()), ("scan_token terminal", ("scan_token",))):
+        elapsed_ms, llm_calls = asyncio.run(run(terminal_tools, llm_latency, tool_latency))
+        print(f"{name:<22} llm calls {llm_calls:>3}  total {elapsed_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: time until the tool starts and tokens generated per tool step.
+
+A local LLM streams a ReAct tool call followed by the continuation models often
+add after it (a made-up Observation and answer), one token every few
+milliseconds. The step is run with the stock ReActAgentWorker, which waits for
+the whole output, then with StreamingReActAgentWorker, which closes the stream
+once the Action Input is complete.
+
+Usage:
+    python benchmarks/bench_tool_call_stop.py [token_delay_ms] [trailing_tokens]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.agent import AgentRunner, ReActAgentWorker
+from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from llama_index.core.tools import FunctionTool
+
+from utils.output_parser import ReActOutputParser
+from utils.react_worker import StreamingReActAgentWorker
+
+TOOL_CALL = (
+    "Thought: I need to scan the token.\n"
+    "Action: scan_token\n"
+    'Action Input: {"token_address": "0x9467f809de80564fa198b2c9a27557bf4ffcf1aa506f28547661b96d8f84a1dc::prez::PREZ"}'
+)
+CONTINUATION = "\nObservation: PREZ trades at $0.01 with a market cap of $12K.\nThought: I can answer.\nAnswer: "
+
+
+class PacedLLM(CustomLLM):
+    """Streams a fixed tool call, then a final answer, a few characters per token"""
+
+    token_delay: float = 0.005
+    trailing_tokens: int = 100
+    generated: int = 0
+    calls: int = 0
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="paced")
+
+    def _text(self) -> str:
+        self.calls += 1
+        if self.calls % 2:
+            return TOOL_CALL + CONTINUATION + "PREZ looks fine. " * (self.trailing_tokens // 4)
+        return "Thought: I can answer.\nAnswer: PREZ looks fine."
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return CompletionResponse(text=self._text())
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        raise NotImplementedError
+
+    async def _stream(self, text: str):
+        content = ""
+        for i in range(0, len(text), 4):
+            await asyncio.sleep(self.token_delay)
+            self.generated += 1
+            content += text[i:i + 4]
+            yield ChatResponse(message=ChatMessage(role="assistant", content=content), delta=text[i:i + 4])
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        return self._stream(self._text())
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = None
+        async for response in self._stream(self._text()):
+            pass
+        return response
+
+
+async def run(worker_cls, token_delay: float, trailing_tokens: int):
+    llm = PacedLLM(token_delay=token_delay, trailing_tokens=trailing_tokens)
+    started = time.perf_counter()
+    tool_started = []
+
+    async def ascan_token(token_address: str) -> str:
+        tool_started.append(time.perf_counter() - started)
+        return "PREZ | $0.0100"
+
+    tool = FunctionTool.from_defaults(fn=lambda token_address: "", async_fn=ascan_token, name="scan_token")
+    worker = worker_cls.from_tools(tools=[tool], llm=llm, output_parser=ReActOutputParser())
+    agent = AgentRunner(agent_worker=worker, llm=llm)
+    task = agent.create_task("scan PREZ")
+    await agent.arun_step(task.task_id)
+    return tool_started[0] * 1000, llm.generated
+
+
+def main():
+    token_delay_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    trailing_tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    for name, worker_cls in (("ReActAgentWorker", ReActAgentWorker), ("StreamingReActAgentWorker", StreamingReActAgentWorker)):
+        tool_start_ms, tokens = asyncio.run(run(worker_cls, token_delay_ms / 1000, trailing_tokens))
+        print(f"{name:<28} tool started after {tool_start_ms:8.1f} ms  tokens generated {tokens:>5}")
+
+
+if __name__ == "__main__":
+    main()
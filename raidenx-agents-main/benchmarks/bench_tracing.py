@@ -0,0 +1,62 @@
+"""
+Microbenchmark: cost of a traced agent turn's spans.
+
+An agent turn records about 11 spans (request, iterations, LLM calls, tools,
+upstream requests). Times opening and closing nested spans the way a turn does,
+with tracing disabled, with spans kept for Server-Timing only, and with the file
+exporter enabled, and reports the cost per span.
+
+Usage:
+    python benchmarks/bench_tracing.py [turns]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from commons.tracing import SpanExporter, Tracer
+
+SPANS_PER_TURN = 11
+
+
+def turn(tracer: Tracer) -> None:
+    with tracer.span("POST /v1/chat/threads/messages/sync") as request:
+        with tracer.span("GET api-agentfai", category="upstream"):
+            pass
+        for iteration in range(2):
+            with tracer.span("react.iteration", attributes={"react.iteration": iteration + 1}):
+                llm = tracer.start_span("llm.chat", category="llm", attributes={"llm.prompt_tokens": 2000})
+                llm.set_attribute("llm.completion_tokens", 40)
+                llm.end()
+                with tracer.span("tool scan_token", category="tool"):
+                    with tracer.span("GET api.raidenx.io", category="upstream"):
+                        pass
+        with tracer.span("GET api-agentfai", category="upstream"):
+            pass
+        if tracer.enabled:
+            tracer.server_timing(request)
+
+
+def bench(name: str, tracer: Tracer, turns: int) -> None:
+    started = time.perf_counter()
+    for _ in range(turns):
+        turn(tracer)
+    per_span_us = (time.perf_counter() - started) / (turns * SPANS_PER_TURN) * 1e6
+    print(f"{name:<22} {per_span_us:7.2f} us/span")
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bench("disabled", Tracer(SpanExporter("bench"), enabled=False), turns)
+    bench("server-timing only", Tracer(SpanExporter("bench")), turns)
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = SpanExporter("bench", path=os.path.join(directory, "spans.jsonl"))
+        bench("file export", Tracer(exporter), turns)
+
+
+if __name__ == "__main__":
+    main()
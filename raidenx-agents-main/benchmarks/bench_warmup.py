@@ -0,0 +1,50 @@
+"""
+Benchmark: local setup paid by the first message of a worker, cold vs after warm-up.
+
+Times what the first message did before the startup warm-up existed: loading
+the tokenizer used to budget the chat history, building the shared agent
+worker and rendering its system prompt. The second pass is what a message pays
+once commons.warmup has done that work. The LLM is llama-index's MockLLM, so
+provider client creation and the first LLM connection, also moved to the
+warm-up, are not included.
+
+Usage:
+    python benchmarks/bench_warmup.py
+"""
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llama_index.core.llms import MockLLM
+
+import agents
+from utils.context_builder import build_chat_history
+
+MESSAGES = [
+    {"role": "user", "content": "show my positions"},
+    {"role": "assistant", "content": "**All Positions**\n\n**PREZ** `10.0000` | $0.0100\n"},
+    {"role": "user", "content": "what is trending?"},
+]
+
+
+def first_message_setup(llm) -> float:
+    started = time.perf_counter()
+    history = build_chat_history(MESSAGES, llm)
+    worker = agents.get_agent_worker(llm)
+    worker._react_chat_formatter.format(agents.tools, chat_history=history)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    llm = MockLLM()
+    cold = first_message_setup(llm)
+    warm = first_message_setup(llm)
+    print(f"cold worker      {cold:9.3f} ms")
+    print(f"after warm-up    {warm:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+LLM outputs used by benchmarks/bench_output_parser.py.
+
+REAL holds outputs in the shapes the agent actually receives from the model:
+tool calls, final answers, fenced blocks, answers without markers and the
+usual formatting slips. PATHOLOGICAL builds long or adversarial outputs that
+make backtracking patterns rescan the text.
+"""
+from typing import Callable, Dict, List
+
+TOKEN = "0x9467f809de80564fa198b2c9a27557bf4ffcf1aa506f28547661b96d8f84a1dc::prez::PREZ"
+
+REAL: List[str] = [
+    "Thought: The user wants to know their wallet balance. I need to use a tool.\n"
+    "Action: get_wallet_balance\n"
+    "Action Input: {}",
+
+    "Thought: I need the trending pairs on the last 24 hours.\n"
+    "Action: get_trending_pairs\n"
+    'Action Input: {"resolution": "24h", "limit": 5}',
+
+    "Thought: The user asked to buy 1 SUI of PREZ. I should place the order.\n"
+    "Action: buy_token\n"
+    f'Action Input: {{"token_address": "{TOKEN}", "amount": "1"}}',
+
+    "Thought: The user asked to sell half of their PREZ position.\n"
+    "Action: sell_token\n"
+    f'Action Input: {{"token_address": "{TOKEN}", "percent": "50"}}',
+
+    "```\nThought: I should scan the token before answering.\n"
+    "Action: scan_token\n"
+    f'Action Input: {{"token_address": "{TOKEN}"}}\n```',
+
+    "Thought: I need to search for the token by its symbol.\n"
+    "Action: search_token\n"
+    "Action Input: {'query': 'PREZ'}",
+
+    "Thought: I need the positions to answer.\n"
+    "Action: get_all_positions\n"
+    'Action Input: {"wallet": "0xabc", "filters": {"min_usd": 1, "tags": ["meme", "sui"]}}',
+
+    "Thought: The name contains braces.\n"
+    "Action: search_token\n"
+    'Action Input: {"query": "weird {token} name \\"quoted\\""}',
+
+    "Thought: I have the balance from the tool output.\n"
+    "Answer: Your wallet holds 12.5 SUI and 3,000 PREZ.",
+
+    "Thought: The order was filled, I can report it.\n"
+    "Answer: Bought 1,234 PREZ for 1 SUI.\n\nTransaction: https://suiscan.xyz/tx/abc\n"
+    "Let me know if you want to set a take profit.",
+
+    "Thought: I can answer directly. The price of PREZ is $0.0123",
+
+    "Hello! I can help you trade tokens on SUI. What would you like to do?",
+
+    "```\nThought: The user greeted me.\nAnswer: Hi there! How can I help?\n```",
+
+    "Thought: No tool is needed here.\nAction: None\nAnswer: You have no open positions.",
+
+    "Thought: I should answer.\nAction: None",
+
+    "Thought: I will check the wallet.\nAction: get_wallet_balance\nAction Input: {}\n"
+    "Observation: {\"balance\": \"12.5\"}\nThought: I now know the answer.\nAnswer: 12.5 SUI",
+]
+
+
+def long_answer(size: int) -> str:
+    """A long final answer, e.g. a table of positions"""
+    row = "| PREZ | 1,234.56 | $12.34 | +5.6% |\n"
+    return "Thought: I can list the positions.\nAnswer: " + row * (size // len(row))
+
+
+def long_thought_with_action(size: int) -> str:
+    """A rambling multi-line thought before a tool call"""
+    line = "The user mentioned Action items and Answer drafts, I should think more.\n"
+    return (
+        "Thought: " + line * (size // len(line)) +
+        "Action: get_wallet_balance\nAction Input: {}"
+    )
+
+
+def repeated_thoughts(size: int) -> str:
+    """A model stuck repeating the Thought marker without ever acting"""
+    return "Thought: hmm. " * (size // 14) + "\nAction: get_wallet_balance"
+
+
+def whitespace_run(size: int) -> str:
+    """Padding the model emitted before answering"""
+    return " " * size + "Thought: done.\nAnswer: ok"
+
+
+def unclosed_action_input(size: int) -> str:
+    """A tool call cut off by max tokens in the middle of its input"""
+    return (
+        "Thought: I will buy.\nAction: buy_token\nAction Input: {\"token_address\": \"" +
+        "a" * size
+    )
+
+
+def trailing_braces(size: int) -> str:
+    """A tool call followed by hallucinated observations full of JSON"""
+    observation = 'Observation: {"balance": "1", "tokens": [{"symbol": "SUI"}]}\n'
+    return (
+        "Thought: Checking the wallet.\nAction: get_wallet_balance\nAction Input: {}\n" +
+        observation * (size // len(observation))
+    )
+
+
+def marker_flood(size: int) -> str:
+    """Markers on one line, none of them forming a valid step"""
+    return "Thought: " + "Action: x Action Input: " * (size // 24) + "{"
+
+
+PATHOLOGICAL: Dict[str, Callable[[int], str]] = {
+    "long_answer": long_answer,
+    "long_thought_with_action": long_thought_with_action,
+    "repeated_thoughts": repeated_thoughts,
+    "whitespace_run": whitespace_run,
+    "unclosed_action_input": unclosed_action_input,
+    "trailing_braces": trailing_braces,
+    "marker_flood": marker_flood,
+}
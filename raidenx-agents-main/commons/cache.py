@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+class _Flight:
+    """An upstream call in progress that other sync callers can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    In-process cache whose entries expire after a fixed time.
+
+    get_or_load / aget_or_load are single-flight: while a key is being loaded,
+    other callers asking for the same key wait for that call instead of starting
+    their own, so a burst of requests for one key reaches the upstream once.
+    The least recently written entries are dropped beyond max_size.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Tuple[bool, Any]: (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def count(self, counter: str) -> None:
+        """Increment a counter ("hits", "misses", ...); sync callers run on several threads"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = _always,
+    ) -> Any:
+        """
+        Get a cached value, or load it once for every concurrent caller
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable[[], Any]): Loads the value on a miss
+            cacheable (Callable[[Any], bool]): Whether a loaded value may be cached
+
+        Returns:
+            Any: Cached or freshly loaded value; loader errors are raised to every waiter
+        """
+        found, value = self.get(key)
+        if found:
+            self.count("hits")
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self.count("misses")
+        try:
+            flight.value = loader()
+            if cacheable(flight.value):
+                self.set(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def aget_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = _always,
+    ) -> Any:
+        """
+        Async version of get_or_load
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable[[], Awaitable[Any]]): Coroutine factory loading the value on a miss
+            cacheable (Callable[[Any], bool]): Whether a loaded value may be cached
+
+        Returns:
+            Any: Cached or freshly loaded value; loader errors are raised to every waiter
+        """
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._async_flights.get(flight_key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._async_flights[flight_key] = loop.create_future()
+        self.misses += 1
+        try:
+            value = await loader()
+            if cacheable(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._async_flights[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns size and hit/miss/coalesced counters"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
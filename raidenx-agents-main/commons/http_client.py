@@ -0,0 +1,354 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from commons.metrics import status_class, upstream_request_seconds
+from commons.tracing import CLIENT, tracer
+from config import settings
+from utils.request_context import get_request_loader
+
+
+def _read_key(url: str, kwargs: dict) -> Tuple:
+    """Identity of a GET for the request loader: URL, query parameters and headers"""
+    params = kwargs.get("params") or {}
+    headers = kwargs.get("headers") or {}
+    return (
+        url,
+        tuple(sorted((str(key), str(value)) for key, value in params.items())),
+        tuple(sorted((str(key).lower(), str(value)) for key, value in headers.items())),
+    )
+
+
+def _is_ok(response) -> bool:
+    return response.status_code == 200
+
+
+class _UpstreamCall:
+    """A request to an upstream service in progress; responded() records its status."""
+
+    def __init__(self, span):
+        self.span = span
+        self.status = "error"
+
+    def responded(self, status_code: int) -> None:
+        self.span.set_attribute("http.status_code", status_code)
+        self.status = status_class(status_code)
+
+
+@contextmanager
+def _upstream_call(method: str, url: str):
+    """Span and latency metric of one request sent to an upstream service"""
+    host = urlparse(url).hostname
+    started = time.perf_counter()
+    with tracer.span(
+        f"{method} {host}",
+        category="upstream",
+        attributes={"http.method": method, "http.url": url, "net.peer.name": host},
+        kind=CLIENT,
+    ) as span:
+        call = _UpstreamCall(span)
+        try:
+            yield call
+        finally:
+            upstream_request_seconds.labels(host, method, call.status).observe(time.perf_counter() - started)
+
+
+class DnsCache:
+    """TTL cache in front of socket.getaddrinfo for the upstream hosts only."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._hosts = set()
+        self._entries: Dict[Tuple, Tuple[float, list]] = {}
+        self._lock = threading.Lock()
+        self._resolve = None
+
+    def install(self, hosts: Iterable[str]) -> None:
+        """
+        Start caching lookups for the given hosts
+
+        Args:
+            hosts (Iterable[str]): Hostnames whose lookups should be cached
+        """
+        with self._lock:
+            self._hosts.update(host for host in hosts if host)
+            if self._resolve is None and self.ttl > 0:
+                self._resolve = socket.getaddrinfo
+                socket.getaddrinfo = self._getaddrinfo
+
+    def _getaddrinfo(self, host, port, *args, **kwargs):
+        if host not in self._hosts:
+            return self._resolve(host, port, *args, **kwargs)
+
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        result = self._resolve(host, port, *args, **kwargs)
+        self._entries[key] = (now + self.ttl, result)
+        return result
+
+
+class UpstreamHttpClient:
+    """
+    Process-wide HTTP client used by every tool that calls RaidenX or the agent backend.
+
+    A single requests.Session keeps one keep-alive connection pool per upstream host,
+    so consecutive tool calls in an agent turn reuse TCP+TLS connections instead of
+    opening new ones. Every request gets default connect/read timeouts unless the
+    caller passes its own.
+    """
+
+    def __init__(self, http_settings=None):
+        self._settings = http_settings or settings.http
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.dns_cache = DnsCache(ttl=self._settings.dns_cache_ttl)
+
+    @property
+    def upstream_urls(self) -> list:
+        """Base URLs of every upstream service the tools talk to"""
+        return [
+            *settings.raiden.get_config().values(),
+            settings.agent.api_url,
+        ]
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Default (connect, read) timeout in seconds"""
+        return (self._settings.connect_timeout, self._settings.read_timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared session, rebuilt after a fork so workers never share sockets"""
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._settings.pool_connections,
+            pool_maxsize=self._settings.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.dns_cache.install(urlparse(url).hostname for url in self.upstream_urls)
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared connection pools
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute request URL
+            **kwargs: Arguments accepted by requests.Session.request
+
+        Returns:
+            requests.Response: Upstream response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with _upstream_call(method, url) as call:
+            response = self.session.request(method, url, **kwargs)
+            call.responded(response.status_code)
+            return response
+
+    def get(self, url: str, dedupe: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a GET, reusing the response of an identical GET made earlier in the agent run
+
+        Args:
+            url (str): Absolute request URL
+            dedupe (bool): Set to False for calls that must reach the upstream every
+                time, such as polling
+            **kwargs: Arguments accepted by requests.Session.request
+
+        Returns:
+            requests.Response: Upstream response
+        """
+        loader = get_request_loader() if dedupe else None
+        if loader is None:
+            return self.request("GET", url, **kwargs)
+        return loader.load(
+            _read_key(url, kwargs), lambda: self.request("GET", url, **kwargs), cacheable=_is_ok
+        )
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST; reads memoized earlier in the agent run are dropped"""
+        try:
+            return self.request("POST", url, **kwargs)
+        finally:
+            loader = get_request_loader()
+            if loader is not None:
+                loader.clear()
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class UpstreamResponse:
+    """
+    Buffered response returned by AsyncUpstreamHttpClient.
+
+    Exposes the part of requests.Response the tools rely on (status_code, text,
+    json(), raise_for_status()) so sync and async tools share their parsing code.
+    """
+
+    def __init__(self, method: str, url: str, status_code: int, headers, content: bytes, encoding: str):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error for url: {self.url}",
+                response=self,
+            )
+
+
+class AsyncUpstreamHttpClient:
+    """
+    aiohttp counterpart of UpstreamHttpClient for the async agent path.
+
+    Uses the same pool sizes, timeouts and DNS TTL. Network failures are raised as
+    requests.exceptions.RequestException subclasses so tools handle errors the same
+    way on both paths.
+    """
+
+    def __init__(self, http_settings=None):
+        self._settings = http_settings or settings.http
+        # one session per event loop: an aiohttp session only works on the loop it was created on
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared session of the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._forget_closed_loops()
+            session = self._sessions[loop] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self._settings.pool_maxsize,
+                    use_dns_cache=self._settings.dns_cache_ttl > 0,
+                    ttl_dns_cache=self._settings.dns_cache_ttl or None,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self._settings.connect_timeout,
+                    sock_read=self._settings.read_timeout,
+                ),
+            )
+        return session
+
+    def _forget_closed_loops(self) -> None:
+        """Drop the sessions of loops that were closed without closing them (e.g. asyncio.run)"""
+        for loop, session in list(self._sessions.items()):
+            if loop.is_closed():
+                del self._sessions[loop]
+                # its connections cannot be closed without the loop, detach them from the session
+                session.detach()
+
+    @staticmethod
+    def _prepare_params(params: Optional[dict]) -> Optional[dict]:
+        # Match requests: drop None values and send booleans as "True"/"False"
+        if not params:
+            return params
+        return {
+            key: str(value) if isinstance(value, bool) else value
+            for key, value in params.items()
+            if value is not None
+        }
+
+    async def request(self, method: str, url: str, **kwargs) -> UpstreamResponse:
+        """
+        Send a request through the shared aiohttp connection pools
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute request URL
+            **kwargs: Arguments accepted by aiohttp.ClientSession.request
+
+        Returns:
+            UpstreamResponse: Buffered upstream response
+        """
+        if "params" in kwargs:
+            kwargs["params"] = self._prepare_params(kwargs["params"])
+        with _upstream_call(method, url) as call:
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    call.responded(response.status)
+                    content = await response.read()
+                    return UpstreamResponse(
+                        method=method,
+                        url=str(response.url),
+                        status_code=response.status,
+                        headers=response.headers,
+                        content=content,
+                        encoding=response.get_encoding() if content else "utf-8",
+                    )
+            except asyncio.TimeoutError as e:
+                raise requests.exceptions.Timeout(f"Request to {url} timed out") from e
+            except aiohttp.ClientError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+    async def get(self, url: str, dedupe: bool = True, **kwargs) -> UpstreamResponse:
+        """Async version of UpstreamHttpClient.get"""
+        loader = get_request_loader() if dedupe else None
+        if loader is None:
+            return await self.request("GET", url, **kwargs)
+        return await loader.aload(
+            _read_key(url, kwargs), lambda: self.request("GET", url, **kwargs), cacheable=_is_ok
+        )
+
+    async def post(self, url: str, **kwargs) -> UpstreamResponse:
+        """Async version of UpstreamHttpClient.post"""
+        try:
+            return await self.request("POST", url, **kwargs)
+        finally:
+            loader = get_request_loader()
+            if loader is not None:
+                loader.clear()
+
+    async def close(self) -> None:
+        """Close the session of the running loop and its pooled connections"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+        self._forget_closed_loops()
+
+
+http_client = UpstreamHttpClient()
+async_http_client = AsyncUpstreamHttpClient()
@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from commons.metrics import queue_depth, queue_running, queue_wait_seconds
+from commons.stats import RollingStats
+from commons.tracing import tracer
+from config import settings
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its maximum depth."""
+
+    def __init__(self, depth: int, max_depth: int):
+        super().__init__(f"Job queue is full ({depth}/{max_depth})")
+        self.depth = depth
+        self.max_depth = max_depth
+
+
+class AgentJobQueue:
+    """
+    In-process job queue for agent runs started by the webhook route.
+
+    A fixed number of worker tasks pull jobs from a bounded asyncio.Queue, so a
+    burst of messages waits its turn instead of starting unlimited concurrent agent
+    runs, and every accepted job stays referenced until it finishes.
+    """
+
+    def __init__(self, concurrency: int, max_depth: int):
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+        self.wait_time = RollingStats()
+        self.run_time = RollingStats()
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"agent-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Wait for queued and running jobs, then stop the workers
+
+        Args:
+            timeout (float): Seconds to wait before cancelling unfinished jobs
+        """
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Job queue stopped with {self.depth} queued and {self._running} running jobs")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, job: Callable[[], Awaitable], name: str = "") -> int:
+        """
+        Enqueue a job without waiting for it
+
+        Args:
+            job (Callable[[], Awaitable]): Factory returning the coroutine to run
+            name (str): Label used in error logs
+
+        Returns:
+            int: 1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If the queue already holds max_depth jobs
+        """
+        self.start()
+        try:
+            # the job runs in the context it was submitted from, so it stays in the request's trace
+            self._queue.put_nowait((job, name, time.monotonic(), contextvars.copy_context()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(self.depth, self.max_depth)
+        self.submitted += 1
+        self._report()
+        return self.depth
+
+    def _report(self) -> None:
+        """Publish the depth and running jobs of this worker's queue as gauges"""
+        queue_depth.set(self.depth)
+        queue_running.set(self._running)
+
+    async def _worker(self) -> None:
+        while True:
+            job, name, enqueued_at, context = await self._queue.get()
+            started_at = time.monotonic()
+            self.wait_time.add(started_at - enqueued_at)
+            queue_wait_seconds.observe(started_at - enqueued_at)
+            self._running += 1
+            self._report()
+            try:
+                await context.run(asyncio.ensure_future, self._run(job, name, started_at - enqueued_at))
+            except Exception as e:
+                self.failed += 1
+                print(f"Error in queued job {name}: {str(e)}")
+            finally:
+                self._running -= 1
+                self._report()
+                self.run_time.add(time.monotonic() - started_at)
+                self._queue.task_done()
+
+    @staticmethod
+    async def _run(job: Callable[[], Awaitable], name: str, wait_time: float) -> None:
+        with tracer.span("agent.job", attributes={"job.name": name, "job.wait_ms": round(wait_time * 1000, 1)}):
+            await job()
+
+    def metrics(self) -> Dict:
+        """Returns queue depth, worker usage and wait/run time summaries"""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "running": self._running,
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "wait_time_seconds": self.wait_time.summary(),
+            "run_time_seconds": self.run_time.summary(),
+        }
+
+
+agent_job_queue = AgentJobQueue(
+    concurrency=settings.queue.concurrency,
+    max_depth=settings.queue.max_depth,
+)
@@ -0,0 +1,107 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics of the agent API.
+#
+# With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory before
+# the app is imported (gunicorn.conf.py does): each worker then writes its values
+# to files there and /v1/metrics sums them, whichever worker serves the scrape.
+
+LATENCY_BUCKETS = (0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+TOOL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+HTTP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+
+agent_turn_seconds = Histogram(
+    "agent_turn_seconds",
+    "End-to-end time to answer a message, by path (sync, stream, webhook) and outcome",
+    ["path", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+agent_iterations = Histogram(
+    "agent_react_iterations",
+    "ReAct iterations (LLM steps) per agent turn",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10),
+)
+llm_request_seconds = Histogram(
+    "llm_request_seconds",
+    "Time of each LLM provider call, to the end of its stream",
+    ["provider", "model"],
+    buckets=LLM_BUCKETS,
+)
+llm_requests = Counter(
+    "llm_requests",
+    "LLM provider calls, by outcome (ok, error)",
+    ["provider", "model", "outcome"],
+)
+tool_call_seconds = Histogram(
+    "agent_tool_call_seconds",
+    "Time of each tool call",
+    ["tool"],
+    buckets=TOOL_BUCKETS,
+)
+tool_calls = Counter(
+    "agent_tool_calls",
+    "Tool calls, by outcome (ok, error)",
+    ["tool", "outcome"],
+)
+upstream_request_seconds = Histogram(
+    "upstream_request_seconds",
+    "Time of each upstream HTTP request, by host and status class (2xx, 4xx, 5xx, error)",
+    ["host", "method", "status"],
+    buckets=HTTP_BUCKETS,
+)
+webhook_delivery_seconds = Histogram(
+    "agent_webhook_delivery_seconds",
+    "Time to post an answer to the agent backend webhook, by outcome",
+    ["outcome"],
+    buckets=HTTP_BUCKETS,
+)
+queue_depth = Gauge(
+    "agent_queue_depth",
+    "Webhook jobs waiting for a queue worker",
+    multiprocess_mode="livesum",
+)
+queue_running = Gauge(
+    "agent_queue_running",
+    "Webhook jobs being processed",
+    multiprocess_mode="livesum",
+)
+queue_wait_seconds = Histogram(
+    "agent_queue_wait_seconds",
+    "Time webhook jobs waited in the queue",
+    buckets=HTTP_BUCKETS + (30, 60),
+)
+
+
+def status_class(status_code: int) -> str:
+    """Status label of an HTTP response: 2xx, 3xx, 4xx or 5xx"""
+    return f"{status_code // 100}xx"
+
+
+def outcome(error: bool) -> str:
+    return "error" if error else "ok"
+
+
+def render() -> bytes:
+    """
+    Metrics in the Prometheus text format
+
+    Returns:
+        bytes: Values of every worker when PROMETHEUS_MULTIPROC_DIR is set, else of this process
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
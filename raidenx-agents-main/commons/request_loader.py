@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from commons.cache import _Flight
+
+
+class RequestLoader:
+    """
+    Memoizes upstream reads for the duration of one agent run.
+
+    Tools that need the same data (the wallet behind get_all_positions and
+    search_token, the positions list behind several tools) share a single
+    upstream response per run. Concurrent loads of the same key wait for the
+    first one. clear() is called after every write, so data read after a buy or
+    sell is fetched again; a load started before clear() is not stored.
+    """
+
+    def __init__(self):
+        self._results: Dict[Hashable, Any] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        # bumped by clear(), a load started under an older generation is stale
+        self._generation = 0
+        self.loads = 0
+        self.deduplicated = 0
+
+    def load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool],
+    ) -> Any:
+        """
+        Return the result stored for key, or call loader and store it
+
+        Args:
+            key (Hashable): Identity of the upstream call
+            loader (Callable[[], Any]): Performs the call
+            cacheable (Callable[[Any], bool]): Whether the result may be reused
+
+        Returns:
+            Any: Stored or fresh result
+        """
+        with self._lock:
+            if key in self._results:
+                self.deduplicated += 1
+                return self._results[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.loads += 1
+            else:
+                self.deduplicated += 1
+            generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            if cacheable(flight.value):
+                with self._lock:
+                    if self._generation == generation:
+                        self._results[key] = flight.value
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    async def aload(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool],
+    ) -> Any:
+        """
+        Async version of load; concurrent calls for one key share a single load
+
+        Args:
+            key (Hashable): Identity of the upstream call
+            loader (Callable[[], Awaitable[Any]]): Coroutine factory performing the call
+            cacheable (Callable[[Any], bool]): Whether the result may be reused
+
+        Returns:
+            Any: Stored or fresh result
+        """
+        if key in self._results:
+            with self._lock:
+                self.deduplicated += 1
+            return self._results[key]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            with self._lock:
+                self.deduplicated += 1
+            return await asyncio.shield(pending)
+
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        with self._lock:
+            self.loads += 1
+        try:
+            result = await loader()
+            if cacheable(result) and self._generation == generation:
+                self._results[key] = result
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def clear(self) -> None:
+        """Forget every stored result, e.g. after a write changed upstream state"""
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+            self._flights.clear()
+        self._pending.clear()
@@ -1,6 +1,5 @@
 import asyncio
 import os
-from telethon import TelegramClient
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,6 +18,9 @@ class TelegramMessenger:
         Args:
             message (str): Nội dung tin nhắn cần gửi
         """
+        # telethon is only needed here, keep it out of the API's import time
+        from telethon import TelegramClient
+
         try:
             async with TelegramClient(self.session_name, self.api_id, self.api_hash) as client:
                 await client.connect()
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+from typing import Dict
+
+
+def _pick(sorted_samples: list, pct: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class RollingStats:
+    """Keeps the most recent samples of a measurement and summarises them."""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+
+    def percentile(self, pct: float, default: float = 0.0) -> float:
+        """
+        Percentile over the current window
+
+        Args:
+            pct (float): Percentile between 0 and 100
+            default (float): Value returned when there are no samples
+
+        Returns:
+            float: The requested percentile
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return default
+        return _pick(samples, pct)
+
+    def summary(self) -> Dict[str, float]:
+        """Returns count, mean and p50/p95/max of the window"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.total
+        if not samples:
+            return {"count": count, "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+        return {
+            "count": count,
+            "avg": round(total / count, 4),
+            "p50": round(_pick(samples, 50), 4),
+            "p95": round(_pick(samples, 95), 4),
+            "max": round(samples[-1], 4),
+        }
@@ -0,0 +1,408 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from config import settings
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+# OTLP status codes
+STATUS_OK, STATUS_ERROR = 1, 2
+
+# Server-Timing entries: span category -> (metric name, unit used in its description)
+SERVER_TIMING = (("llm", "call"), ("tool", "call"), ("upstream", "request"))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _hex_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _Trace:
+    """Spans of one trace finished in this process, kept for the Server-Timing header."""
+
+    def __init__(self, trace_id: str, max_spans: int = 1000):
+        self.trace_id = trace_id
+        self.max_spans = max_spans
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+
+    def finished(self) -> List["Span"]:
+        with self._lock:
+            return list(self.spans)
+
+
+class Span:
+    """
+    A timed operation of a trace, exported in the OTLP JSON span format.
+
+    category groups spans in the Server-Timing header ("llm", "tool", "upstream").
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace: _Trace,
+        parent_id: Optional[str] = None,
+        kind: int = INTERNAL,
+        category: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace = trace
+        self.span_id = _hex_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.category = category
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, e: BaseException) -> None:
+        self.error = f"{type(e).__name__}: {e}"
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.trace.add(self)
+        self.tracer.exporter.export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, e: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """
+    Writes finished spans as OTLP JSON, to a file and/or an OTLP/HTTP collector.
+
+    Spans are queued and written in batches by a background thread, started on
+    first use in each process. When the queue is full new spans are dropped
+    rather than slowing requests down.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        path: str = "",
+        endpoint: str = "",
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        interval: float = 1.0,
+    ):
+        self.service_name = service_name
+        self.path = path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pid = None
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.endpoint)
+
+    def export(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        # the thread of a preloading master does not survive the fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": _otlp_value(self.service_name)},
+                    {"key": "process.pid", "value": _otlp_value(os.getpid())},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": self.service_name},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    def flush(self, spans: List[Span]) -> None:
+        """
+        Write a batch of spans
+
+        Args:
+            spans (List[Span]): Finished spans
+        """
+        payload = self._payload(spans)
+        try:
+            if self.path:
+                # one line per batch in a single append, so workers sharing the file do not interleave
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+                finally:
+                    os.close(fd)
+            if self.endpoint:
+                requests.post(self.endpoint, json=payload, timeout=5).raise_for_status()
+            self.exported += len(spans)
+        except Exception as e:
+            self.failed += len(spans)
+            print(f"Error exporting spans: {str(e)}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns export destinations, queued spans and exported/dropped/failed counters"""
+        return {
+            "path": self.path,
+            "endpoint": self.endpoint,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+class Tracer:
+    """
+    Creates the spans of requests, agent iterations, LLM calls, tool calls and
+    upstream HTTP requests.
+
+    The span in progress is kept in a context variable, so spans opened by the
+    tools (also in the threads and tasks started for them, which copy the
+    context) nest under the request that caused them.
+    """
+
+    def __init__(self, exporter: SpanExporter, enabled: bool = True):
+        self.exporter = exporter
+        self.enabled = enabled
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(
+        self,
+        name: str,
+        category: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = INTERNAL,
+        traceparent: Optional[str] = None,
+    ):
+        """
+        Start a span without making it current, for work that outlives the caller's
+        block (e.g. a stream); the caller must end() it
+
+        Args:
+            name (str): Span name
+            category (str, optional): Server-Timing group
+            attributes (dict, optional): Span attributes
+            kind (int): OTLP span kind
+            traceparent (str, optional): W3C traceparent of a caller to continue its trace
+
+        Returns:
+            Span: The started span, child of the current one if any
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        match = _TRACEPARENT.match((traceparent or "").strip().lower())
+        if parent is not None:
+            trace, parent_id = parent.trace, parent.span_id
+        elif match:
+            trace, parent_id = _Trace(match.group(1)), match.group(2)
+        else:
+            trace, parent_id = _Trace(_hex_id(128)), None
+        return Span(self, name, trace, parent_id, kind, category, attributes)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        category: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = INTERNAL,
+        traceparent: Optional[str] = None,
+    ) -> Iterator[Span]:
+        """Run a block in a new current span, see start_span; errors raised are recorded on it"""
+        span = self.start_span(name, category, attributes, kind, traceparent)
+        if span is _NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    @staticmethod
+    def server_timing(span: Span) -> str:
+        """
+        Server-Timing header value of a request span: its duration so far and the
+        time spent in LLM calls, tool calls and upstream requests finished under it
+
+        Durations of a category are summed, so concurrent tool calls can add up to
+        more than the total.
+        """
+        spans = span.trace.finished()
+        entries = [f"total;dur={span.duration_ms:.1f}"]
+        for category, unit in SERVER_TIMING:
+            durations = [child.duration_ms for child in spans if child.category == category]
+            if durations:
+                plural = "" if len(durations) == 1 else "s"
+                entries.append(f'{category};dur={sum(durations):.1f};desc="{len(durations)} {unit}{plural}"')
+        return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the request span and adding the Server-Timing header.
+
+    The header is sent with the response start, so for streamed responses it only
+    covers the work done before the first byte; the span itself ends with the
+    last byte and holds the whole request.
+    """
+
+    def __init__(self, app, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        span = self.tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+            kind=SERVER,
+            traceparent=headers.get(b"traceparent", b"").decode("latin-1"),
+        )
+        token = _current_span.set(span)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    # the route template, e.g. /v1/chat/threads/messages, keeps span names few
+                    span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.status_code", message["status"])
+                if settings.tracing.server_timing:
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"server-timing", self.tracer.server_timing(span).encode("latin-1")),
+                    ]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                span.end()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+
+span_exporter = SpanExporter(
+    service_name=settings.tracing.service_name,
+    path=settings.tracing.export_path,
+    endpoint=settings.tracing.otlp_endpoint,
+)
+tracer = Tracer(span_exporter, enabled=settings.tracing.enabled)
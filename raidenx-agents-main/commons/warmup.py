@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+
+from agents import get_agent_worker, get_llm, get_provider_llm, tools
+from commons.http_client import async_http_client, http_client
+from config import settings
+from utils.context_builder import count_tokens
+
+
+class Warmup:
+    """
+    Startup work done once per worker process before it reports ready.
+
+    Builds the shared LLM clients and the agent worker, loads the tokenizer,
+    renders the agent system prompt and opens the upstream connection pools, so
+    the first user message does not pay for them. Each step is bounded by
+    WARMUP_TIMEOUT; a step that fails or times out is recorded and the worker
+    becomes ready anyway, the work then happens on the first message as before.
+    """
+
+    def __init__(self, timeout: float, llm_ping: bool = False):
+        self.timeout = timeout
+        self.llm_ping = llm_ping
+        self.ready = False
+        self.started = None
+        self.seconds = None
+        self.steps: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def _steps(self) -> List[Tuple[str, Callable[[], Awaitable[Any]]]]:
+        steps = [
+            ("llm", self._build_llm),
+            ("tokenizer", self._load_tokenizer),
+            ("agent", self._build_agent),
+            ("upstream", self._open_upstream),
+        ]
+        if self.llm_ping:
+            steps.append(("llm_ping", self._ping_llm))
+        return steps
+
+    async def run(self) -> None:
+        """Run every warm-up step in order, then mark the worker ready"""
+        self.started = time.perf_counter()
+        try:
+            for name, step in self._steps():
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(step(), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    self.errors[name] = f"timed out after {self.timeout}s"
+                except Exception as e:
+                    self.errors[name] = str(e)
+                self.steps[name] = round(time.perf_counter() - started, 4)
+                if name in self.errors:
+                    print(f"Warm-up step {name} failed: {self.errors[name]}")
+        finally:
+            self.seconds = round(time.perf_counter() - self.started, 4)
+            self.ready = True
+
+    def skip(self) -> None:
+        """Report ready without warming up"""
+        self.ready = True
+
+    async def _build_llm(self) -> None:
+        # creating the provider clients blocks, keep the event loop free meanwhile
+        await asyncio.to_thread(get_llm)
+
+    async def _load_tokenizer(self) -> None:
+        await asyncio.to_thread(count_tokens, "warm up", "default")
+
+    async def _build_agent(self) -> None:
+        def build() -> None:
+            worker = get_agent_worker(get_llm())
+            worker._react_chat_formatter.format(tools, chat_history=[])
+
+        await asyncio.to_thread(build)
+
+    async def _open_upstream(self) -> None:
+        async def open_pool(url: str) -> None:
+            try:
+                await async_http_client.request("HEAD", url)
+            except Exception:
+                # any answer, even an error status, leaves a pooled connection behind
+                pass
+
+        await asyncio.gather(*(open_pool(url) for url in http_client.upstream_urls))
+
+    async def _ping_llm(self) -> None:
+        # straight to the provider: a ping is not a user call, it must not be cached,
+        # spend rate limit budget or set the hedge delay
+        await get_provider_llm().achat([ChatMessage(role=MessageRole.USER, content="ping")])
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns readiness, total and per-step warm-up time and step errors"""
+        return {
+            "ready": self.ready,
+            "warmup_seconds": self.seconds,
+            "warmup_steps": dict(self.steps),
+            "warmup_errors": dict(self.errors),
+        }
+
+
+warmup = Warmup(timeout=settings.warmup.timeout, llm_ping=settings.warmup.llm_ping)
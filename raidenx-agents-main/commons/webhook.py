@@ -0,0 +1,37 @@
+import time
+
+from config import settings
+from commons.http_client import async_http_client
+from commons.metrics import outcome, webhook_delivery_seconds
+
+
+def agent_webhook_url() -> str:
+    """URL of the agent backend endpoint that delivers answers to a thread"""
+    return f"{settings.agent.api_url}/api/v1/backend/message/agent-webhook-trigger"
+
+
+async def send_agent_webhook(payload: dict, webhook_url: str = None):
+    """
+    Post a payload to the agent-webhook-trigger endpoint
+
+    Args:
+        payload (dict): Answer ({"answer", "messageId", "action"}) or error payload
+        webhook_url (str, optional): Endpoint URL, defaults to agent_webhook_url()
+
+    Returns:
+        UpstreamResponse: Backend response
+    """
+    started, error = time.perf_counter(), True
+    try:
+        response = await async_http_client.post(
+            webhook_url or agent_webhook_url(),
+            json=payload,
+            headers={
+                "Content-Type": "application/json",
+                "X-API-KEY": settings.agent.api_key
+            }
+        )
+        error = response.status_code >= 400
+        return response
+    finally:
+        webhook_delivery_seconds.labels(outcome(error)).observe(time.perf_counter() - started)
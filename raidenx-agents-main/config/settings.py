@@ -35,11 +35,239 @@ class AgentSettings:
             'api_key': self.api_key
         }
 
+@dataclass
+class HttpSettings:
+    """Settings for the shared upstream HTTP client"""
+    pool_connections: int = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    pool_maxsize: int = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+    connect_timeout: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    read_timeout: float = float(os.getenv('HTTP_READ_TIMEOUT', '20'))
+    dns_cache_ttl: int = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+
+    def get_config(self) -> Dict[str, float]:
+        """Returns HTTP client configuration as dictionary"""
+        return {
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'dns_cache_ttl': self.dns_cache_ttl
+        }
+
+@dataclass
+class QueueSettings:
+    """Settings for the webhook agent job queue"""
+    concurrency: int = int(os.getenv('AGENT_QUEUE_CONCURRENCY', '8'))
+    max_depth: int = int(os.getenv('AGENT_QUEUE_MAX_DEPTH', '100'))
+    retry_after: int = int(os.getenv('AGENT_QUEUE_RETRY_AFTER', '5'))
+
+    def get_config(self) -> Dict[str, int]:
+        """Returns job queue configuration as dictionary"""
+        return {
+            'concurrency': self.concurrency,
+            'max_depth': self.max_depth,
+            'retry_after': self.retry_after
+        }
+
+@dataclass
+class ChatHistorySettings:
+    """Settings for the local per-thread chat history store"""
+    db_path: str = os.getenv('CHAT_HISTORY_DB', 'chat_history.db')
+    max_messages: int = int(os.getenv('CHAT_HISTORY_MAX_MESSAGES', '20'))
+    legacy_json_path: str = os.getenv('CHAT_HISTORY_LEGACY_JSON', 'chat_history.json')
+
+    def get_config(self) -> Dict[str, str]:
+        """Returns chat history store configuration as dictionary"""
+        return {
+            'db_path': self.db_path,
+            'max_messages': self.max_messages,
+            'legacy_json_path': self.legacy_json_path
+        }
+
+@dataclass
+class ThreadCacheSettings:
+    """Settings for the in-memory cache of agent backend thread messages"""
+    max_threads: int = int(os.getenv('THREAD_CACHE_MAX_THREADS', '1000'))
+    max_messages: int = int(os.getenv('THREAD_CACHE_MAX_MESSAGES', '50'))
+    max_age: int = int(os.getenv('THREAD_CACHE_MAX_AGE', '600'))
+
+    def get_config(self) -> Dict[str, int]:
+        """Returns thread cache configuration as dictionary"""
+        return {
+            'max_threads': self.max_threads,
+            'max_messages': self.max_messages,
+            'max_age': self.max_age
+        }
+
+@dataclass
+class MarketCacheSettings:
+    """Settings for the shared cache of public market data"""
+    price_ttl: float = float(os.getenv('MARKET_CACHE_PRICE_TTL', '5'))
+    pair_ttl: float = float(os.getenv('MARKET_CACHE_PAIR_TTL', '3600'))
+    trending_ttl: float = float(os.getenv('MARKET_CACHE_TRENDING_TTL', '15'))
+    max_entries: int = int(os.getenv('MARKET_CACHE_MAX_ENTRIES', '10000'))
+
+    def get_config(self) -> Dict[str, float]:
+        """Returns market data cache configuration as dictionary"""
+        return {
+            'price_ttl': self.price_ttl,
+            'pair_ttl': self.pair_ttl,
+            'trending_ttl': self.trending_ttl,
+            'max_entries': self.max_entries
+        }
+
+@dataclass
+class OrderTrackerSettings:
+    """Settings for polling submitted orders until they settle"""
+    initial_delay: float = float(os.getenv('ORDER_POLL_INITIAL_DELAY', '0.5'))
+    max_delay: float = float(os.getenv('ORDER_POLL_MAX_DELAY', '5'))
+    deadline: float = float(os.getenv('ORDER_POLL_DEADLINE', '90'))
+
+    def get_config(self) -> Dict[str, float]:
+        """Returns order tracker configuration as dictionary"""
+        return {
+            'initial_delay': self.initial_delay,
+            'max_delay': self.max_delay,
+            'deadline': self.deadline
+        }
+
+@dataclass
+class IntentRouterSettings:
+    """Settings for answering unambiguous commands without the LLM"""
+    enabled: bool = os.getenv('INTENT_ROUTER_ENABLED', 'true').lower() == 'true'
+
+    def get_config(self) -> Dict[str, bool]:
+        """Returns intent router configuration as dictionary"""
+        return {
+            'enabled': self.enabled
+        }
+
+@dataclass
+class LLMCacheSettings:
+    """Settings for the cache of LLM responses to identical prompts"""
+    enabled: bool = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    ttl: float = float(os.getenv('LLM_CACHE_TTL', '300'))
+    max_entries: int = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1000'))
+    flight_timeout: float = float(os.getenv('LLM_CACHE_FLIGHT_TIMEOUT', '30'))
+
+    def get_config(self) -> Dict[str, float]:
+        """Returns LLM cache configuration as dictionary"""
+        return {
+            'enabled': self.enabled,
+            'ttl': self.ttl,
+            'max_entries': self.max_entries,
+            'flight_timeout': self.flight_timeout
+        }
+
+@dataclass
+class ContextSettings:
+    """Settings for fitting the chat history into the prompt"""
+    max_tokens: int = int(os.getenv('CHAT_CONTEXT_MAX_TOKENS', '3000'))
+    max_messages: int = int(os.getenv('CHAT_CONTEXT_MAX_MESSAGES', '20'))
+    max_message_tokens: int = int(os.getenv('CHAT_CONTEXT_MAX_MESSAGE_TOKENS', '1000'))
+    old_output_tokens: int = int(os.getenv('CHAT_CONTEXT_OLD_OUTPUT_TOKENS', '150'))
+
+    def get_config(self) -> Dict[str, int]:
+        """Returns chat context configuration as dictionary"""
+        return {
+            'max_tokens': self.max_tokens,
+            'max_messages': self.max_messages,
+            'max_message_tokens': self.max_message_tokens,
+            'old_output_tokens': self.old_output_tokens
+        }
+
+@dataclass
+class LLMHedgeSettings:
+    """Settings for hedging slow LLM calls and failing over to other models"""
+    models: str = os.getenv('LLM_HEDGE_MODELS', 'gemini:models/gemini-1.5-flash')
+    default_delay: float = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '4'))
+    min_delay: float = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5'))
+    percentile: float = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+
+    def get_config(self) -> Dict[str, str]:
+        """Returns LLM hedging configuration as dictionary"""
+        return {
+            'models': self.models,
+            'default_delay': self.default_delay,
+            'min_delay': self.min_delay,
+            'percentile': self.percentile
+        }
+
+@dataclass
+class LLMRateLimitSettings:
+    """Settings for keeping LLM calls within the providers' rate limits"""
+    enabled: bool = os.getenv('LLM_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    requests_per_minute: float = float(os.getenv('LLM_RATE_LIMIT_RPM', '200'))
+    tokens_per_minute: float = float(os.getenv('LLM_RATE_LIMIT_TPM', '800000'))
+    limits: str = os.getenv('LLM_RATE_LIMITS', '')
+    completion_tokens: int = int(os.getenv('LLM_RATE_LIMIT_COMPLETION_TOKENS', '512'))
+    max_retries: int = int(os.getenv('LLM_RATE_LIMIT_MAX_RETRIES', '3'))
+    backoff: float = float(os.getenv('LLM_RATE_LIMIT_BACKOFF', '2'))
+
+    def get_config(self) -> Dict[str, str]:
+        """Returns LLM rate limit configuration as dictionary"""
+        return {
+            'enabled': self.enabled,
+            'requests_per_minute': self.requests_per_minute,
+            'tokens_per_minute': self.tokens_per_minute,
+            'limits': self.limits,
+            'completion_tokens': self.completion_tokens,
+            'max_retries': self.max_retries,
+            'backoff': self.backoff
+        }
+
+@dataclass
+class WarmupSettings:
+    """Settings for the startup warm-up run before a worker reports ready"""
+    enabled: bool = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+    llm_ping: bool = os.getenv('WARMUP_LLM_PING', 'false').lower() == 'true'
+    timeout: float = float(os.getenv('WARMUP_TIMEOUT', '20'))
+
+    def get_config(self) -> Dict[str, str]:
+        """Returns warm-up configuration as dictionary"""
+        return {
+            'enabled': self.enabled,
+            'llm_ping': self.llm_ping,
+            'timeout': self.timeout
+        }
+
+@dataclass
+class TracingSettings:
+    """Settings for request tracing and span export"""
+    enabled: bool = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    service_name: str = os.getenv('TRACING_SERVICE_NAME', 'raidenx-agents')
+    export_path: str = os.getenv('TRACING_EXPORT_PATH', '')
+    otlp_endpoint: str = os.getenv('TRACING_OTLP_ENDPOINT', '')
+    server_timing: bool = os.getenv('TRACING_SERVER_TIMING', 'true').lower() == 'true'
+
+    def get_config(self) -> Dict[str, str]:
+        """Returns tracing configuration as dictionary"""
+        return {
+            'enabled': self.enabled,
+            'service_name': self.service_name,
+            'export_path': self.export_path,
+            'otlp_endpoint': self.otlp_endpoint,
+            'server_timing': self.server_timing
+        }
+
 class Settings:
     """Main application settings"""
     def __init__(self):
         self.raiden = RaidenSettings()
         self.agent = AgentSettings()
+        self.http = HttpSettings()
+        self.queue = QueueSettings()
+        self.chat_history = ChatHistorySettings()
+        self.thread_cache = ThreadCacheSettings()
+        self.market_cache = MarketCacheSettings()
+        self.order_tracker = OrderTrackerSettings()
+        self.intent_router = IntentRouterSettings()
+        self.llm_cache = LLMCacheSettings()
+        self.context = ContextSettings()
+        self.llm_hedge = LLMHedgeSettings()
+        self.llm_rate_limit = LLMRateLimitSettings()
+        self.warmup = WarmupSettings()
+        self.tracing = TracingSettings()
 
 # Create a singleton settings instance
 settings = Settings()
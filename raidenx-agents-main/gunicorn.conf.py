@@ -0,0 +1,46 @@
+"""
+Gunicorn settings: preload the app once, then fork the uvicorn workers.
+
+With uvicorn --workers every worker imports llama-index, the provider SDKs, the
+tools and the prompts on its own. Here the master imports them once and the
+forked workers share those pages copy-on-write. Connections, LLM clients and
+background tasks are still created per worker, by the app lifespan.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import gc
+import os
+import shutil
+
+# workers write their Prometheus metrics here, summed by /v1/metrics. It must
+# exist before the app, and so prometheus_client, is imported; values left by a
+# previous run would be added to this one's
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/raidenx-agents-metrics")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '4009')}"
+workers = int(os.getenv("WORKERS", "5"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# an agent turn can take a while; the default 30s would kill busy workers
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # drops the gauges of the worker; its counters and histograms are kept
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    import agents
+
+    agents.preload()
+    # objects allocated so far are never collected: the collector does not
+    # write to their pages in the workers, which keeps them shared
+    gc.freeze()
+    server.log.info("Preloaded app and LLM SDKs, froze %d objects", gc.get_freeze_count())
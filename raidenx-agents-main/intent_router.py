@@ -0,0 +1,269 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+
+from commons.metrics import outcome, tool_call_seconds, tool_calls
+from commons.stats import RollingStats
+from commons.tracing import tracer
+from config import settings
+from tools import (
+    get_all_positions,
+    get_trending_pairs,
+    get_wallet_balance,
+    scan_token,
+    aget_all_positions,
+    aget_trending_pairs,
+    aget_wallet_balance,
+    ascan_token,
+)
+from utils.request_context import get_request_context
+
+# trailing punctuation and politeness that do not change the command
+_TRAILING = re.compile(r"(?:\s*(?:please|pls|plz))?[\s?!.]*$", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class Intent:
+    """
+    A command answered by a single tool call.
+
+    Attributes:
+        name (str): Intent name used in metrics
+        pattern (Pattern): Matches the whole normalised message; named groups become tool arguments
+        fn (Callable): Sync tool implementation
+        async_fn (Callable): Async tool implementation
+        action (Optional[str]): Action returned with the response, as react_chat does for this tool
+        formatter (Callable): Turns the tool output into the response text; None falls back to the agent
+        needs_jwt (bool): Whether the tool is called with the user's JWT
+        defaults (dict): Arguments used when a named group did not match
+    """
+    name: str
+    pattern: Pattern
+    fn: Callable[..., Any]
+    async_fn: Callable[..., Awaitable[Any]]
+    action: Optional[str]
+    formatter: Callable[[Any], Optional[str]] = lambda output: output
+    needs_jwt: bool = False
+    defaults: Optional[Dict[str, Any]] = None
+
+
+def _format_balance(wallet: Dict[str, Any]) -> str:
+    return (
+        "**Wallet Balance**\n"
+        f"👛 `{wallet['address']}`\n"
+        f"💰 `{wallet['balance']} SUI`"
+    )
+
+
+def _command(pattern: str) -> Pattern:
+    return re.compile(pattern, re.IGNORECASE)
+
+
+DEFAULT_INTENTS = [
+    Intent(
+        name="trending",
+        pattern=_command(
+            r"(?:show(?: me)? |get |what(?:'s| is) )?(?:the )?(?:top )?trending"
+            r"(?: (?:pairs?|tokens?|coins?))?"
+            r"(?: (?:in |on |for |over )?(?:the )?(?:last |past )?(?P<resolution>(?-i:5m|1h|6h|24h)))?"
+        ),
+        fn=get_trending_pairs,
+        async_fn=aget_trending_pairs,
+        action="get_trending_pairs",
+        defaults={"resolution": "5m"},
+    ),
+    Intent(
+        name="positions",
+        pattern=_command(r"(?:show(?: me)? |get |check |list )?(?:all )?(?:my )?(?:positions?|portfolio|holdings)"),
+        fn=get_all_positions,
+        async_fn=aget_all_positions,
+        action="get_all_positions",
+        needs_jwt=True,
+    ),
+    Intent(
+        name="balance",
+        pattern=_command(r"(?:show(?: me)? |get |check |what(?:'s| is) )?(?:my )?(?:wallet |sui )?balances?"),
+        fn=get_wallet_balance,
+        async_fn=aget_wallet_balance,
+        action=None,
+        formatter=_format_balance,
+        needs_jwt=True,
+    ),
+    Intent(
+        name="scan",
+        pattern=_command(r"(?:scan |check |analy[sz]e |info )?(?P<token_address>0x[0-9a-f]{1,64}::\w+::\w+)"),
+        fn=scan_token,
+        async_fn=ascan_token,
+        action="scan_token",
+    ),
+]
+
+
+class IntentRouter:
+    """
+    Answers unambiguous commands by calling their tool directly, without the LLM.
+
+    A message is routed only when the whole message matches an intent and the
+    assistant is not waiting for an answer to a question (a bare token address
+    may be the reply to "which token do you want to buy?"). Anything else, a
+    tool error or an empty tool result falls back to the agent. The response is
+    the same dict react_chat returns for that tool.
+    """
+
+    def __init__(self, intents: List[Intent], enabled: bool = True):
+        self.intents = intents
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.routed: Dict[str, int] = {intent.name: 0 for intent in intents}
+        self.fallbacks = 0
+        self.errors = 0
+        self.latency = RollingStats()
+
+    def match(self, query: str, chat_history: Optional[List[ChatMessage]] = None) -> Optional[Tuple[Intent, Dict[str, Any]]]:
+        """
+        Find the intent of a message
+
+        Args:
+            query (str): User message
+            chat_history (Optional[List[ChatMessage]]): Previous messages of the conversation
+
+        Returns:
+            Optional[Tuple[Intent, Dict[str, Any]]]: Intent and tool arguments, or None for the agent
+        """
+        if not self.enabled or not query:
+            return None
+        if chat_history:
+            last = chat_history[-1]
+            if last.role == MessageRole.ASSISTANT and (last.content or "").rstrip().endswith("?"):
+                return None
+
+        text = _WHITESPACE.sub(" ", _TRAILING.sub("", query.strip()))
+        for intent in self.intents:
+            found = intent.pattern.fullmatch(text)
+            if found is None:
+                continue
+            kwargs = dict(intent.defaults or {})
+            kwargs.update({name: value for name, value in found.groupdict().items() if value is not None})
+            if intent.needs_jwt:
+                kwargs["jwt_token"] = get_request_context().jwt_token
+            return intent, kwargs
+        return None
+
+    def _response(self, intent: Intent, output: Any, started: float) -> Optional[Dict[str, Any]]:
+        response = intent.formatter(output) if output is not None else None
+        with self._lock:
+            if not response:
+                self.fallbacks += 1
+                return None
+            self.routed[intent.name] += 1
+        self.latency.add(time.perf_counter() - started)
+        return {"response": response, "action": intent.action}
+
+    @staticmethod
+    def _tool_span(intent: Intent):
+        tool_name = intent.fn.__name__
+        return tracer.span(
+            f"tool {tool_name}",
+            category="tool",
+            attributes={"tool.name": tool_name, "intent.name": intent.name},
+        )
+
+    @staticmethod
+    def _record_tool(intent: Intent, started: float, error: bool) -> None:
+        tool_name = intent.fn.__name__
+        tool_call_seconds.labels(tool_name).observe(time.perf_counter() - started)
+        tool_calls.labels(tool_name, outcome(error)).inc()
+
+    def _error(self, intent: Intent, e: Exception) -> None:
+        print(f"Intent router: {intent.name} failed, falling back to the agent: {str(e)}")
+        with self._lock:
+            self.errors += 1
+
+    def _fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def route(self, query: str, chat_history: Optional[List[ChatMessage]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer the message directly if it is an unambiguous command
+
+        Must be called inside the request context of the run, which holds the user's JWT.
+
+        Args:
+            query (str): User message
+            chat_history (Optional[List[ChatMessage]]): Previous messages of the conversation
+
+        Returns:
+            Optional[Dict[str, Any]]: {"response", "action"} as returned by react_chat, or None for the agent
+        """
+        if not self.enabled:
+            return None
+        matched = self.match(query, chat_history)
+        if matched is None:
+            self._fallback()
+            return None
+        intent, kwargs = matched
+        started = time.perf_counter()
+        try:
+            with self._tool_span(intent):
+                output = intent.fn(**kwargs)
+        except Exception as e:
+            self._record_tool(intent, started, error=True)
+            self._error(intent, e)
+            return None
+        self._record_tool(intent, started, error=False)
+        return self._response(intent, output, started)
+
+    async def aroute(self, query: str, chat_history: Optional[List[ChatMessage]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Async version of route
+
+        Args:
+            query (str): User message
+            chat_history (Optional[List[ChatMessage]]): Previous messages of the conversation
+
+        Returns:
+            Optional[Dict[str, Any]]: {"response", "action"} as returned by react_chat_async, or None for the agent
+        """
+        if not self.enabled:
+            return None
+        matched = self.match(query, chat_history)
+        if matched is None:
+            self._fallback()
+            return None
+        intent, kwargs = matched
+        started = time.perf_counter()
+        try:
+            with self._tool_span(intent):
+                output = await intent.async_fn(**kwargs)
+        except Exception as e:
+            self._record_tool(intent, started, error=True)
+            self._error(intent, e)
+            return None
+        self._record_tool(intent, started, error=False)
+        return self._response(intent, output, started)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns routed/fallback/error counters and the latency of routed messages"""
+        with self._lock:
+            routed = dict(self.routed)
+            fallbacks, errors = self.fallbacks, self.errors
+        total_routed = sum(routed.values())
+        messages = total_routed + fallbacks + errors
+        return {
+            "enabled": self.enabled,
+            "routed": total_routed,
+            "fallbacks": fallbacks,
+            "errors": errors,
+            "routed_rate": round(total_routed / messages, 4) if messages else 0.0,
+            "intents": routed,
+            "latency_seconds": self.latency.summary(),
+        }
+
+
+intent_router = IntentRouter(DEFAULT_INTENTS, enabled=settings.intent_router.enabled)
@@ -220,6 +220,18 @@ Action Input: the input to the tool, in a JSON format representing the kwargs (e
 
 MUST ALWAYS start with a Thought.
 
+When you need several pieces of information that do not depend on each other (e.g. scanning or comparing several tokens), write all the actions after a single Thought. They are run together and you receive one Observation with every result, numbered in the order of the actions:
+
+```
+Thought: I need to scan both tokens to compare them.
+Action: scan_token
+Action Input: {{"token_address": "0x...::prez::PREZ"}}
+Action: scan_token
+Action Input: {{"token_address": "0x...::elon::ELON"}}
+```
+
+Only group actions whose inputs you already have. If an action needs the result of another one (e.g. a token address from search_token), wait for that Observation first. Buying and selling are always executed one at a time, in the order written.
+
 Please use a valid JSON format for the Action Input. Do NOT do this {{'input': 'hello world', 'num_beams': 5}}.
 
 If this format is used, the user will respond in the following format:
@@ -245,6 +257,7 @@ Answer: Sorry, I cannot answer your query.
 ## Additional Rules
 - You MUST obey the function signature of each tool. Do NOT pass in no arguments if the function expects arguments.
 - Before executing any buying or selling action, you **MUST** check the user's wallet balance for sufficient funds or token.
+- The output of scan_token, get_trending_pairs, get_all_positions, buy_token and sell_token is shown to the user as is and ends your turn, so call them last, once you have everything else you need. When the user asked to buy or sell, get_all_positions does not end your turn.
 
 ## Current Conversation
 Below is the current conversation consisting of interleaving human and assistant messages.
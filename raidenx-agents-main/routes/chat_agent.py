@@ -5,21 +5,24 @@ from pydantic import BaseModel
 from datetime import datetime
 import json
 import asyncio
-import aiohttp
+import time
 
 from auth.authorization import verify_token
 
 import os
 from dotenv import load_dotenv
 from utils.chat_session import (
-    load_chat_history,
-    save_chat_history,
-    convert_dict_to_chat_messages,
+    append_chat_messages,
     escape_markdown_v2,
 )
-from agents import react_chat, llm
-from tools.get_chat_histories import fetch_thread_messages
+from utils.context_builder import build_chat_history
+from agents import react_chat_async, react_chat_stream, get_llm
+from tools.get_chat_histories import afetch_thread_messages
 from config.settings import settings
+from commons.job_queue import agent_job_queue, QueueFullError
+from commons.metrics import agent_turn_seconds, outcome
+from commons.webhook import agent_webhook_url, send_agent_webhook
+from tools.check_order import order_tracker
 
 router = APIRouter()
 
@@ -77,11 +80,13 @@ class WebhookResponse(BaseModel):
         message_id (str): ID of the message being processed
         thread_id (str): ID of the thread
         action (str, optional): Action được trả về từ bot
+        queue_position (int, optional): Position of the message in the agent job queue
     """
     status: str
     message_id: str
     thread_id: str
     action: str | None = None
+    queue_position: int | None = None
 
     class Config:
         json_schema_extra = {
@@ -89,7 +94,8 @@ class WebhookResponse(BaseModel):
                 "status": "processing",
                 "message_id": "msg_123",
                 "thread_id": "thread_123",
-                "action": "buy_token"
+                "action": "buy_token",
+                "queue_position": 1
             }
         }
 
@@ -116,12 +122,17 @@ class WebhookTriggerResponse(BaseModel):
 
 VALID_ACTIONS = {"buy_token", "sell_token"}
 
+def _observe_turn(path: str, started: float, error: bool) -> None:
+    """Record the end-to-end time of a message answered on path (sync, stream, webhook)"""
+    agent_turn_seconds.labels(path, outcome(error)).observe(time.perf_counter() - started)
+
 @router.post("/threads/messages/sync", response_model=AgentResponse)
 async def create_message_sync(
     request: AgentRequest,
     session: dict = Depends(verify_token),
     authorization: str = Header(None, description="Bearer token")
 ):    
+    started = time.perf_counter()
     try:
         jwt_token = authorization.replace("Bearer ", "") if authorization else None
         
@@ -134,39 +145,23 @@ async def create_message_sync(
         thread_id = request.thread_id
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        try:
-            chat_history = load_chat_history()
-        except Exception as e:
-            print(f"Error loading chat history: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to load chat history")
-            
         chat_id = thread_id
         try:
-            messages = fetch_thread_messages(thread_id)
+            messages = await afetch_thread_messages(thread_id)
         except Exception as e:
             print(f"Error fetching thread messages: {str(e)}")
             messages = []
 
-        if chat_id not in chat_history:
-            chat_history[chat_id] = []
-
-        chat_history[chat_id].append({
-            "role": "user", 
-            "content": user_message, 
-            "time": current_time,
-            "message_id": message_id,
-            "thread_id": thread_id
-        })
-        
-        last_five_messages = messages[-10:] if messages else []
-        chat_history_message = convert_dict_to_chat_messages(last_five_messages)
+        llm = get_llm()
+        chat_history_message = build_chat_history(messages, llm)
         
         try:
-            bot_response_dict = react_chat(
+            bot_response_dict = await react_chat_async(
                 query=user_message,
                 llm=llm,
                 chat_history=chat_history_message,
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                message_id=message_id
             )
             
             if isinstance(bot_response_dict, dict):
@@ -178,22 +173,27 @@ async def create_message_sync(
             print(f"Error in react_chat: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
         
-        chat_history[chat_id].append({
-            "role": "assistant", 
-            "content": bot_response,
-            "time": current_time,
-            "message_id": message_id,
-            "thread_id": thread_id
-        })
-
-        if len(chat_history[chat_id]) > 20:
-            chat_history[chat_id] = chat_history[chat_id][-20:]
-
         try:
-            save_chat_history(chat_history)
+            await asyncio.to_thread(append_chat_messages, chat_id, [
+                {
+                    "role": "user", 
+                    "content": user_message, 
+                    "time": current_time,
+                    "message_id": message_id,
+                    "thread_id": thread_id
+                },
+                {
+                    "role": "assistant", 
+                    "content": bot_response,
+                    "time": current_time,
+                    "message_id": message_id,
+                    "thread_id": thread_id
+                },
+            ])
         except Exception as e:
             print(f"Warning: Failed to save chat history: {str(e)}")
             
+        _observe_turn("sync", started, error=False)
         return AgentResponse(
             message=bot_response,
             timestamp=current_time,
@@ -202,10 +202,102 @@ async def create_message_sync(
         )
             
     except HTTPException as he:
+        _observe_turn("sync", started, error=True)
         raise he
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
+        _observe_turn("sync", started, error=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        order_tracker.answer_sent(request.message_id)
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@router.post("/threads/messages/stream")
+async def create_message_stream(
+    request: AgentRequest,
+    session: dict = Depends(verify_token),
+    authorization: str = Header(None, description="Bearer token")
+):
+    """
+    Answer a message as a stream of Server-Sent Events.
+
+    Events, each with a JSON data line:
+        start: {"message_id", "thread_id"}, sent immediately
+        reasoning: {"thought", "action", "action_input"} for each tool the agent decides to use
+        tool_start: {"tool", "input"} / tool_end: {"tool", "output"} around each tool call
+        token: {"delta"} chunks of the final answer
+        final: {"response", "action", "timestamp"}; response is what the other routes return
+        error: {"message"}
+    """
+    jwt_token = authorization.replace("Bearer ", "") if authorization else None
+    
+    if not request.content.strip():
+        raise HTTPException(status_code=400, detail="Message content cannot be empty")
+
+    started = time.perf_counter()
+
+    async def event_stream():
+        user_message = request.content
+        message_id = request.message_id
+        thread_id = request.thread_id
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        yield _sse("start", {"message_id": message_id, "thread_id": thread_id})
+
+        try:
+            messages = await afetch_thread_messages(thread_id)
+        except Exception as e:
+            print(f"Error fetching thread messages: {str(e)}")
+            messages = []
+        llm = get_llm()
+        chat_history_message = build_chat_history(messages, llm)
+
+        bot_response = None
+        try:
+            async for event, data in react_chat_stream(
+                query=user_message,
+                llm=llm,
+                chat_history=chat_history_message,
+                jwt_token=jwt_token,
+                message_id=message_id
+            ):
+                if event == "final":
+                    bot_response = data["response"]
+                    data = {**data, "timestamp": current_time}
+                yield _sse(event, data)
+        finally:
+            order_tracker.answer_sent(message_id)
+            _observe_turn("stream", started, error=bot_response is None)
+
+        if bot_response is not None:
+            try:
+                await asyncio.to_thread(append_chat_messages, thread_id, [
+                    {
+                        "role": "user", 
+                        "content": user_message, 
+                        "time": current_time,
+                        "message_id": message_id,
+                        "thread_id": thread_id
+                    },
+                    {
+                        "role": "assistant", 
+                        "content": bot_response,
+                        "time": current_time,
+                        "message_id": message_id,
+                        "thread_id": thread_id
+                    },
+                ])
+            except Exception as e:
+                print(f"Warning: Failed to save chat history: {str(e)}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/threads/messages", response_model=WebhookResponse)
 async def create_message_async(
@@ -213,28 +305,52 @@ async def create_message_async(
     session: dict = Depends(verify_token),
     authorization: str = Header(None, description="Bearer token")
 ):    
-    task = asyncio.create_task(
-        process_message_webhook(
-            request=request,
-            session=session,
-            jwt_token=authorization.replace("Bearer ", "") if authorization else None,
-            webhook_url=f"{settings.agent.api_url}/api/v1/backend/message/agent-webhook-trigger"
+    received = time.perf_counter()
+    jwt_token = authorization.replace("Bearer ", "") if authorization else None
+    webhook_url = agent_webhook_url()
+    
+    try:
+        queue_position = agent_job_queue.submit(
+            lambda: process_message_webhook(
+                request=request,
+                session=session,
+                jwt_token=jwt_token,
+                webhook_url=webhook_url,
+                received=received
+            ),
+            name=request.message_id
+        )
+    except QueueFullError as e:
+        error_response = {
+            "message": "Agent is busy, please retry later",
+            "error_key": "queue_full",
+            "statusCode": 503,
+            "queue_position": e.depth + 1
+        }
+        raise HTTPException(
+            status_code=503,
+            detail=error_response,
+            headers={"Retry-After": str(settings.queue.retry_after)}
         )
-    )
     
     return WebhookResponse(
         status="processing",
         message_id=request.message_id,
         thread_id=request.thread_id,
-        action=None 
+        action=None,
+        queue_position=queue_position
     )
 
 async def process_message_webhook(
     request: AgentRequest,
     session: dict,
     jwt_token: str,
-    webhook_url: str
+    webhook_url: str,
+    received: float = None
 ):
+    # end-to-end time runs from the request, so it includes the queue wait and the delivery
+    started = received or time.perf_counter()
+    error = True
     try:
         
         user = session["userName"]
@@ -242,10 +358,9 @@ async def process_message_webhook(
         message_id = request.message_id
         thread_id = request.thread_id
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        chat_history = load_chat_history()
         
         chat_id = thread_id
-        messages = fetch_thread_messages(thread_id)
+        messages = await afetch_thread_messages(thread_id)
         
         
         print(f"User Message: {user_message}")
@@ -253,45 +368,25 @@ async def process_message_webhook(
         print(f"thread_id: {thread_id}")
         print(f"message_id: {message_id}")
 
-        if chat_id not in chat_history:
-            chat_history[chat_id] = []
-
-        chat_history[chat_id].append({
-            "role": "user", 
-            "content": user_message, 
-            "time": current_time,
-            "message_id": message_id,
-            "thread_id": thread_id
-        })
-        # last_five_messages = chat_history[chat_id][-10:]
-        
-        last_five_messages = messages[-10:]
-
-        chat_history_message = convert_dict_to_chat_messages(last_five_messages)
+        llm = get_llm()
+        chat_history_message = build_chat_history(messages, llm)
         
-        bot_response_dict = react_chat(
+        bot_response_dict = await react_chat_async(
             query=user_message,
             llm=llm,
             chat_history=chat_history_message,
-            jwt_token=jwt_token
+            jwt_token=jwt_token,
+            message_id=message_id
         )
 
         bot_response = bot_response_dict["response"]
         action = bot_response_dict.get("action")
         action_response = action if action in VALID_ACTIONS else None
         
-        # chat_history[chat_id].append({
-        #     "role": "assistant", 
-        #     "content": bot_response,
-        #     "time": current_time,
-        #     "message_id": message_id,
-        #     "thread_id": thread_id
-        # })
-
-        # if len(chat_history[chat_id]) > 20:
-        #     chat_history[chat_id] = chat_history[chat_id][-20:]
-
-        # save_chat_history(chat_history)
+        # append_chat_messages(chat_id, [
+        #     {"role": "user", "content": user_message, "time": current_time, "message_id": message_id, "thread_id": thread_id},
+        #     {"role": "assistant", "content": bot_response, "time": current_time, "message_id": message_id, "thread_id": thread_id},
+        # ])
         
         webhook_response = WebhookTriggerRequest(
             answer=bot_response,
@@ -299,17 +394,9 @@ async def process_message_webhook(
             action=action_response
         )
         
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                webhook_url,
-                json=webhook_response.dict(),
-                headers={
-                    "Content-Type": "application/json",
-                    "X-API-KEY": settings.agent.api_key
-                }
-            )
-            response_text = await response.text()
-            print(f"Webhook Response: Status={response.status}, Body={response_text}")
+        response = await send_agent_webhook(webhook_response.dict(), webhook_url)
+        print(f"Webhook Response: Status={response.status_code}, Body={response.text}")
+        error = response.status_code >= 400
             
     except Exception as e:
         print(f"Error occurred: {str(e)}")
@@ -318,14 +405,8 @@ async def process_message_webhook(
             "message_id": message_id,
             "thread_id": thread_id
         }
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                webhook_url,
-                json=error_response,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-API-KEY": settings.agent.api_key
-                }
-            )
-            response_text = await response.text()
-            print(f"Error Webhook Response: Status={response.status}, Body={response_text}")
\ No newline at end of file
+        response = await send_agent_webhook(error_response, webhook_url)
+        print(f"Error Webhook Response: Status={response.status_code}, Body={response.text}")
+    finally:
+        order_tracker.answer_sent(request.message_id)
+        _observe_turn("webhook", started, error)
@@ -1,5 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+from LLM.cached_llm import llm_response_cache
+from LLM.hedged_llm import model_stats
+from LLM.rate_limiter import rate_limiter_metrics
+from commons.job_queue import agent_job_queue
+from commons.tracing import span_exporter
+from commons.warmup import warmup
+from intent_router import intent_router
+from tools.check_order import order_tracker
+from utils.context_builder import context_metrics
 
 router = APIRouter()
 
@@ -7,10 +18,208 @@ class HealthResponse(BaseModel):
     """Response model for health check
     
     Attributes:
-        status (str): Status of the health check
+        status (str): "ok" once the worker is ready, "starting" during the warm-up
+        ready (bool): Whether the startup warm-up is done
+        warmup_seconds (float, optional): Time the warm-up took
+        warmup_steps (dict): Time each warm-up step took
+        warmup_errors (dict): Warm-up steps that failed or timed out, with their error
     """
     status: str
+    ready: bool
+    warmup_seconds: Optional[float] = None
+    warmup_steps: Dict[str, float] = {}
+    warmup_errors: Dict[str, str] = {}
 
 @router.get("", response_model=HealthResponse)
-async def health():
-    return HealthResponse(status="ok")
+async def health(response: Response):
+    metrics = warmup.metrics()
+    if not metrics["ready"]:
+        # load balancers and readiness probes keep traffic away until warm
+        response.status_code = 503
+    return HealthResponse(status="ok" if metrics["ready"] else "starting", **metrics)
+
+
+class QueueMetricsResponse(BaseModel):
+    """Response model for agent job queue metrics
+    
+    Attributes:
+        depth (int): Jobs waiting for a worker
+        max_depth (int): Queue capacity before requests are rejected
+        running (int): Jobs currently being processed
+        concurrency (int): Number of queue workers
+        submitted (int): Jobs accepted since startup
+        rejected (int): Jobs rejected because the queue was full
+        failed (int): Jobs that raised an error
+        wait_time_seconds (dict): Time spent queued (count, avg, p50, p95, max)
+        run_time_seconds (dict): Time spent running (count, avg, p50, p95, max)
+    """
+    depth: int
+    max_depth: int
+    running: int
+    concurrency: int
+    submitted: int
+    rejected: int
+    failed: int
+    wait_time_seconds: Dict[str, float]
+    run_time_seconds: Dict[str, float]
+
+@router.get("/queue", response_model=QueueMetricsResponse)
+async def queue_metrics():
+    return QueueMetricsResponse(**agent_job_queue.metrics())
+
+
+class OrderTrackerMetricsResponse(BaseModel):
+    """Response model for order tracker metrics
+    
+    Attributes:
+        tracked (int): Orders followed in the background since startup
+        active (int): Orders still being polled
+        timed_out (int): Orders that did not settle before the deadline
+        settle_time_seconds (dict): Time from submission to final status (count, avg, p50, p95, max)
+    """
+    tracked: int
+    active: int
+    timed_out: int
+    settle_time_seconds: Dict[str, float]
+
+@router.get("/orders", response_model=OrderTrackerMetricsResponse)
+async def order_tracker_metrics():
+    return OrderTrackerMetricsResponse(**order_tracker.metrics())
+
+
+class IntentRouterMetricsResponse(BaseModel):
+    """Response model for intent router metrics
+    
+    Attributes:
+        enabled (bool): Whether commands are routed without the LLM
+        routed (int): Messages answered directly by a tool
+        fallbacks (int): Messages handed to the agent
+        errors (int): Routed messages whose tool failed, then handed to the agent
+        routed_rate (float): Share of messages answered directly
+        intents (dict): Messages answered per intent
+        latency_seconds (dict): Time to answer routed messages (count, avg, p50, p95, max)
+    """
+    enabled: bool
+    routed: int
+    fallbacks: int
+    errors: int
+    routed_rate: float
+    intents: Dict[str, int]
+    latency_seconds: Dict[str, float]
+
+@router.get("/router", response_model=IntentRouterMetricsResponse)
+async def intent_router_metrics():
+    return IntentRouterMetricsResponse(**intent_router.metrics())
+
+
+class LLMCacheMetricsResponse(BaseModel):
+    """Response model for LLM response cache metrics
+    
+    Attributes:
+        name (str): Cache name
+        size (int): Responses currently cached
+        ttl (float): Seconds a response is reused
+        hits (int): Calls answered from cache
+        misses (int): Eligible calls sent to the LLM
+        coalesced (int): Calls that waited for an identical call in progress
+        hit_rate (float): Share of eligible calls that did not reach the LLM
+        bypassed (int): Calls not eligible because their prompt holds tool output
+    """
+    name: str
+    size: int
+    ttl: float
+    hits: int
+    misses: int
+    coalesced: int
+    hit_rate: float
+    bypassed: int
+
+@router.get("/llm-cache", response_model=LLMCacheMetricsResponse)
+async def llm_cache_metrics():
+    return LLMCacheMetricsResponse(**llm_response_cache.stats())
+
+
+class ContextMetricsResponse(BaseModel):
+    """Response model for chat context metrics
+    
+    Attributes:
+        max_tokens (int): Token budget of a chat history
+        truncated_messages (int): History messages cut to fit the budget
+        dropped_messages (int): History messages left out to fit the budget
+        history_tokens (dict): Tokens of each chat history built (count, avg, p50, p95, max)
+        prompt_tokens (dict): Tokens of each prompt sent to the LLM (count, avg, p50, p95, max)
+    """
+    max_tokens: int
+    truncated_messages: int
+    dropped_messages: int
+    history_tokens: Dict[str, float]
+    prompt_tokens: Dict[str, float]
+
+@router.get("/context", response_model=ContextMetricsResponse)
+async def chat_context_metrics():
+    return ContextMetricsResponse(**context_metrics.metrics())
+
+
+class LLMMetricsResponse(BaseModel):
+    """Response model for LLM hedging and failover metrics
+    
+    Attributes:
+        hedges (int): Calls also sent to another model because the first one was slow
+        failovers (int): Calls sent to another model because the previous one failed
+        models (dict): Per "provider:model": wins, errors and latency_seconds (count, avg, p50, p95, max)
+    """
+    hedges: int
+    failovers: int
+    models: Dict[str, Dict[str, Any]]
+
+@router.get("/llm", response_model=LLMMetricsResponse)
+async def llm_metrics():
+    return LLMMetricsResponse(**model_stats.metrics())
+
+
+class RateLimiterMetrics(BaseModel):
+    """Metrics of the rate limiter of one provider model
+    
+    Attributes:
+        requests_per_minute (float): Request budget
+        tokens_per_minute (float): Prompt and completion token budget
+        queued (int): Calls waiting for budget
+        granted (int): Calls let through since startup
+        throttled (int): Calls the provider rejected with 429
+        paused_seconds (float): Time left before calls resume after a 429
+        wait_time_seconds (dict): Time calls waited for budget (count, avg, p50, p95, max)
+    """
+    requests_per_minute: float
+    tokens_per_minute: float
+    queued: int
+    granted: int
+    throttled: int
+    paused_seconds: float
+    wait_time_seconds: Dict[str, float]
+
+@router.get("/llm-rate-limits", response_model=Dict[str, RateLimiterMetrics])
+async def llm_rate_limit_metrics():
+    return rate_limiter_metrics()
+
+
+class TracingMetricsResponse(BaseModel):
+    """Response model for span export metrics
+    
+    Attributes:
+        path (str): File the spans are appended to, empty when disabled
+        endpoint (str): OTLP/HTTP collector the spans are sent to, empty when disabled
+        queued (int): Finished spans waiting to be exported
+        exported (int): Spans exported since startup
+        dropped (int): Spans dropped because the export queue was full
+        failed (int): Spans whose export failed
+    """
+    path: str
+    endpoint: str
+    queued: int
+    exported: int
+    dropped: int
+    failed: int
+
+@router.get("/tracing", response_model=TracingMetricsResponse)
+async def tracing_metrics():
+    return TracingMetricsResponse(**span_exporter.metrics())
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+
+from commons.metrics import CONTENT_TYPE_LATEST, render
+
+router = APIRouter()
+
+@router.get("", response_class=Response)
+async def get_metrics():
+    """Prometheus metrics of the agent API, summed over every worker"""
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
@@ -1 +1 @@
-uvicorn app:app --host 0.0.0.0 --port 4009 --workers 5
\ No newline at end of file
+gunicorn -c gunicorn.conf.py app:app
\ No newline at end of file
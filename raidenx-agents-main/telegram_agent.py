@@ -3,14 +3,15 @@ import os
 from dotenv import load_dotenv
 import nest_asyncio
 from utils.chat_session import (
-    load_chat_history,
-    save_chat_history,
-    convert_dict_to_chat_messages,
+    get_recent_chat_messages,
+    append_chat_messages,
     escape_markdown_v2,
 )
-from agents import react_chat, llm
+from utils.context_builder import build_chat_history
+from agents import react_chat, get_llm
 from datetime import datetime
 from auth.jwt_generator import get_jwt
+from config.settings import settings
 
 nest_asyncio.apply()
 load_dotenv()
@@ -35,17 +36,11 @@ async def handle_message(event):
         
         user_message = event.message.text
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        chat_history = load_chat_history()
+        user_entry = {"role": "user", "content": user_message, "time": current_time}
+        recent_messages = [*get_recent_chat_messages(chat_id, settings.context.max_messages - 1), user_entry]
 
-        if chat_id not in chat_history:
-            chat_history[chat_id] = []
-
-        chat_history[chat_id].append(
-            {"role": "user", "content": user_message, "time": current_time}
-        )
-        last_five_messages = chat_history[chat_id][-10:]
-
-        chat_history_message = convert_dict_to_chat_messages(last_five_messages)
+        llm = get_llm()
+        chat_history_message = build_chat_history(recent_messages, llm)
         
         jwt_token=get_jwt(chat_id, user, user)
 
@@ -66,14 +61,10 @@ async def handle_message(event):
         
         bot_response = bot_response["response"]
 
-        chat_history[chat_id].append(
-            {"role": "assistant", "content": bot_response, "time": current_time}
-        )
-
-        if len(chat_history[chat_id]) > 20:
-            chat_history[chat_id] = chat_history[chat_id][-20:]
-
-        save_chat_history(chat_history)
+        append_chat_messages(chat_id, [
+            user_entry,
+            {"role": "assistant", "content": bot_response, "time": current_time},
+        ])
 
         try:
             await event.reply(bot_response)
@@ -1,10 +1,11 @@
-from tools.get_positions import get_positions_by_token
-from tools.get_wallets import get_wallet_balance
-from tools.search_tokens import search_token
-from tools.buy_token import buy_token
-from tools.sell_token import sell_token
-from tools.get_positions import get_all_positions, get_all_positions_data
-from tools.scan_token import scan_token
-from tools.get_trending_pairs import get_trending_pairs
+from tools.get_positions import get_positions_by_token, aget_positions_by_token
+from tools.get_wallets import get_wallet_balance, aget_wallet_balance
+from tools.search_tokens import search_token, asearch_token
+from tools.buy_token import buy_token, abuy_token
+from tools.sell_token import sell_token, asell_token
+from tools.get_positions import get_all_positions, get_all_positions_data, aget_all_positions, aget_all_positions_data
+from tools.scan_token import scan_token, ascan_token
+from tools.get_trending_pairs import get_trending_pairs, aget_trending_pairs
 
-__all__ = ["get_positions_by_token", "get_wallet_balance", "search_token", "buy_token", "sell_token", "get_all_positions", "scan_token", "get_trending_pairs", "get_all_positions_data"]
+__all__ = ["get_positions_by_token", "get_wallet_balance", "search_token", "buy_token", "sell_token", "get_all_positions", "scan_token", "get_trending_pairs", "get_all_positions_data",
+           "aget_positions_by_token", "aget_wallet_balance", "asearch_token", "abuy_token", "asell_token", "aget_all_positions", "ascan_token", "aget_trending_pairs", "aget_all_positions_data"]
\ No newline at end of file
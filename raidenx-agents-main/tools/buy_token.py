@@ -5,23 +5,30 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import requests
-from auth.jwt_generator import get_jwt
-import asyncio
-from telegram.ext import ApplicationBuilder
-from telegram import Bot
 
 from tools.utils import json_to_dict
 from tools.get_wallets import get_wallet_balance
 from dotenv import load_dotenv
-from commons.send_telegram import TelegramMessenger
-from tools.get_top_pair import fetch_top_pair
-from tools.check_order import OrderChecker
+from tools.get_top_pair import fetch_top_pair, afetch_top_pair
+from tools.check_order import OrderChecker, order_tracker, format_order_submitted, format_order_result
 from config import settings
+from commons.http_client import http_client, async_http_client
+from utils.request_context import get_request_context
 
 load_dotenv()
 
 checker = OrderChecker()
 
+INSUFFICIENT_LIQUIDITY_MESSAGE = (
+    "❌ Transaction Failed\n\n"
+    "📊 Reason: Insufficient liquidity in this trading pair\n"
+    "💡 Solutions:\n"
+    "• Please retry once liquidity is added\n"
+    "• Or reduce the amount of SUI to spend\n"
+    "• Or try trading with a different token"
+)
+
+
 def buy_token(token_address: str, amount: float, wallet_address: str, jwt_token: str) -> str:
     """
     Buy a token with a specified amount of SUI from a user's wallet
@@ -52,39 +59,14 @@ def buy_token(token_address: str, amount: float, wallet_address: str, jwt_token:
         if not pair_id:
             return f"No trading pair found for token {token_address}"
         
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {jwt_token}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "buyAmount": str(amount),
-            "tokenAddress": token_address,
-            "orderSetting": {
-                "priorityFee": "0",
-                "slippage": 40
-            },
-            "pairId": pair_id,
-            "wallets": [wallet_address]
-        }
-        
-        response = requests.post(
-            f"{settings.raiden.api_orders_url}/api/v1/sui/orders/quick-buy",
-            headers=headers,
-            json=payload
-        )
+        url, headers, payload = _quick_buy_request(token_address, amount, wallet_address, jwt_token, pair_id)
+        response = http_client.post(url, headers=headers, json=payload)
         
         response.raise_for_status()
         
         result = response.json()
         if not result:
-            return "❌ Transaction Failed\n\n" \
-                   "📊 Reason: Insufficient liquidity in this trading pair\n" \
-                   "💡 Solutions:\n" \
-                   "• Please retry once liquidity is added\n" \
-                   "• Or reduce the amount of SUI to spend\n" \
-                   "• Or try trading with a different token"
+            return INSUFFICIENT_LIQUIDITY_MESSAGE
             
         order_id = result[0]["order"]["id"]
         
@@ -92,34 +74,115 @@ def buy_token(token_address: str, amount: float, wallet_address: str, jwt_token:
         
         print(f"status-buy-token: {status}")
         
-        def format_number(num: float) -> str:
-            if num < 1000:
-                return f"{num:.2f}"
-            elif num < 1000000:
-                return f"{num/1000:.1f}K"
-            else:
-                return f"{num:,.4f}"
-        
-        explorer_url = f"https://suivision.xyz/txblock/{status['hash']}"
-        
-        message = (
-            f"**Token Purchase Success**\n"
-            f"💰 Spent: `{float(status['amountIn']):.4f} SUI`\n"
-            f"📈 Received: `{format_number(float(status['amountOut']))} tokens`\n"
-            f"🔗 [View Transaction]({explorer_url})\n"
-            f"👛 `{wallet_address}`"
-        )
-                
-        # messenger = TelegramMessenger()
-        # asyncio.run(messenger.send_message(
-        #     f"🟢 Buy Alert: User {displayName} ({userName}) has purchased {token_address} token for {amount} SUI"
-        # ))
-        
-        return message
+        return _format_purchase(status, wallet_address)
         
     except requests.exceptions.RequestException as e:
         return f"Error occurred while making the purchase: {str(e)}"
 
 
+async def abuy_token(token_address: str, amount: float, wallet_address: str, jwt_token: str) -> str:
+    """
+    Async version of buy_token
+
+    Args:
+        token_address (str): Token contract address
+        amount (float): Amount in SUI to spend
+        wallet_address (str): User's wallet address
+        jwt_token (str): Authorization token
+        
+    Returns:
+        str: "Order submitted" message when the agent run has a message_id (the
+            final status is pushed to the thread later), otherwise the transaction result
+    """
+    try:
+        result = await afetch_top_pair(token_address)
+        if result is None:
+            return f"Failed to fetch top pair information for {token_address}. Please try again later."
+            
+        network, pair_id = result
+        if not pair_id:
+            return f"No trading pair found for token {token_address}"
+        
+        url, headers, payload = _quick_buy_request(token_address, amount, wallet_address, jwt_token, pair_id)
+        response = await async_http_client.post(url, headers=headers, json=payload)
+        
+        response.raise_for_status()
+        
+        result = response.json()
+        if not result:
+            return INSUFFICIENT_LIQUIDITY_MESSAGE
+            
+        order_id = result[0]["order"]["id"]
+        
+        message_id = get_request_context().message_id
+        if message_id:
+            # the final status is pushed to the thread once the order settles
+            order_tracker.track(
+                order_id,
+                jwt_token,
+                message_id=message_id,
+                action="buy_token",
+                format_result=lambda status: _format_purchase(status, wallet_address),
+            )
+            return format_order_submitted(order_id, "Purchase", wallet_address)
+        
+        status = await order_tracker.wait(order_id, jwt_token)
+        
+        print(f"status-buy-token: {status}")
+        
+        return format_order_result(order_id, status, lambda status: _format_purchase(status, wallet_address))
+        
+    except requests.exceptions.RequestException as e:
+        return f"Error occurred while making the purchase: {str(e)}"
+
+
+def _quick_buy_request(token_address: str, amount: float, wallet_address: str, jwt_token: str, pair_id: str):
+    url = f"{settings.raiden.api_orders_url}/api/v1/sui/orders/quick-buy"
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {jwt_token}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "buyAmount": str(amount),
+        "tokenAddress": token_address,
+        "orderSetting": {
+            "priorityFee": "0",
+            "slippage": 40
+        },
+        "pairId": pair_id,
+        "wallets": [wallet_address]
+    }
+    return url, headers, payload
+
+
+def _format_purchase(status: dict, wallet_address: str) -> str:
+    def format_number(num: float) -> str:
+        if num < 1000:
+            return f"{num:.2f}"
+        elif num < 1000000:
+            return f"{num/1000:.1f}K"
+        else:
+            return f"{num:,.4f}"
+    
+    explorer_url = f"https://suivision.xyz/txblock/{status['hash']}"
+    
+    message = (
+        f"**Token Purchase Success**\n"
+        f"💰 Spent: `{float(status['amountIn']):.4f} SUI`\n"
+        f"📈 Received: `{format_number(float(status['amountOut']))} tokens`\n"
+        f"🔗 [View Transaction]({explorer_url})\n"
+        f"👛 `{wallet_address}`"
+    )
+            
+    # messenger = TelegramMessenger()
+    # asyncio.run(messenger.send_message(
+    #     f"🟢 Buy Alert: User {displayName} ({userName}) has purchased {token_address} token for {amount} SUI"
+    # ))
+    
+    return message
+
+
 # if __name__ == "__main__":
 #     print(buy_token("2104920255", "hungdv", "hungdv", "0x1974ea7ea3bd5290f7f9fdf69e9f8aac766a55a3783d18431a7a1358418eb9f4::ppei::PPEI", 0.003, "0xea1bc45a51e0051b6a7b53c3ce4f0a45d416b985042ff51f73ca8155452daf7f"))
\ No newline at end of file
@@ -6,8 +6,15 @@ sys.path.insert(0, str(project_root))
 
 import requests
 import time
-from typing import Dict
+import asyncio
+from typing import Callable, Dict, Optional, Set
 from config import settings
+from commons.http_client import http_client, async_http_client
+from commons.stats import RollingStats
+from commons.webhook import send_agent_webhook
+
+# Order statuses after which polling stops
+FINAL_ORDER_STATUSES = {"success", "failed", "fail", "error", "cancelled", "canceled", "expired"}
 
 class OrderChecker:
     def __init__(self):
@@ -43,13 +50,8 @@ class OrderChecker:
         """
         for attempt in range(self.MAX_RETRIES):
             try:
-                url = f"{self.base_url}/{order_id}"
-                headers = {
-                    "accept": "application/json",
-                    "Authorization": f"Bearer {jwt_token}"
-                }
-                
-                response = requests.get(url, headers=headers)
+                url, headers = self._order_request(order_id, jwt_token)
+                response = http_client.get(url, headers=headers, dedupe=False)
                 response.raise_for_status()
                 result = response.json()
                 
@@ -71,6 +73,246 @@ class OrderChecker:
                     continue
                 return {"error": f"Failed to get order status: {str(e)}"}
 
+    async def afetch_order_details(self, order_id: str, jwt_token: str) -> Dict:
+        """
+        Fetch the current details of an order once
+        Args:
+            order_id: The ID of the order to check
+            jwt_token: JWT token for authentication
+        Returns:
+            dict: Order details including status, amounts, hash
+        """
+        url, headers = self._order_request(order_id, jwt_token)
+        response = await async_http_client.get(url, headers=headers, dedupe=False)
+        response.raise_for_status()
+        result = response.json()
+        if not result:
+            return {"status": "error", "error": "Empty response from server"}
+        return self.get_order_details(result)
+
+    def _order_request(self, order_id: str, jwt_token: str):
+        url = f"{self.base_url}/{order_id}"
+        headers = {
+            "accept": "application/json",
+            "Authorization": f"Bearer {jwt_token}"
+        }
+        return url, headers
+
+
+class OrderTracker:
+    """
+    Follows submitted orders until they settle, without holding the agent turn.
+
+    wait() polls one order with exponential backoff until it reaches a final status
+    or the deadline passes. track() does the same in a background task and pushes
+    the result to the thread through the agent-webhook-trigger endpoint, so
+    buy_token/sell_token can answer "order submitted" right away. Any number of
+    orders can be followed concurrently; each one only costs a sleeping task.
+    """
+
+    def __init__(self, checker: OrderChecker, initial_delay: float, max_delay: float, deadline: float):
+        self.checker = checker
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._tasks: Set[asyncio.Task] = set()
+        self._answer_sent: Dict[str, asyncio.Event] = {}
+        self.tracked = 0
+        self.timed_out = 0
+        self.settle_time = RollingStats()
+
+    async def wait(self, order_id: str, jwt_token: str, deadline: Optional[float] = None) -> Dict:
+        """
+        Poll an order until it reaches a final status or the deadline passes
+
+        Args:
+            order_id (str): The ID of the order to check
+            jwt_token (str): JWT token for authentication
+            deadline (float, optional): Seconds to wait, defaults to ORDER_POLL_DEADLINE
+
+        Returns:
+            Dict: Last order details seen; status stays "pending" on timeout
+        """
+        started_at = time.monotonic()
+        give_up_at = started_at + (deadline if deadline is not None else self.deadline)
+        delay = self.initial_delay
+        details = {"status": "pending", "error": ""}
+
+        while True:
+            try:
+                details = await self.checker.afetch_order_details(order_id, jwt_token)
+                if details.get("status") in FINAL_ORDER_STATUSES:
+                    self.settle_time.add(time.monotonic() - started_at)
+                    return details
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # ValueError: a body that is not JSON; the order may still settle, keep polling
+                details = {**details, "error": f"Failed to get order status: {str(e)}"}
+
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                self.timed_out += 1
+                return details
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.max_delay)
+
+    def track(
+        self,
+        order_id: str,
+        jwt_token: str,
+        message_id: str,
+        action: str,
+        format_result: Callable[[Dict], str],
+    ) -> None:
+        """
+        Follow an order in the background and push its final status to the thread
+
+        Args:
+            order_id (str): The ID of the order to follow
+            jwt_token (str): JWT token for authentication
+            message_id (str): Message whose thread receives the result
+            action (str): Tool that placed the order, sent as the webhook action
+            format_result (Callable[[Dict], str]): Formats the details of a successful order
+        """
+        self.tracked += 1
+        self._answer_sent.setdefault(message_id, asyncio.Event())
+        task = asyncio.create_task(
+            self._follow(order_id, jwt_token, message_id, action, format_result),
+            name=f"order-tracker-{order_id}",
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def answer_sent(self, message_id: str) -> None:
+        """
+        Mark the agent's answer to a message as delivered
+
+        Order results for the message are held until then so they reach the thread
+        after the "order submitted" answer.
+        """
+        event = self._answer_sent.pop(message_id, None)
+        if event is not None:
+            event.set()
+
+    async def _follow(self, order_id, jwt_token, message_id, action, format_result) -> None:
+        # every tracked order ends with one message, even when following it failed
+        try:
+            details = await self.wait(order_id, jwt_token)
+            answer = format_order_result(order_id, details, format_result)
+        except Exception as e:
+            print(f"Error tracking order {order_id}: {str(e)}")
+            answer = format_order_failure(order_id, {"status": "error", "error": f"Failed to follow the order: {str(e)}"})
+
+        event = self._answer_sent.get(message_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=self.deadline)
+            except asyncio.TimeoutError:
+                self._answer_sent.pop(message_id, None)
+
+        try:
+            response = await send_agent_webhook({
+                "answer": answer,
+                "messageId": message_id,
+                "action": action
+            })
+            print(f"Order {order_id} webhook: Status={response.status_code}, Body={response.text}")
+        except Exception as e:
+            print(f"Error sending the result of order {order_id}: {str(e)}")
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Wait for tracked orders, then cancel the ones still running
+
+        Args:
+            timeout (float): Seconds to wait before cancelling
+        """
+        if not self._tasks:
+            return
+        tasks = list(self._tasks)
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Order tracker stopped with {len(pending)} orders still pending")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def metrics(self) -> Dict:
+        """Returns tracked/active/timed out counts and time to settle"""
+        return {
+            "tracked": self.tracked,
+            "active": len(self._tasks),
+            "timed_out": self.timed_out,
+            "settle_time_seconds": self.settle_time.summary(),
+        }
+
+
+def format_order_failure(order_id: str, details: Dict) -> str:
+    """
+    Format an order that did not succeed before the deadline
+    Args:
+        order_id: The ID of the order
+        details: Last order details seen
+    Returns:
+        str: Message for the user
+    """
+    status = details.get("status") or "pending"
+    if status not in FINAL_ORDER_STATUSES:
+        return (
+            f"⏳ Order `{order_id}` is still {status}.\n"
+            f"Check your positions in a moment to see if it settled."
+        )
+    reason = details.get("error") or "Unknown error"
+    return f"❌ Order `{order_id}` {status}\n📊 Reason: {reason}"
+
+
+def format_order_result(order_id: str, details: Dict, format_result: Callable[[Dict], str]) -> str:
+    """
+    Format the final details of an order
+    Args:
+        order_id: The ID of the order
+        details: Last order details seen
+        format_result: Formats the details of a successful order
+    Returns:
+        str: Message for the user; a plain success message when the details
+            of a successful order cannot be formatted (e.g. missing amounts)
+    """
+    if details.get("status") != "success":
+        return format_order_failure(order_id, details)
+    try:
+        return format_result(details)
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Could not format order {order_id}: {str(e)}")
+        return (
+            f"✅ Order `{order_id}` succeeded.\n"
+            f"Check your positions to see the amounts."
+        )
+
+
+def format_order_submitted(order_id: str, side: str, wallet_address: str) -> str:
+    """
+    Format the answer given while an order is still being followed
+    Args:
+        order_id: The ID of the order
+        side: "Purchase" or "Sale"
+        wallet_address: Wallet the order was placed from
+    Returns:
+        str: Message for the user
+    """
+    return (
+        f"**Token {side} Submitted**\n"
+        f"🧾 Order: `{order_id}`\n"
+        f"👛 `{wallet_address}`\n"
+        f"⏳ You will get the result here once it settles."
+    )
+
+
+order_tracker = OrderTracker(
+    OrderChecker(),
+    initial_delay=settings.order_tracker.initial_delay,
+    max_delay=settings.order_tracker.max_delay,
+    deadline=settings.order_tracker.deadline,
+)
+
 # Example usage
 # if __name__ == "__main__":
 #     checker = OrderChecker()
@@ -6,12 +6,146 @@ sys.path.insert(0, str(project_root))
 
 import requests
 from config import settings
+from commons.http_client import http_client, async_http_client
 
 import json
 import os
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
 from llama_index.core.llms import ChatMessage, MessageRole
 
+# Query parameter asking the backend for messages created since a timestamp, included or not
+SINCE_PARAM = "since"
+
+
+@dataclass
+class _CachedThread:
+    messages: List[dict] = field(default_factory=list)
+    fetched_at: float = 0.0
+
+
+class ThreadHistoryCache:
+    """
+    Recent messages of agent backend threads, kept per worker process.
+
+    After a thread has been fetched once, later calls only ask the backend for
+    messages created since the newest cached one and merge them into a bounded
+    tail; returned messages already cached replace their entry when their
+    updatedAt changed (e.g. the answer of the newest message was filled in).
+    Threads are evicted least recently used first. A thread is fetched in full
+    again when its entry is older than max_age, which also picks up edits to
+    older messages, or when the new messages do not connect to the cached tail.
+    """
+
+    def __init__(self, max_threads: int, max_messages: int, max_age: float):
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self._threads: "OrderedDict[str, _CachedThread]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+
+    def since(self, thread_id: str) -> Optional[int]:
+        """
+        Get the timestamp to fetch new messages from
+
+        Args:
+            thread_id (str): Thread ID
+
+        Returns:
+            Optional[int]: createdAt of the newest cached message, or None when the
+                thread needs a full fetch
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None or not entry.messages:
+                return None
+            if time.monotonic() - entry.fetched_at > self.max_age:
+                return None
+            self._threads.move_to_end(thread_id)
+            return entry.messages[-1]['createdAt']
+
+    def store(self, thread_id: str, messages: List[dict]) -> List[dict]:
+        """
+        Replace a thread with the result of a full fetch
+
+        Args:
+            thread_id (str): Thread ID
+            messages (List[dict]): Every message of the thread sorted by createdAt
+
+        Returns:
+            List[dict]: The cached tail
+        """
+        with self._lock:
+            self.full_fetches += 1
+            entry = _CachedThread(messages=messages[-self.max_messages:], fetched_at=time.monotonic())
+            self._threads[thread_id] = entry
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+            return list(entry.messages)
+
+    def merge(self, thread_id: str, since: int, messages: List[dict]) -> Optional[List[dict]]:
+        """
+        Add messages fetched since a timestamp to a cached thread
+
+        Args:
+            thread_id (str): Thread ID
+            since (int): Timestamp the messages were fetched from
+            messages (List[dict]): Messages returned by the backend sorted by createdAt
+
+        Returns:
+            Optional[List[dict]]: The cached tail, or None when the messages do not
+                connect to it and the thread has to be fetched in full
+        """
+        if messages and messages[0]['createdAt'] < since:
+            # the backend ignored the since filter and returned the whole thread
+            return self.store(thread_id, messages)
+
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                return None
+            cached = list(entry.messages)
+            positions = {_message_key(message): i for i, message in enumerate(cached)}
+            new_messages = []
+            for message in messages:
+                position = positions.get(_message_key(message))
+                if position is None:
+                    new_messages.append(message)
+                elif message.get('updatedAt') != cached[position].get('updatedAt'):
+                    cached[position] = message
+            if new_messages and len(new_messages) == len(messages) and cached[-1]['createdAt'] != since:
+                # an inclusive filter returns the newest cached message again and an
+                # exclusive one starts right after it; messages that neither include
+                # it nor follow the timestamp it was fetched from may leave a gap
+                return None
+            self.incremental_fetches += 1
+            entry.messages = (cached + new_messages)[-self.max_messages:]
+            self._threads.move_to_end(thread_id)
+            return list(entry.messages)
+
+    def invalidate(self, thread_id: str) -> None:
+        """Drop a thread so the next fetch is a full one"""
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+
+def _message_key(message: dict):
+    return message.get('id') or (message['createdAt'], message.get('role'), message.get('content'))
+
+
+thread_history_cache = ThreadHistoryCache(
+    max_threads=settings.thread_cache.max_threads,
+    max_messages=settings.thread_cache.max_messages,
+    max_age=settings.thread_cache.max_age,
+)
+
+
 def fetch_thread_messages(thread_id: str) -> dict:
     """
     Get chat histories for a specific thread
@@ -20,7 +154,11 @@ def fetch_thread_messages(thread_id: str) -> dict:
         thread_id (str): Thread ID
         
     Returns:
-        dict: Chat histories sorted by creation time
+        dict: Most recent chat histories sorted by creation time, at most
+            THREAD_CACHE_MAX_MESSAGES of them
+
+    Only messages newer than the ones already cached for the thread are downloaded,
+    see ThreadHistoryCache.
 
     The API returns a paginated list of chat messages with the following structure:
     {
@@ -42,21 +180,68 @@ def fetch_thread_messages(thread_id: str) -> dict:
     }
     """
     try:
-        url = f"{settings.agent.api_url}/api/v1/backend/thread/{thread_id}/messages"
-        headers = {"X-API-KEY": settings.agent.api_key}
-        response = requests.get(url, headers=headers)
-        data = response.json()
+        url, headers = _thread_messages_request(thread_id)
+        since = thread_history_cache.since(thread_id)
+        if since is not None:
+            response = http_client.get(url, headers=headers, params={SINCE_PARAM: since})
+            messages = thread_history_cache.merge(thread_id, since, _sort_thread_messages(response))
+            if messages is not None:
+                return _drop_pending_question(messages)
+
+        response = http_client.get(url, headers=headers)
+        messages = thread_history_cache.store(thread_id, _sort_thread_messages(response))
+        return _drop_pending_question(messages)
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"API connection error: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Error getting chat histories: {str(e)}")
+
+
+async def afetch_thread_messages(thread_id: str) -> dict:
+    """
+    Async version of fetch_thread_messages
+    
+    Args:
+        thread_id (str): Thread ID
         
-        if data:
-            data = sorted(data, key=lambda x: x['createdAt'])
-            if data[-1]['role'] == 'user':
-                data.pop()
-            
-        return data
+    Returns:
+        dict: Chat histories sorted by creation time
+    """
+    try:
+        url, headers = _thread_messages_request(thread_id)
+        since = thread_history_cache.since(thread_id)
+        if since is not None:
+            response = await async_http_client.get(url, headers=headers, params={SINCE_PARAM: since})
+            messages = thread_history_cache.merge(thread_id, since, _sort_thread_messages(response))
+            if messages is not None:
+                return _drop_pending_question(messages)
+
+        response = await async_http_client.get(url, headers=headers)
+        messages = thread_history_cache.store(thread_id, _sort_thread_messages(response))
+        return _drop_pending_question(messages)
     except requests.exceptions.RequestException as e:
         raise Exception(f"API connection error: {str(e)}")
     except Exception as e:
         raise Exception(f"Error getting chat histories: {str(e)}")
+
+
+def _thread_messages_request(thread_id: str):
+    url = f"{settings.agent.api_url}/api/v1/backend/thread/{thread_id}/messages"
+    headers = {"X-API-KEY": settings.agent.api_key}
+    return url, headers
+
+
+def _sort_thread_messages(response) -> List[dict]:
+    data = response.json()
+    return sorted(data, key=lambda x: x['createdAt']) if data else []
+
+
+def _drop_pending_question(data: List[dict]) -> List[dict]:
+    # the question being answered is already stored in the thread; it is sent as the query
+    if data and data[-1]['role'] == 'user':
+        data.pop()
+        
+    return data
     
     
 # def convert_dict_to_chat_messages(
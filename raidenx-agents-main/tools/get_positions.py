@@ -5,9 +5,9 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import requests
-from auth.jwt_generator import get_jwt
-from tools.get_wallets import get_wallet_balance
+from tools.get_wallets import get_wallet_balance, aget_wallet_balance
 from config import settings
+from commons.http_client import http_client, async_http_client
 
 def get_positions_by_token(token_address: str, jwt_token: str) -> str:
     """
@@ -21,44 +21,71 @@ def get_positions_by_token(token_address: str, jwt_token: str) -> str:
         str: Markdown formatted output containing token positions
     """
     try:
-        url = f"{settings.raiden.api_insight_url}/sui/api/v1/my/positions/{token_address}"
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {jwt_token}"
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        def format_number(num: float) -> str:
-            if num < 1000:
-                return f"${num:.2f}"
-            elif num < 1000000:
-                return f"${num/1000:.1f}K"
-            else:
-                return f"${num:,.0f}"
-        
-        if not data.get('docs'):
-            return "### No positions found"
+        url, headers = _token_positions_request(token_address, jwt_token)
+        response = http_client.get(url, headers=headers)
+        return _format_token_positions(response)
             
-        markdown_output = "### Your Positions\n\n"
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"API connection error: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unknown error: {str(e)}")
+
+async def aget_positions_by_token(token_address: str, jwt_token: str) -> str:
+    """
+    Async version of get_positions_by_token
+    
+    Args:
+        token_address (str): Token contract address
+        jwt_token (str): Authorization token
         
-        for pos in data['docs']:
-            balance = float(pos['balance'])
-            markdown_output += (
-                f"### {pos['token']['symbol']}\n"
-                f"💰 Balance: `{balance:.4f}`\n"
-            )
-            
-        return markdown_output
+    Returns:
+        str: Markdown formatted output containing token positions
+    """
+    try:
+        url, headers = _token_positions_request(token_address, jwt_token)
+        response = await async_http_client.get(url, headers=headers)
+        return _format_token_positions(response)
             
     except requests.exceptions.RequestException as e:
         raise Exception(f"API connection error: {str(e)}")
     except Exception as e:
         raise Exception(f"Unknown error: {str(e)}")
 
+def _token_positions_request(token_address: str, jwt_token: str):
+    url = f"{settings.raiden.api_insight_url}/sui/api/v1/my/positions/{token_address}"
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {jwt_token}"
+    }
+    return url, headers
+
+def _format_token_positions(response) -> str:
+    response.raise_for_status()
+    
+    data = response.json()
+    
+    def format_number(num: float) -> str:
+        if num < 1000:
+            return f"${num:.2f}"
+        elif num < 1000000:
+            return f"${num/1000:.1f}K"
+        else:
+            return f"${num:,.0f}"
+    
+    if not data.get('docs'):
+        return "### No positions found"
+        
+    markdown_output = "### Your Positions\n\n"
+    
+    for pos in data['docs']:
+        balance = float(pos['balance'])
+        markdown_output += (
+            f"### {pos['token']['symbol']}\n"
+            f"💰 Balance: `{balance:.4f}`\n"
+        )
+        
+    return markdown_output
+
 def get_all_positions(jwt_token: str) -> str:
     """
     Get all positions from user's wallets
@@ -71,45 +98,71 @@ def get_all_positions(jwt_token: str) -> str:
     """
     try:
         wallet_info = get_wallet_balance(jwt_token)
-        
-        if not wallet_info or not wallet_info.get('address'):
-            raise Exception("No wallet found. Please create a wallet first.")
-            
-        wallet_address = wallet_info['address']
-        
-        base_url = f"{settings.raiden.api_insight_url}/sui/api/v1/my/positions"
-        params = {
-            "closed": False,
-            "isHidden": False,
-            "walletAddress": wallet_address
-        }
+        base_url, headers, params = _positions_request(wallet_info, jwt_token)
+        response = http_client.get(base_url, headers=headers, params=params)
+        return _format_all_positions(response)
             
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {jwt_token}"
-        }
-        
-        response = requests.get(base_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if not data.get('docs'):
-            return "**🔍 No positions yet. Start trading now to build your portfolio!**"
-            
-        markdown_output = "**All Positions**\n\n"
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"API connection error: {str(e)}")
+    except Exception as e:
+        raise Exception(str(e))
+
+async def aget_all_positions(jwt_token: str) -> str:
+    """
+    Async version of get_all_positions
+    
+    Args:
+        jwt_token (str): Authorization token
         
-        for pos in data['docs']:
-            balance = float(pos['balance'])
-            token_address = pos['token'].get('address', 'N/A')
-            markdown_output += f"**{pos['token']['symbol']}** `{balance:.4f}` | `{token_address}` |  "
-            
-        return markdown_output
+    Returns:
+        str: Markdown formatted output containing all positions
+    """
+    try:
+        wallet_info = await aget_wallet_balance(jwt_token)
+        base_url, headers, params = _positions_request(wallet_info, jwt_token)
+        response = await async_http_client.get(base_url, headers=headers, params=params)
+        return _format_all_positions(response)
             
     except requests.exceptions.RequestException as e:
         raise Exception(f"API connection error: {str(e)}")
     except Exception as e:
         raise Exception(str(e))
+
+def _positions_request(wallet_info: dict, jwt_token: str):
+    if not wallet_info or not wallet_info.get('address'):
+        raise Exception("No wallet found. Please create a wallet first.")
+        
+    wallet_address = wallet_info['address']
+    
+    base_url = f"{settings.raiden.api_insight_url}/sui/api/v1/my/positions"
+    params = {
+        "closed": False,
+        "isHidden": False,
+        "walletAddress": wallet_address
+    }
+        
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {jwt_token}"
+    }
+    return base_url, headers, params
+
+def _format_all_positions(response) -> str:
+    response.raise_for_status()
+    
+    data = response.json()
+    
+    if not data.get('docs'):
+        return "**🔍 No positions yet. Start trading now to build your portfolio!**"
+        
+    markdown_output = "**All Positions**\n\n"
+    
+    for pos in data['docs']:
+        balance = float(pos['balance'])
+        token_address = pos['token'].get('address', 'N/A')
+        markdown_output += f"**{pos['token']['symbol']}** `{balance:.4f}` | `{token_address}` |  "
+        
+    return markdown_output
     
     
 def get_all_positions_data(jwt_token: str) -> list:
@@ -129,47 +182,53 @@ def get_all_positions_data(jwt_token: str) -> list:
     """
     try:
         wallet_info = get_wallet_balance(jwt_token)
-        
-        # Check if wallet exists
-        if not wallet_info or not wallet_info.get('address'):
-            raise Exception("No wallet found. Please create a wallet first.")
-            
-        wallet_address = wallet_info['address']
-        
-        base_url = f"{settings.raiden.api_insight_url}/sui/api/v1/my/positions"
-        params = {
-            "closed": False,
-            "isHidden": False,
-            "walletAddress": wallet_address
-        }
+        base_url, headers, params = _positions_request(wallet_info, jwt_token)
+        response = http_client.get(base_url, headers=headers, params=params)
+        return _parse_positions_data(response)
             
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {jwt_token}"
-        }
-        
-        response = requests.get(base_url, headers=headers, params=params)
-        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"API connection error: {str(e)}")
+    except Exception as e:
+        raise Exception(str(e))
+
+async def aget_all_positions_data(jwt_token: str) -> list:
+    """
+    Async version of get_all_positions_data
+    
+    Args:
+        jwt_token (str): Authorization token
         
-        data = response.json()
-        if not data.get('docs'):
-            return []
-            
-        return [
-            {
-                'symbol': pos['token']['symbol'],
-                'name': pos['token']['name'],
-                'token_address': pos['token']['address'],
-                'balance': pos['balance'],
-                'wallet_address': pos['walletName']
-            }
-            for pos in data['docs']
-        ]
+    Returns:
+        list: List of positions (symbol, name, token_address, balance, wallet_address)
+    """
+    try:
+        wallet_info = await aget_wallet_balance(jwt_token)
+        base_url, headers, params = _positions_request(wallet_info, jwt_token)
+        response = await async_http_client.get(base_url, headers=headers, params=params)
+        return _parse_positions_data(response)
             
     except requests.exceptions.RequestException as e:
         raise Exception(f"API connection error: {str(e)}")
     except Exception as e:
         raise Exception(str(e))
+
+def _parse_positions_data(response) -> list:
+    response.raise_for_status()
+    
+    data = response.json()
+    if not data.get('docs'):
+        return []
+        
+    return [
+        {
+            'symbol': pos['token']['symbol'],
+            'name': pos['token']['name'],
+            'token_address': pos['token']['address'],
+            'balance': pos['balance'],
+            'wallet_address': pos['walletName']
+        }
+        for pos in data['docs']
+    ]
     
     
 # print(get_all_positions(jwt_token='token'))
\ No newline at end of file
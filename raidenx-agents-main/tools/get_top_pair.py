@@ -7,6 +7,52 @@ sys.path.insert(0, str(project_root))
 import requests
 from typing import Dict, Any, Optional, Tuple, Union
 from config import settings
+from commons.http_client import http_client, async_http_client
+from commons.cache import TTLCache
+
+# Top pair responses carry prices, so they are only reused briefly; the (network,
+# pair_id) of a token practically never changes and is kept much longer.
+top_pair_cache = TTLCache(
+    "top_pair", ttl=settings.market_cache.price_ttl, max_size=settings.market_cache.max_entries
+)
+pair_id_cache = TTLCache(
+    "pair_id", ttl=settings.market_cache.pair_ttl, max_size=settings.market_cache.max_entries
+)
+
+def _is_ok(response) -> bool:
+    return response.status_code == 200
+
+def get_top_pair_response(token_address: str):
+    """
+    Get the top pair response of a token, shared by every user for a few seconds
+    
+    Args:
+        token_address (str): Token address
+        
+    Returns:
+        requests.Response: Upstream response; only 200 responses are cached
+    """
+    return top_pair_cache.get_or_load(
+        token_address,
+        lambda: http_client.get(_top_pair_url(token_address)),
+        cacheable=_is_ok,
+    )
+
+async def aget_top_pair_response(token_address: str):
+    """
+    Async version of get_top_pair_response
+    
+    Args:
+        token_address (str): Token address
+        
+    Returns:
+        UpstreamResponse: Upstream response; only 200 responses are cached
+    """
+    return await top_pair_cache.aget_or_load(
+        token_address,
+        lambda: async_http_client.get(_top_pair_url(token_address)),
+        cacheable=_is_ok,
+    )
 
 def fetch_top_pair(token_address: str):
     """
@@ -19,37 +65,66 @@ def fetch_top_pair(token_address: str):
         tuple: (network, pair_id) hoặc None nếu có lỗi
     """
     try:
-        url = f"{settings.raiden.api_common_url}/api/v1/sui/tokens/{token_address}/top-pair"
-        
-        response = requests.get(url)
+        return pair_id_cache.get_or_load(
+            token_address,
+            lambda: _parse_top_pair(get_top_pair_response(token_address), token_address),
+            cacheable=_is_found,
+        )
         
-        if response.status_code == 404:
-            print(f"Token not found: {token_address}")
-            return None
-        elif response.status_code == 502:
-            print(f"Invalid token address: {token_address}")
-            return None
-            
-        response.raise_for_status()
-        
-        data = response.json()
-        if not data:
-            print(f"No data returned for token {token_address}")
-            return None
-        
-        network = data.get("network")
-        pair_id = data.get("pairId")
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching top pair: {str(e)}")
+        return None
+
+async def afetch_top_pair(token_address: str):
+    """
+    Async version of fetch_top_pair
+    
+    Args:
+        token_address (str): Địa chỉ của token
         
-        if network is None or pair_id is None:
-            print(f"Missing network or pair_id in response: {data}")
-            return None
-            
-        return (network, pair_id)
+    Returns:
+        tuple: (network, pair_id) hoặc None nếu có lỗi
+    """
+    async def load():
+        return _parse_top_pair(await aget_top_pair_response(token_address), token_address)
+
+    try:
+        return await pair_id_cache.aget_or_load(token_address, load, cacheable=_is_found)
         
     except requests.exceptions.RequestException as e:
         print(f"Error fetching top pair: {str(e)}")
         return None
 
+def _is_found(result) -> bool:
+    return result is not None
+
+def _top_pair_url(token_address: str) -> str:
+    return f"{settings.raiden.api_common_url}/api/v1/sui/tokens/{token_address}/top-pair"
+
+def _parse_top_pair(response, token_address: str):
+    if response.status_code == 404:
+        print(f"Token not found: {token_address}")
+        return None
+    elif response.status_code == 502:
+        print(f"Invalid token address: {token_address}")
+        return None
+        
+    response.raise_for_status()
+    
+    data = response.json()
+    if not data:
+        print(f"No data returned for token {token_address}")
+        return None
+    
+    network = data.get("network")
+    pair_id = data.get("pairId")
+    
+    if network is None or pair_id is None:
+        print(f"Missing network or pair_id in response: {data}")
+        return None
+        
+    return (network, pair_id)
+
 # Example usage:
 # if __name__ == "__main__":
 #     sample_token = "0x9467f809de80564fa198b2c9a27557bf4ffcf1aa506f28547661b96d8f84a1dc::prez::PREZ"
@@ -4,11 +4,10 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import requests
-from auth.jwt_generator import get_jwt
 from tools.utils import json_to_dict
 import random
 from config import settings
+from commons.http_client import http_client, async_http_client
 
 
 def get_wallet_balance(jwt_token: str = "") -> dict:
@@ -29,13 +28,36 @@ def get_wallet_balance(jwt_token: str = "") -> dict:
         Exception: If wallet data cannot be retrieved
     """
     
+    url, headers = _wallet_request(jwt_token)
+    response = http_client.get(url, headers=headers)
+    return _parse_wallet_response(response)
+
+
+async def aget_wallet_balance(jwt_token: str = "") -> dict:
+    """
+    Async version of get_wallet_balance
+
+    Args:
+        jwt_token (str): Authorization token
+        
+    Returns:
+        dict: Wallet information (address, balance, network)
+    """
+    url, headers = _wallet_request(jwt_token)
+    response = await async_http_client.get(url, headers=headers)
+    return _parse_wallet_response(response)
+
+
+def _wallet_request(jwt_token: str):
     url = f"{settings.raiden.api_wallets_url}/api/v1/sui/user-wallets"
     headers = {
         "accept": "application/json",
         "Authorization": f"Bearer {jwt_token}"
     }
-    response = requests.get(url, headers=headers)
-    
+    return url, headers
+
+
+def _parse_wallet_response(response) -> dict:
     wallet_data = {}
     
     if response.status_code == 200:
@@ -47,4 +69,3 @@ def get_wallet_balance(jwt_token: str = "") -> dict:
 
     else:
         raise Exception(f"Error fetching wallets: {response.status_code} - {response.text}")
-    
\ No newline at end of file
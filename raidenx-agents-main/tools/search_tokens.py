@@ -4,9 +4,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import requests
 from config import settings
-from tools.get_positions import get_all_positions_data
+from commons.http_client import http_client, async_http_client
+from tools.get_positions import get_all_positions_data, aget_all_positions_data
 
 
 
@@ -37,6 +37,34 @@ def search_token(query: str, jwt_token: str) -> dict:
         positions = []
         print(f"Error getting positions: {str(e)}")
     
+    url, headers, params = _search_request(query)
+    response = http_client.get(url, headers=headers, params=params)
+    return _parse_search_response(response, query, positions)
+
+
+async def asearch_token(query: str, jwt_token: str) -> dict:
+    """
+    Async version of search_token
+
+    Args:
+        query (str): Search keyword (e.g., 'BTC', 'ETH')
+        
+    Returns:
+        dict: Exact symbol match, or dictionary with the list of candidate tokens
+    """
+    
+    try:
+        positions = await aget_all_positions_data(jwt_token)     
+    except Exception as e:
+        positions = []
+        print(f"Error getting positions: {str(e)}")
+    
+    url, headers, params = _search_request(query)
+    response = await async_http_client.get(url, headers=headers, params=params)
+    return _parse_search_response(response, query, positions)
+
+
+def _search_request(query: str):
     url = f"{settings.raiden.api_common_url}/api/v1/search"
     headers = {
         "accept": "application/json"
@@ -47,8 +75,10 @@ def search_token(query: str, jwt_token: str) -> dict:
         "page": 1,
         "limit": 5
     }
-    response = requests.get(url, headers=headers, params=params)
-    
+    return url, headers, params
+
+
+def _parse_search_response(response, query: str, positions: list) -> dict:
     if response.status_code == 200:
         data = response.json()
         results = []
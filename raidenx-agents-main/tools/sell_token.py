@@ -5,16 +5,25 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import requests
-import asyncio
-from auth.jwt_generator import get_jwt
-from commons.send_telegram import TelegramMessenger
 from tools.utils import json_to_dict
-from tools.get_top_pair import fetch_top_pair
-from tools.check_order import OrderChecker
+from tools.get_top_pair import fetch_top_pair, afetch_top_pair
+from tools.check_order import OrderChecker, order_tracker, format_order_submitted, format_order_result
 from config import settings
+from commons.http_client import http_client, async_http_client
+from utils.request_context import get_request_context
 
 checker = OrderChecker()
 
+INSUFFICIENT_LIQUIDITY_MESSAGE = (
+    "❌ Transaction Failed\n\n"
+    "📊 Reason: Insufficient liquidity in this trading pair\n"
+    "💡 Solutions:\n"
+    "• Please retry once liquidity is added\n"
+    "• Or reduce the amount of tokens to sell\n"
+    "• Or try trading with a different token"
+)
+
+
 def sell_token(token_address: str, percent: float, wallet_address: str, jwt_token: str) -> str:
     """
     Sell a percentage of a token from a user's wallet
@@ -49,38 +58,13 @@ def sell_token(token_address: str, percent: float, wallet_address: str, jwt_toke
         
         network, pair_id = result
         
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {jwt_token}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "orderSetting": {
-                "priorityFee": "0",
-                "slippage": 40
-            },
-            "pairId": pair_id,
-            "tokenAddress": token_address,
-            "sellPercent": float(percent),
-            "wallets": [wallet_address]
-        }
-        
-        response = requests.post(
-            f"{settings.raiden.api_orders_url}/api/v1/sui/orders/quick-sell",
-            headers=headers,
-            json=payload
-        )
+        url, headers, payload = _quick_sell_request(token_address, percent, wallet_address, jwt_token, pair_id)
+        response = http_client.post(url, headers=headers, json=payload)
         response.raise_for_status()
         
         result = response.json()
         if not result:
-            return "❌ Transaction Failed\n\n" \
-                   "📊 Reason: Insufficient liquidity in this trading pair\n" \
-                   "💡 Solutions:\n" \
-                   "• Please retry once liquidity is added\n" \
-                   "• Or reduce the amount of tokens to sell\n" \
-                   "• Or try trading with a different token"
+            return INSUFFICIENT_LIQUIDITY_MESSAGE
             
         order_id = result[0]["order"]["id"]
         
@@ -88,23 +72,105 @@ def sell_token(token_address: str, percent: float, wallet_address: str, jwt_toke
         
         print(f"status-sell-token: {status}")
         
-        explorer_url = f"https://suivision.xyz/txblock/{status['hash']}"
+        return _format_sale(status, wallet_address)
         
-        message = (
-            f"**Token Sale Success**\n"
-            f"💰 Sold: `{float(status['amountIn']):.4f} tokens`\n"
-            f"📈 Received: `{float(status['amountOut']):.6f} SUI`\n"
-            f"📊 Percentage: `{float(status['sellPercent']):.1f}%`\n"
-            f"🔗 [View Transaction]({explorer_url})\n"
-            f"👛 `{wallet_address}`"
-        )
+    except requests.exceptions.RequestException as e:
+        return f"Error occurred while making the sale: {str(e)}"
+
+
+async def asell_token(token_address: str, percent: float, wallet_address: str, jwt_token: str) -> str:
+    """
+    Async version of sell_token
+
+    Args:
+        token_address (str): Token contract address
+        percent (float): Percentage of tokens to sell (0-100)
+        wallet_address (str): User's wallet address
+        jwt_token (str): Authorization token
         
-        # messenger = TelegramMessenger()
-        # asyncio.run(messenger.send_message(
-        #     f"🔴 Sell Alert: User {displayName} ({userName}) has sold {percent}% of {token_address} token"
-        # ))
+    Returns:
+        str: "Order submitted" message when the agent run has a message_id (the
+            final status is pushed to the thread later), otherwise the transaction result
+    """
+    try:
+        percent = float(percent)
+        if not (0 <= percent <= 100):
+            return f"Error: Percent must be a percentage between 0 and 100. Received: {percent}"
         
-        return message
+        result = await afetch_top_pair(token_address)
+        if result is None:
+            return f"Failed to fetch top pair information for {token_address}. Please try again later."
+        
+        network, pair_id = result
+        
+        url, headers, payload = _quick_sell_request(token_address, percent, wallet_address, jwt_token, pair_id)
+        response = await async_http_client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        
+        result = response.json()
+        if not result:
+            return INSUFFICIENT_LIQUIDITY_MESSAGE
+            
+        order_id = result[0]["order"]["id"]
+        
+        message_id = get_request_context().message_id
+        if message_id:
+            # the final status is pushed to the thread once the order settles
+            order_tracker.track(
+                order_id,
+                jwt_token,
+                message_id=message_id,
+                action="sell_token",
+                format_result=lambda status: _format_sale(status, wallet_address),
+            )
+            return format_order_submitted(order_id, "Sale", wallet_address)
+        
+        status = await order_tracker.wait(order_id, jwt_token)
+        
+        print(f"status-sell-token: {status}")
+        
+        return format_order_result(order_id, status, lambda status: _format_sale(status, wallet_address))
         
     except requests.exceptions.RequestException as e:
         return f"Error occurred while making the sale: {str(e)}"
+
+
+def _quick_sell_request(token_address: str, percent: float, wallet_address: str, jwt_token: str, pair_id: str):
+    url = f"{settings.raiden.api_orders_url}/api/v1/sui/orders/quick-sell"
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {jwt_token}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "orderSetting": {
+            "priorityFee": "0",
+            "slippage": 40
+        },
+        "pairId": pair_id,
+        "tokenAddress": token_address,
+        "sellPercent": float(percent),
+        "wallets": [wallet_address]
+    }
+    return url, headers, payload
+
+
+def _format_sale(status: dict, wallet_address: str) -> str:
+    explorer_url = f"https://suivision.xyz/txblock/{status['hash']}"
+    
+    message = (
+        f"**Token Sale Success**\n"
+        f"💰 Sold: `{float(status['amountIn']):.4f} tokens`\n"
+        f"📈 Received: `{float(status['amountOut']):.6f} SUI`\n"
+        f"📊 Percentage: `{float(status['sellPercent']):.1f}%`\n"
+        f"🔗 [View Transaction]({explorer_url})\n"
+        f"👛 `{wallet_address}`"
+    )
+    
+    # messenger = TelegramMessenger()
+    # asyncio.run(messenger.send_message(
+    #     f"🔴 Sell Alert: User {displayName} ({userName}) has sold {percent}% of {token_address} token"
+    # ))
+    
+    return message
@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.schema import CBEventType, EventPayload
+
+from utils.request_context import get_request_context
+
+
+def emit_agent_event(event: str, data: Dict[str, Any]) -> None:
+    """
+    Publish an event of the running agent to its stream, if it is being streamed
+
+    Args:
+        event (str): Event name, e.g. "reasoning", "tool_start", "tool_end", "token"
+        data (Dict[str, Any]): JSON serialisable payload
+    """
+    events = get_request_context().events
+    if events is not None:
+        events.put_nowait((event, data))
+
+
+class AgentEventHandler(BaseCallbackHandler):
+    """
+    Turns llama-index tool call events into agent stream events.
+
+    Registered once on the LLM's callback manager, which the ReAct worker shares,
+    so it sees every tool call. Events are only published for runs started with
+    an event queue in their request context (react_chat_stream). Reasoning events
+    come from the worker itself (StreamingReActAgentWorker).
+    """
+
+    def __init__(self):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self._tool_names: Dict[str, str] = {}
+
+    def on_event_start(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        parent_id: str = "",
+        **kwargs: Any,
+    ) -> str:
+        if event_type == CBEventType.FUNCTION_CALL and payload and get_request_context().events is not None:
+            tool_name = payload[EventPayload.TOOL].name
+            self._tool_names[event_id] = tool_name
+            emit_agent_event("tool_start", {
+                "tool": tool_name,
+                "input": payload.get(EventPayload.FUNCTION_CALL, {}),
+            })
+        return event_id
+
+    def on_event_end(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        **kwargs: Any,
+    ) -> None:
+        if event_type == CBEventType.FUNCTION_CALL and payload and get_request_context().events is not None:
+            emit_agent_event("tool_end", {
+                "tool": self._tool_names.pop(event_id, None),
+                "output": payload.get(EventPayload.FUNCTION_OUTPUT, ""),
+            })
+
+    def start_trace(self, trace_id: Optional[str] = None) -> None:
+        pass
+
+    def end_trace(
+        self,
+        trace_id: Optional[str] = None,
+        trace_map: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        pass
+
+
+agent_event_handler = AgentEventHandler()
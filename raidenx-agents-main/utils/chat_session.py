@@ -1,32 +1,52 @@
-import json
-import os
-from typing import List
+from typing import List, Optional
 
 from llama_index.core.llms import ChatMessage, MessageRole
 
-HISTORY_FILE = "chat_history.json"
+from utils.chat_store import chat_store
 
 
 def load_chat_history():
-    try:
-        if os.path.exists(HISTORY_FILE) and os.path.getsize(HISTORY_FILE) > 0:
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-                json.dump({}, f)
-            return {}
-    except json.JSONDecodeError:
-        print(f"Lỗi khi đọc file {HISTORY_FILE}. Tạo file mới.")
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f)
-        return {}
+    """
+    Load the history of every thread.
+
+    Reads the whole store; prefer get_recent_chat_messages for a single thread.
+    """
+    return chat_store.load_all()
 
 
 def save_chat_history(history):
-    """Lưu lịch sử chat vào file JSON"""
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    """
+    Save chat history, replacing the stored messages of each thread in history.
+
+    Prefer append_chat_messages, which only writes the new messages.
+    """
+    for chat_id, messages in history.items():
+        chat_store.replace(chat_id, messages)
+
+
+def get_recent_chat_messages(chat_id: str, limit: Optional[int] = None) -> List[dict]:
+    """
+    Get the most recent stored messages of a thread, oldest first
+
+    Args:
+        chat_id (str): Thread or Telegram chat ID
+        limit (int, optional): Number of messages, defaults to the retention limit
+
+    Returns:
+        List[dict]: Messages with "role", "content" and "time" keys
+    """
+    return chat_store.tail(chat_id, limit)
+
+
+def append_chat_messages(chat_id: str, messages: List[dict]) -> None:
+    """
+    Append messages to a thread, keeping only the most recent ones
+
+    Args:
+        chat_id (str): Thread or Telegram chat ID
+        messages (List[dict]): Messages with "role", "content" and "time" keys
+    """
+    chat_store.append(chat_id, messages)
 
 
 def convert_dict_to_chat_messages(
@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_chat_id ON chat_messages (chat_id, id);
+CREATE TABLE IF NOT EXISTS chat_store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+LEGACY_JSON_MIGRATED = "legacy_json_migrated"
+
+
+class ChatHistoryStore:
+    """
+    Per-thread chat history kept in SQLite in WAL mode.
+
+    Messages are rows indexed by (chat_id, id), so appending to a thread and reading
+    its tail cost the same whatever the number of threads. WAL lets the uvicorn
+    workers and the Telegram bot read while another process writes, and each append
+    is its own transaction, so concurrent writers no longer overwrite each other.
+    Only the last max_messages messages of a thread are kept.
+    """
+
+    def __init__(self, db_path: str, max_messages: int = 20, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path
+        self.max_messages = max_messages
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized_pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections must not cross threads or forks, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized_pid == os.getpid():
+                return
+            conn.executescript(SCHEMA)
+            self._migrate_legacy_json(conn)
+            self._initialized_pid = os.getpid()
+
+    def _migrate_legacy_json(self, conn: sqlite3.Connection) -> None:
+        """Import chat_history.json once, then rename it so it is not read again"""
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute(
+                "SELECT 1 FROM chat_store_meta WHERE key = ?", (LEGACY_JSON_MIGRATED,)
+            ).fetchone()
+            if not done:
+                history = {}
+                if os.path.getsize(self.legacy_json_path) > 0:
+                    try:
+                        with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                            history = json.load(f)
+                    except json.JSONDecodeError:
+                        print(f"Could not parse {self.legacy_json_path}, skipping migration")
+                for chat_id, messages in history.items():
+                    self._insert(conn, chat_id, messages[-self.max_messages:])
+                conn.execute(
+                    "INSERT INTO chat_store_meta (key, value) VALUES (?, ?)",
+                    (LEGACY_JSON_MIGRATED, self.legacy_json_path),
+                )
+                print(f"Migrated {len(history)} threads from {self.legacy_json_path}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        try:
+            os.replace(self.legacy_json_path, f"{self.legacy_json_path}.migrated")
+        except OSError as e:
+            print(f"Could not rename {self.legacy_json_path}: {str(e)}")
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, chat_id: str, messages: Iterable[dict]) -> None:
+        conn.executemany(
+            "INSERT INTO chat_messages (chat_id, message) VALUES (?, ?)",
+            [(chat_id, json.dumps(message, ensure_ascii=False)) for message in messages],
+        )
+
+    def _trim(self, conn: sqlite3.Connection, chat_id: str) -> None:
+        conn.execute(
+            """
+            DELETE FROM chat_messages
+            WHERE chat_id = ? AND id <= (
+                SELECT id FROM chat_messages WHERE chat_id = ?
+                ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (chat_id, chat_id, self.max_messages),
+        )
+
+    def append(self, chat_id: str, messages: List[dict]) -> None:
+        """
+        Append messages to a thread and drop the ones beyond the retention limit
+
+        Args:
+            chat_id (str): Thread or Telegram chat ID
+            messages (List[dict]): Messages with at least "role" and "content"
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(conn, chat_id, messages)
+            self._trim(conn, chat_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def tail(self, chat_id: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Get the most recent messages of a thread, oldest first
+
+        Args:
+            chat_id (str): Thread or Telegram chat ID
+            limit (int, optional): Number of messages, defaults to the retention limit
+
+        Returns:
+            List[dict]: Stored messages
+        """
+        rows = self._connect().execute(
+            "SELECT message FROM chat_messages WHERE chat_id = ? ORDER BY id DESC LIMIT ?",
+            (chat_id, limit or self.max_messages),
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def replace(self, chat_id: str, messages: List[dict]) -> None:
+        """
+        Replace all stored messages of a thread
+
+        Args:
+            chat_id (str): Thread or Telegram chat ID
+            messages (List[dict]): New messages; only the last max_messages are kept
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM chat_messages WHERE chat_id = ?", (chat_id,))
+            self._insert(conn, chat_id, messages[-self.max_messages:])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load_all(self) -> Dict[str, List[dict]]:
+        """Returns every thread with its messages, like the old chat_history.json"""
+        history: Dict[str, List[dict]] = {}
+        rows = self._connect().execute(
+            "SELECT chat_id, message FROM chat_messages ORDER BY chat_id, id"
+        )
+        for chat_id, message in rows:
+            history.setdefault(chat_id, []).append(json.loads(message))
+        return history
+
+
+chat_store = ChatHistoryStore(
+    db_path=settings.chat_history.db_path,
+    max_messages=settings.chat_history.max_messages,
+    legacy_json_path=settings.chat_history.legacy_json_path,
+)
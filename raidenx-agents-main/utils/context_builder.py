@@ -0,0 +1,178 @@
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.utils import get_tokenizer
+
+from commons.stats import RollingStats
+from config import settings
+from utils.chat_session import convert_dict_to_chat_messages
+from utils.request_context import get_request_context
+
+TRUNCATED = " … [truncated]"
+
+# Gemini counts tokens server side only; Google documents about 4 characters per token
+_CHARS_PER_TOKEN = {"gemini": 4.0}
+
+
+def provider_of(llm: Any) -> str:
+    """
+    Provider of an LLM, from its model name
+
+    Args:
+        llm: LLM instance, possibly wrapped
+
+    Returns:
+        str: "gemini", "anthropic", "deepseek" or "default"
+    """
+    model_name = (getattr(getattr(llm, "metadata", None), "model_name", None) or "").lower()
+    for provider, marker in (("gemini", "gemini"), ("anthropic", "claude"), ("deepseek", "deepseek")):
+        if marker in model_name:
+            return provider
+    return "default"
+
+
+@lru_cache(maxsize=1024)
+def count_tokens(text: str, provider: str = "default") -> int:
+    """
+    Count the tokens of a text for a provider
+
+    Providers without a local tokenizer are estimated from the length of the text;
+    the others use the cl100k tokenizer shipped with llama-index.
+
+    Args:
+        text (str): Text to count
+        provider (str): Provider name, see provider_of
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    chars_per_token = _CHARS_PER_TOKEN.get(provider)
+    if chars_per_token is not None:
+        return int(len(text) / chars_per_token) + 1
+    return len(get_tokenizer()(text))
+
+
+def count_message_tokens(messages: Sequence[ChatMessage], provider: str = "default") -> int:
+    """Tokens of a prompt: message contents plus a few per message for the role"""
+    return sum(count_tokens(message.content or "", provider) + 4 for message in messages)
+
+
+def truncate(text: str, max_tokens: int, provider: str = "default") -> str:
+    """
+    Cut a text to about max_tokens tokens
+
+    Args:
+        text (str): Text to cut
+        max_tokens (int): Token limit
+        provider (str): Provider name, see provider_of
+
+    Returns:
+        str: The text unchanged when it fits, else its beginning followed by a truncation mark
+    """
+    tokens = count_tokens(text, provider)
+    if tokens <= max_tokens:
+        return text
+    keep = max(0, int(len(text) * max_tokens / tokens) - len(TRUNCATED))
+    return text[:keep].rstrip() + TRUNCATED
+
+
+class ContextMetrics:
+    """Sizes of the chat histories built and of the prompts sent to the LLM."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.history_tokens = RollingStats()
+        self.prompt_tokens = RollingStats()
+        self.truncated = 0
+        self.dropped = 0
+
+    def record_history(self, tokens: int, truncated: int, dropped: int) -> None:
+        self.history_tokens.add(tokens)
+        with self._lock:
+            self.truncated += truncated
+            self.dropped += dropped
+
+    def record_prompt(self, messages: Sequence[ChatMessage], llm: Any) -> int:
+        """
+        Record the size of a prompt sent to the LLM, for metrics and for the current run
+
+        Returns:
+            int: Prompt tokens
+        """
+        tokens = count_message_tokens(messages, provider_of(llm))
+        self.prompt_tokens.add(tokens)
+        get_request_context().prompt_tokens.append(tokens)
+        return tokens
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns truncation counters and token counts of histories and prompts"""
+        with self._lock:
+            truncated, dropped = self.truncated, self.dropped
+        return {
+            "max_tokens": settings.context.max_tokens,
+            "truncated_messages": truncated,
+            "dropped_messages": dropped,
+            "history_tokens": self.history_tokens.summary(),
+            "prompt_tokens": self.prompt_tokens.summary(),
+        }
+
+
+context_metrics = ContextMetrics()
+
+
+def build_chat_history(
+    messages: List[dict],
+    llm: Any = None,
+    max_tokens: Optional[int] = None,
+) -> List[ChatMessage]:
+    """
+    Convert a thread's stored messages into a chat history that fits a token budget
+
+    Works on the most recent CHAT_CONTEXT_MAX_MESSAGES messages. Any message longer
+    than CHAT_CONTEXT_MAX_MESSAGE_TOKENS is cut first (e.g. a pasted table). While the
+    history is over budget, earlier assistant answers longer than
+    CHAT_CONTEXT_OLD_OUTPUT_TOKENS (mostly tool output such as positions or
+    trending tables) are cut, oldest first, then the oldest turns are dropped.
+    The latest message is always kept.
+
+    Args:
+        messages (List[dict]): Stored messages with "role" and "content" keys, oldest first
+        llm: LLM the history is sent to, selects how tokens are counted
+        max_tokens (int, optional): Budget, defaults to CHAT_CONTEXT_MAX_TOKENS
+
+    Returns:
+        List[ChatMessage]: Chat history for the agent
+    """
+    config = settings.context
+    budget = config.max_tokens if max_tokens is None else max_tokens
+    provider = provider_of(llm)
+    history = [dict(message) for message in (messages or [])[-config.max_messages:]]
+    truncated = dropped = 0
+
+    for message in history:
+        content = truncate(message["content"] or "", config.max_message_tokens, provider)
+        if content != message["content"]:
+            message["content"] = content
+            truncated += 1
+    sizes = [count_tokens(message["content"] or "", provider) for message in history]
+
+    for index, message in enumerate(history[:-1]):
+        if sum(sizes) <= budget:
+            break
+        if message["role"].lower() == MessageRole.ASSISTANT and sizes[index] > config.old_output_tokens:
+            message["content"] = truncate(message["content"], config.old_output_tokens, provider)
+            sizes[index] = count_tokens(message["content"], provider)
+            truncated += 1
+
+    while len(history) > 1 and sum(sizes) > budget:
+        # drop a whole turn, so the history does not start with an answer
+        drop = 2 if len(history) > 2 and history[1]["role"].lower() == MessageRole.ASSISTANT else 1
+        del history[:drop], sizes[:drop]
+        dropped += drop
+
+    context_metrics.record_history(sum(sizes), truncated, dropped)
+    return convert_dict_to_chat_messages(history)
@@ -1,99 +1,326 @@
 """ReAct output parser."""
 
+import json
 import re
-from typing import Tuple
-import dirtyjson as json
+from typing import List, Optional, Tuple
+
+import dirtyjson
 
 from llama_index.core.agent.react.types import (
     ActionReasoningStep,
     BaseReasoningStep,
     ResponseReasoningStep,
 )
-from llama_index.core.output_parsers.utils import extract_json_str
 from llama_index.core.types import BaseOutputParser
 
+# All patterns are compiled once and none of them backtrack: markers are found
+# in one scan of the output, the Action Input object is delimited by a brace
+# scanner, so parsing stays linear however long or malformed the output is.
+_FENCE = re.compile(r"`{3,}")
+_MARKER = re.compile(r"(Thought|Action Input|Action|Answer):")
+_JSON_TOKEN = re.compile(r'[{}"\\]')
+_SINGLE_QUOTE = re.compile(r"(?<!\w)\'|\'(?!\w)")
+_KEY_VALUE = re.compile(r'"(\w+)":\s*"([^"]*)"')
+_ACTION_NONE = re.compile(r"\s*None")
+
+IMPLICIT_THOUGHT = "(Implicit) I can answer without any more tools!"
+ACTION_MARKER = "Action:"
+ACTION_INPUT_MARKER = "Action Input:"
+
 
-def extract_tool_use(input_text: str) -> Tuple[str, str, str]:
-    """Extract thought, action and action input from the input text."""
-    pattern = (
-        r"Thought:\s*(.*?)[\n\r]+\s*Action:\s*([^\n\r]+)[\n\r]+\s*Action Input:\s*(\{.*\}|\{\})"
+def _invalid_tool_use(output: str) -> ValueError:
+    return ValueError(
+        "INVALID_FORMAT: Output must follow the format:\nThought: [your reasoning]\nAction: [action name]\nAction Input: [parameters as json]" +
+        f"\nReceived output: {output}"
     )
 
-    match = re.search(pattern, input_text, re.DOTALL)
-    if not match:
-        # Try alternative pattern for empty action input
-        alt_pattern = r"Thought:\s*(.*?)[\n\r]+\s*Action:\s*([^\n\r]+)[\n\r]+\s*Action Input:\s*\{\}"
-        alt_match = re.search(alt_pattern, input_text, re.DOTALL)
-        if alt_match:
-            return alt_match.group(1).strip(), alt_match.group(2).strip(), "{}"
-        raise ValueError(
-            "INVALID_FORMAT: Output must follow the format:\nThought: [your reasoning]\nAction: [action name]\nAction Input: [parameters as json]" + 
-            f"\nReceived output: {input_text}"
-        )
 
-    thought = match.group(1).strip()
-    action = match.group(2).strip()
-    action_input = match.group(3).strip()
-    
-    return thought, action, action_input
+class JsonObjectScanner:
+    """
+    Finds the end of a JSON object, resuming where it stopped as text grows.
+
+    Braces inside strings and escaped quotes are skipped. Only the structural
+    characters are visited and each one once, so scanning a streamed object
+    chunk by chunk stays linear in its length.
+    """
+
+    def __init__(self, start: int):
+        """
+        Args:
+            start (int): Index of the opening brace in the scanned text
+        """
+        self._position = start
+        self._depth = 0
+        self._in_string = False
+        self._escaped_at = -1
+
+    def scan(self, text: str) -> int:
+        """
+        Continue the scan over text, which extends the text of previous calls
+
+        Args:
+            text (str): Text containing the object
+
+        Returns:
+            int: Index just past the matching closing brace, or -1 if the object is not closed yet
+        """
+        for token in _JSON_TOKEN.finditer(text, self._position):
+            position = token.start()
+            if position == self._escaped_at:
+                continue
+            char = token.group()
+            if char == "\\":
+                if self._in_string:
+                    self._escaped_at = position + 1
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._position = position + 1
+                    return self._position
+        self._position = len(text)
+        return -1
+
+
+def find_json_object_end(text: str, start: int) -> int:
+    """
+    Find the end of the JSON object opening at text[start]
+
+    Args:
+        text (str): Text containing the object
+        start (int): Index of the opening brace
+
+    Returns:
+        int: Index just past the matching closing brace, or -1 if the object is not closed
+    """
+    return JsonObjectScanner(start).scan(text)
+
+
+def tokenize(output: str) -> List[Tuple[str, int, int]]:
+    """
+    Locate the ReAct markers of an output in a single scan
+
+    Args:
+        output (str): LLM output
+
+    Returns:
+        List[Tuple[str, int, int]]: (marker, marker start, content start) in order of appearance
+    """
+    return [(match.group(1), match.start(), match.end()) for match in _MARKER.finditer(output)]
+
+
+def _starts_line(output: str, position: int) -> bool:
+    """Whether only whitespace separates position from a preceding line break"""
+    while position > 0:
+        position -= 1
+        char = output[position]
+        if char in "\n\r":
+            return True
+        if not char.isspace():
+            return False
+    return False
+
+
+def _ends_line(text: str) -> bool:
+    """Whether the trailing whitespace of text contains a line break"""
+    trailing = text[len(text.rstrip()):]
+    return "\n" in trailing or "\r" in trailing
 
 
 def action_input_parser(json_str: str) -> dict:
     """Parse action input string into dictionary."""
     if json_str == "{}" or not json_str:
         return {}
-        
-    processed_string = re.sub(r"(?<!\w)\'|\'(?!\w)", '"', json_str)
-    pattern = r'"(\w+)":\s*"([^"]*)"'
-    matches = re.findall(pattern, processed_string)
-    return dict(matches)
-
-
-def extract_final_response(input_text: str) -> Tuple[str, str]:
-    # Pattern 1: Normal case with Thought and Answer
-    pattern1 = r"\s*Thought:(.*?)Answer:(.*?)(?:$)"
-    # Pattern 2: Case with Action: None - this should raise an error
-    pattern2 = r"\s*Thought:(.*?)Action:\s*None\s*"
-    # Pattern 3: Case with only Thought
-    pattern3 = r"\s*Thought:(.*?)(?:$)"
-
-    match1 = re.search(pattern1, input_text, re.DOTALL)
-    match3 = re.search(pattern3, input_text, re.DOTALL)
-
-    if match1:
-        thought = match1.group(1).strip()
-        answer = match1.group(2).strip()
-    elif re.search(pattern2, input_text, re.DOTALL):
-        raise ValueError(
-            "INVALID_ACTION_NONE: Found 'Action: None' in response. The model should either provide a clear answer or use a tool." +
-            f"\nReceived output: {input_text}"
-        )   
-    elif match3:
-        thought = match3.group(1).strip()
-        answer = thought.split(".")[-1].strip() if len(thought.split(".")[-1]) > 3 else thought.split(".")[-2].strip()
-    else:
+
+    processed_string = _SINGLE_QUOTE.sub('"', json_str)
+    return dict(_KEY_VALUE.findall(processed_string))
+
+
+def parse_action_input(json_str: str) -> dict:
+    """
+    Decode an Action Input object, tolerating the usual LLM mistakes
+
+    Args:
+        json_str (str): Text of the object, braces included
+
+    Returns:
+        dict: Tool arguments
+    """
+    try:
+        value = json.loads(json_str)
+    except ValueError:
+        try:
+            value = dirtyjson.loads(json_str)
+        except Exception:
+            return action_input_parser(json_str)
+    return value if isinstance(value, dict) else action_input_parser(json_str)
+
+
+def _action_block(output: str, markers: List[Tuple[str, int, int]], index: int) -> Optional[Tuple[str, str, int]]:
+    """
+    Read the Action / Action Input block starting at markers[index]
+
+    Returns:
+        Optional[Tuple[str, str, int]]: Action name, Action Input object text and the
+            index just past the object, or None if the markers do not form a block
+    """
+    name, action_start, action_end = markers[index]
+    if name != "Action" or index + 1 >= len(markers) or not _starts_line(output, action_start):
+        return None
+    next_name, input_start, input_end = markers[index + 1]
+    if next_name != "Action Input":
+        return None
+    action_line = output[action_end:input_start]
+    action = action_line.strip()
+    # the action name fills one line and the input starts the next one
+    if not action or "\n" in action or "\r" in action or not _ends_line(action_line):
+        return None
+
+    object_start = output.find("{", input_end)
+    if object_start < 0 or output[input_end:object_start].strip():
+        return None
+    object_end = find_json_object_end(output, object_start)
+    if object_end < 0:
+        # unbalanced, e.g. a brace inside an unquoted value: up to the last brace
+        object_end = output.rfind("}") + 1
+        if object_end <= object_start:
+            return None
+    return action, output[object_start:object_end], object_end
+
+
+def extract_tool_calls(output: str, markers: List[Tuple[str, int, int]]) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Extract the thought and the tool calls of the output
+
+    The first Thought is followed by the first line-leading Action whose next
+    line is the Action Input. Further Action / Action Input blocks directly
+    after it are independent calls of the same step.
+
+    Args:
+        output (str): LLM output
+        markers (List[Tuple[str, int, int]]): Result of tokenize(output)
+
+    Returns:
+        Tuple[str, List[Tuple[str, str]]]: Thought, and (action name, Action Input object text) per call
+    """
+    thought_at = next((index for index, marker in enumerate(markers) if marker[0] == "Thought"), None)
+    if thought_at is None:
+        raise _invalid_tool_use(output)
+    thought_start = markers[thought_at][2]
+
+    for index in range(thought_at + 1, len(markers) - 1):
+        block = _action_block(output, markers, index)
+        if block is None:
+            continue
+        thought = output[thought_start:markers[index][1]].strip()
+        calls = [block[:2]]
+        end = block[2]
+        index += 2
+        while True:
+            # skip markers quoted inside the previous Action Input
+            while index < len(markers) and markers[index][1] < end:
+                index += 1
+            if index >= len(markers) or output[end:markers[index][1]].strip():
+                break
+            block = _action_block(output, markers, index)
+            if block is None:
+                break
+            calls.append(block[:2])
+            end = block[2]
+            index += 2
+        return thought, calls
+
+    raise _invalid_tool_use(output)
+
+
+def extract_final_response(output: str, markers: List[Tuple[str, int, int]]) -> Tuple[str, str]:
+    """
+    Extract thought and answer from an output without an action
+
+    Args:
+        output (str): LLM output
+        markers (List[Tuple[str, int, int]]): Result of tokenize(output)
+
+    Returns:
+        Tuple[str, str]: Thought and answer
+    """
+    thought_start: Optional[int] = None
+    for name, start, end in markers:
+        if thought_start is None:
+            if name == "Thought":
+                thought_start = end
+        elif name == "Answer":
+            return output[thought_start:start].strip(), output[end:].strip()
+
+    if thought_start is None:
         raise ValueError(
             "INVALID_FORMAT: Could not extract final answer. Output must either:" +
             "\n1. Include 'Thought: [reasoning]' and 'Answer: [answer]'" +
             "\n2. Include clear reasoning in 'Thought: [detailed reasoning with answer]'" +
-            f"\nReceived output: {input_text}"
+            f"\nReceived output: {output}"
+        )
+    if _has_action_none(output, markers, thought_start):
+        raise ValueError(
+            "INVALID_ACTION_NONE: Found 'Action: None' in response. The model should either provide a clear answer or use a tool." +
+            f"\nReceived output: {output}"
         )
+
+    thought = output[thought_start:].strip()
+    sentences = thought.split(".")
+    answer = sentences[-1].strip() if len(sentences[-1]) > 3 else sentences[-2].strip()
     return thought, answer
 
-    
-def parse_action_reasoning_step(output: str) -> ActionReasoningStep:
-    """Parse an action reasoning step from the LLM output."""
-    thought, action, action_input = extract_tool_use(output)
-    json_str = extract_json_str(action_input)
-    try:
-        action_input_dict = json.loads(json_str)
-    except Exception:
-        action_input_dict = action_input_parser(json_str)
-    return ActionReasoningStep(
-        thought=thought, action=action, action_input=action_input_dict
+
+def _has_action_none(output: str, markers: List[Tuple[str, int, int]], after: int) -> bool:
+    """Whether an Action marker after position names no action, e.g. "Action:  None\""""
+    return any(
+        name == "Action" and start >= after and _ACTION_NONE.match(output, end)
+        for name, start, end in markers
     )
 
 
+class ParallelActionReasoningStep(BaseReasoningStep):
+    """Several independent tool calls decided in one reasoning step."""
+
+    thought: str
+    actions: List[ActionReasoningStep]
+
+    def get_content(self) -> str:
+        """Get content."""
+        lines = [f"Thought: {self.thought}"]
+        for action in self.actions:
+            lines.append(f"Action: {action.action}")
+            lines.append(f"Action Input: {action.action_input}")
+        return "\n".join(lines)
+
+    @property
+    def is_done(self) -> bool:
+        """Is the reasoning step the last one."""
+        return False
+
+
+def get_tool_calls(reasoning_step: BaseReasoningStep) -> List[ActionReasoningStep]:
+    """
+    Tool calls of a reasoning step, in the order they were written
+
+    Args:
+        reasoning_step (BaseReasoningStep): Parsed step
+
+    Returns:
+        List[ActionReasoningStep]: One entry per call, empty for answers
+    """
+    if isinstance(reasoning_step, ParallelActionReasoningStep):
+        return list(reasoning_step.actions)
+    if isinstance(reasoning_step, ActionReasoningStep):
+        return [reasoning_step]
+    return []
+
+
 class ReActOutputParser(BaseOutputParser):
     """ReAct Output parser."""
 
@@ -107,6 +334,8 @@ class ReActOutputParser(BaseOutputParser):
             Action: <action>
             Action Input: <action_input>
             ```
+           Several Action / Action Input pairs may follow one Thought; they are
+           returned as a ParallelActionReasoningStep.
         2. If the agent can answer the question without any tools:
             ```
             Thought: <thought>
@@ -114,43 +343,114 @@ class ReActOutputParser(BaseOutputParser):
             ```
         """
         # Clean up output by removing extra backticks
-        output = re.sub(r'`{3,}', '', output)
-        
-        print(f"output-ReActOutputParser: {output}")
-        
-        if "Thought:" not in output:
+        if "```" in output:
+            output = _FENCE.sub("", output)
+
+        markers = tokenize(output)
+        names = {marker[0] for marker in markers}
+
+        if "Thought" not in names:
             # NOTE: handle the case where the agent directly outputs the answer
             # instead of following the thought-answer format
             return ResponseReasoningStep(
-                thought="(Implicit) I can answer without any more tools!",
+                thought=IMPLICIT_THOUGHT,
                 response=output,
                 is_streaming=is_streaming,
             )
 
         # An "Action" should take priority over an "Answer"
-        if "Action:" in output and "Action: None" not in output:
-            return parse_action_reasoning_step(output)
+        if "Action" in names and "Action: None" not in output:
+            thought, calls = extract_tool_calls(output, markers)
+            actions = [
+                ActionReasoningStep(thought=thought, action=action, action_input=parse_action_input(action_input))
+                for action, action_input in calls
+            ]
+            if len(actions) == 1:
+                return actions[0]
+            return ParallelActionReasoningStep(thought=thought, actions=actions)
 
-        if "Answer:" in output:
-            thought, answer = extract_final_response(output)
-            return ResponseReasoningStep(
-                thought=thought, response=answer, is_streaming=is_streaming
-            )
-            
-        if "Thought:" in output:
-            thought, answer = extract_final_response(output)
-            return ResponseReasoningStep(
-                thought=thought, response=answer, is_streaming=is_streaming
-            )
-
-        raise ValueError(
-            "INVALID_FORMAT: Output must either:" +
-            "\n1. Include 'Thought: [reasoning]' and 'Action: [action]' and 'Action Input: [input]'" +
-            "\n2. Include 'Thought: [reasoning]' and 'Answer: [answer]'" +
-            "\n3. Include clear reasoning in 'Thought: [detailed reasoning with answer]'" +
-            f"\nReceived output: {output}"
+        thought, answer = extract_final_response(output, markers)
+        return ResponseReasoningStep(
+            thought=thought, response=answer, is_streaming=is_streaming
         )
 
     def format(self, output: str) -> str:
         """Format a query with structured output formatting instructions."""
         raise NotImplementedError
+
+
+class StreamingReActOutputParser:
+    """
+    Incremental ReAct parser fed with the chunks of a streamed LLM output.
+
+    feed() returns the tool call step as soon as the output holds a tool call
+    whose Action Input object is closed and the text after it shows no further
+    Action, so the caller can stop the generation there instead of waiting for
+    the model to finish. The step is the one ReActOutputParser gives for the
+    output up to that point.
+    """
+
+    def __init__(self):
+        self.text = ""
+        # length of the output up to the end of the tool calls, once complete
+        self.end = -1
+        self._search_from = 0
+        self._scanner: Optional[JsonObjectScanner] = None
+        # tool calls parsed so far, returned unless another Action follows them
+        self._pending: Optional[Tuple[int, BaseReasoningStep]] = None
+        self._parser = ReActOutputParser()
+
+    def feed(self, delta: str) -> Optional[BaseReasoningStep]:
+        """
+        Add the next chunk of the output
+
+        Args:
+            delta (str): Text generated since the previous chunk
+
+        Returns:
+            Optional[BaseReasoningStep]: ActionReasoningStep or ParallelActionReasoningStep,
+                once the tool calls are complete
+        """
+        if self.end >= 0:
+            return None
+        self.text += delta
+
+        while True:
+            if self._pending is not None:
+                pending_end, pending_step = self._pending
+                rest = self.text[pending_end:pending_end + 64].lstrip()
+                if len(rest) < len(ACTION_MARKER) and ACTION_MARKER.startswith(rest):
+                    return None
+                if not rest.startswith(ACTION_MARKER):
+                    self.end = pending_end
+                    return pending_step
+                self._pending = None
+
+            if self._scanner is None:
+                marker = self.text.find(ACTION_INPUT_MARKER, self._search_from)
+                if marker < 0:
+                    # the marker may be split across chunks
+                    self._search_from = max(self._search_from, len(self.text) - len(ACTION_INPUT_MARKER) + 1)
+                    return None
+                content_start = marker + len(ACTION_INPUT_MARKER)
+                brace = self.text.find("{", content_start)
+                prefix = self.text[content_start:] if brace < 0 else self.text[content_start:brace]
+                if prefix.strip():
+                    self._search_from = content_start
+                    continue
+                if brace < 0:
+                    self._search_from = marker
+                    return None
+                self._scanner = JsonObjectScanner(brace)
+
+            end = self._scanner.scan(self.text)
+            if end < 0:
+                return None
+            self._scanner = None
+            self._search_from = end
+            try:
+                step = self._parser.parse(self.text[:end])
+            except (ValueError, IndexError):
+                continue
+            if get_tool_calls(step):
+                self._pending = (end, step)
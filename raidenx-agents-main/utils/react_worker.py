@@ -0,0 +1,452 @@
+import asyncio
+import contextvars
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import llama_index.core.instrumentation as instrument
+from llama_index.core.agent import ReActAgentWorker
+from llama_index.core.agent.react.types import (
+    ActionReasoningStep,
+    BaseReasoningStep,
+    ObservationReasoningStep,
+)
+from llama_index.core.agent.types import Task, TaskStep, TaskStepOutput
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, MessageRole
+from llama_index.core.callbacks import CBEventType, EventPayload
+from llama_index.core.instrumentation.events.agent import AgentToolCallEvent
+from llama_index.core.tools import AsyncBaseTool, ToolOutput
+from llama_index.core.utils import print_text
+
+from commons.metrics import agent_iterations, outcome, tool_call_seconds, tool_calls
+from commons.tracing import tracer
+from utils.agent_events import emit_agent_event
+from utils.output_parser import StreamingReActOutputParser, get_tool_calls
+from utils.context_builder import context_metrics, count_tokens, provider_of
+from utils.request_context import get_request_context
+
+dispatcher = instrument.get_dispatcher(__name__)
+
+# a trade asked for by the user or planned in the thought; read-only terminal tools are then only a step towards it
+_TRADE_REQUEST = re.compile(r"\b(?:buy|sell|swap|ape|dump)\b", re.IGNORECASE)
+
+
+def _feed(parser: StreamingReActOutputParser, chunk: ChatResponse) -> Optional[ChatResponse]:
+    """
+    Feed a streamed chunk to the parser
+
+    Returns:
+        Optional[ChatResponse]: The chunk cut at the end of the tool calls, once they are complete
+    """
+    if chunk.delta is not None:
+        delta = chunk.delta
+    else:
+        delta = (chunk.message.content or "")[len(parser.text):]
+    step_start = len(parser.text)
+    if parser.feed(delta) is None:
+        return None
+
+    return ChatResponse(
+        message=ChatMessage(role=MessageRole.ASSISTANT, content=parser.text[:parser.end]),
+        delta=parser.text[step_start:parser.end],
+        raw=chunk.raw,
+        additional_kwargs=chunk.additional_kwargs,
+    )
+
+
+class ToolCallStoppingLLM:
+    """
+    Wraps the worker's LLM so each ReAct step stops generating at its tool calls.
+
+    Every call is made as a stream and consumed by a StreamingReActOutputParser.
+    As soon as the Action / Action Input blocks are complete the stream is
+    closed, which cancels the rest of the generation, and the output up to the
+    tool calls is returned, so the tools start without waiting for text the model
+    should not have produced (e.g. a made-up Observation). Final answers stream
+    unchanged. The prompt size of every call is recorded in context_metrics,
+    and every call gets an "llm.chat" span with its prompt and completion
+    tokens. Other attributes are the wrapped LLM's.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _start_span(self, messages: Sequence[ChatMessage]):
+        prompt_tokens = context_metrics.record_prompt(messages, self.llm)
+        # not made current: the span lasts as long as the stream, outside of this call
+        return tracer.start_span(
+            "llm.chat",
+            category="llm",
+            attributes={"llm.model": self.llm.metadata.model_name, "llm.prompt_tokens": prompt_tokens},
+        )
+
+    def _end_span(self, span, parser: StreamingReActOutputParser, error: Optional[BaseException] = None) -> None:
+        span.set_attribute("llm.completion_tokens", count_tokens(parser.text, provider_of(self.llm)))
+        span.set_attribute("llm.stopped_at_tool_call", parser.end >= 0)
+        if error is not None:
+            span.record_error(error)
+        span.end()
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Generator[ChatResponse, None, None]:
+        span = self._start_span(messages)
+        parser = StreamingReActOutputParser()
+        error = None
+        try:
+            chat_stream = self.llm.stream_chat(messages, **kwargs)
+            try:
+                for chunk in chat_stream:
+                    tool_call = _feed(parser, chunk)
+                    if tool_call is not None:
+                        yield tool_call
+                        return
+                    yield chunk
+            finally:
+                chat_stream.close()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._end_span(span, parser, error)
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncGenerator[ChatResponse, None]:
+        span = self._start_span(messages)
+        try:
+            chat_stream = await self.llm.astream_chat(messages, **kwargs)
+        except Exception as e:
+            self._end_span(span, StreamingReActOutputParser(), e)
+            raise
+        return self._astop_at_tool_call(chat_stream, span)
+
+    async def _astop_at_tool_call(self, chat_stream: AsyncGenerator[ChatResponse, None], span) -> AsyncGenerator[ChatResponse, None]:
+        parser = StreamingReActOutputParser()
+        error = None
+        try:
+            async for chunk in chat_stream:
+                tool_call = _feed(parser, chunk)
+                if tool_call is not None:
+                    yield tool_call
+                    return
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await chat_stream.aclose()
+            self._end_span(span, parser, error)
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=None))
+        for response in self.stream_chat(messages, **kwargs):
+            pass
+        return response
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=None))
+        async for response in await self.astream_chat(messages, **kwargs):
+            pass
+        return response
+
+
+def _batches(
+    calls: List[ActionReasoningStep],
+    serial_tools: Iterable[str],
+) -> List[List[Tuple[int, ActionReasoningStep]]]:
+    """
+    Group the calls of a step into batches that may run concurrently
+
+    Consecutive calls of read-only tools share a batch; a serial tool (a trade)
+    always runs alone, after everything written before it and before everything
+    written after it.
+    """
+    batches: List[List[Tuple[int, ActionReasoningStep]]] = []
+    concurrent = False
+    for index, call in enumerate(calls):
+        serial = call.action in serial_tools
+        if serial or not concurrent:
+            batches.append([])
+        batches[-1].append((index, call))
+        concurrent = not serial
+    return batches
+
+
+class StreamingReActAgentWorker(ReActAgentWorker):
+    """
+    ReAct worker that streams every step and runs independent tool calls together.
+
+    The LLM is wrapped in ToolCallStoppingLLM, so chat, achat and the streaming
+    steps all stop generating at the end of the Action Input blocks. A step may
+    call several tools; read-only ones run concurrently while serial_tools
+    (trades) run one at a time in the order they were written, and all results
+    are fed back as one observation. Each tool call is also published as a
+    "reasoning" agent event for streamed runs.
+
+    A step whose calls all succeeded on terminal_tools ends the run without
+    asking the LLM for an answer: the response is built from the tool outputs.
+    Read-only terminal tools do not end a run when the message or the thought
+    of the step mentions a trade, since they are then a check before it.
+
+    Each step is traced as a "react.iteration" span and each tool call as a
+    "tool <name>" span under it; iterations per run and tool latency and errors
+    are also recorded as metrics.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        serial_tools: Sequence[str] = (),
+        terminal_tools: Sequence[str] = (),
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self._llm = ToolCallStoppingLLM(self._llm)
+        self._serial_tools = frozenset(serial_tools)
+        self._terminal_tools = frozenset(terminal_tools)
+
+    @staticmethod
+    def _iteration_span(task: Task):
+        """Span of one ReAct iteration (LLM call and the tools it asked for)"""
+        task.extra_state["iterations"] = task.extra_state.get("iterations", 0) + 1
+        return tracer.span("react.iteration", attributes={"react.iteration": task.extra_state["iterations"]})
+
+    @staticmethod
+    def _end_iteration(task: Task, span, output: TaskStepOutput) -> TaskStepOutput:
+        span.set_attribute("react.is_last", output.is_last)
+        if output.is_last:
+            agent_iterations.observe(task.extra_state["iterations"])
+        return output
+
+    def run_step(self, step: TaskStep, task: Task, **kwargs: Any) -> TaskStepOutput:
+        with self._iteration_span(task) as span:
+            return self._end_iteration(task, span, super().run_step(step, task, **kwargs))
+
+    async def arun_step(self, step: TaskStep, task: Task, **kwargs: Any) -> TaskStepOutput:
+        with self._iteration_span(task) as span:
+            return self._end_iteration(task, span, await super().arun_step(step, task, **kwargs))
+
+    def stream_step(self, step: TaskStep, task: Task, **kwargs: Any) -> TaskStepOutput:
+        with self._iteration_span(task) as span:
+            return self._end_iteration(task, span, super().stream_step(step, task, **kwargs))
+
+    async def astream_step(self, step: TaskStep, task: Task, **kwargs: Any) -> TaskStepOutput:
+        with self._iteration_span(task) as span:
+            return self._end_iteration(task, span, await super().astream_step(step, task, **kwargs))
+
+    def _extract_reasoning_step(
+        self, output: ChatResponse, is_streaming: bool = False
+    ) -> Tuple[str, List[BaseReasoningStep], bool]:
+        if output.message.content is None:
+            raise ValueError("Got empty message.")
+        message_content = output.message.content
+
+        try:
+            reasoning_step = self._output_parser.parse(message_content, is_streaming)
+        except BaseException as exc:
+            raise ValueError(f"Could not parse output: {message_content}") from exc
+        if self._verbose:
+            print_text(f"{reasoning_step.get_content()}\n", color="pink")
+
+        if reasoning_step.is_done:
+            return message_content, [reasoning_step], True
+
+        calls = get_tool_calls(reasoning_step)
+        if not calls:
+            raise ValueError(f"Expected ActionReasoningStep, got {reasoning_step}")
+        # final answers are streamed as tokens instead
+        for call in calls:
+            emit_agent_event("reasoning", {
+                "thought": call.thought,
+                "action": call.action,
+                "action_input": call.action_input,
+            })
+        return message_content, [reasoning_step], False
+
+    def _tool_event(self, tool: AsyncBaseTool, call: ActionReasoningStep):
+        return self.callback_manager.event(
+            CBEventType.FUNCTION_CALL,
+            payload={
+                EventPayload.FUNCTION_CALL: call.action_input,
+                EventPayload.TOOL: tool.metadata,
+            },
+        )
+
+    @staticmethod
+    def _tool_span(call: ActionReasoningStep):
+        return tracer.span(f"tool {call.action}", category="tool", attributes={"tool.name": call.action})
+
+    @staticmethod
+    def _dispatch_tool_call(tool: AsyncBaseTool, call: ActionReasoningStep) -> None:
+        dispatcher.event(
+            AgentToolCallEvent(
+                arguments=json.dumps({**call.action_input}),
+                tool=tool.metadata,
+            )
+        )
+
+    @staticmethod
+    def _tool_error(tool: AsyncBaseTool, call: ActionReasoningStep, e: Exception) -> ToolOutput:
+        return ToolOutput(
+            content=f"Error: {e!s}",
+            tool_name=tool.metadata.name,
+            raw_input={"kwargs": call.action_input},
+            raw_output=e,
+            is_error=True,
+        )
+
+    @staticmethod
+    def _record_tool(call: ActionReasoningStep, started: float, tool_output: ToolOutput) -> None:
+        tool_call_seconds.labels(call.action).observe(time.perf_counter() - started)
+        tool_calls.labels(call.action, outcome(tool_output.is_error)).inc()
+
+    def _call_tool(self, tools_dict: Dict[str, AsyncBaseTool], call: ActionReasoningStep) -> ToolOutput:
+        tool = tools_dict.get(call.action)
+        if tool is None:
+            return self._handle_nonexistent_tool_name(call)
+        started = time.perf_counter()
+        with self._tool_span(call) as span, self._tool_event(tool, call) as event:
+            try:
+                self._dispatch_tool_call(tool, call)
+                tool_output = tool.call(**call.action_input)
+            except Exception as e:
+                tool_output = self._tool_error(tool, call, e)
+            event.on_end(payload={EventPayload.FUNCTION_OUTPUT: str(tool_output)})
+            span.set_attribute("tool.is_error", tool_output.is_error)
+        self._record_tool(call, started, tool_output)
+        return tool_output
+
+    async def _acall_tool(self, tools_dict: Dict[str, AsyncBaseTool], call: ActionReasoningStep) -> ToolOutput:
+        tool = tools_dict.get(call.action)
+        if tool is None:
+            return self._handle_nonexistent_tool_name(call)
+        started = time.perf_counter()
+        with self._tool_span(call) as span, self._tool_event(tool, call) as event:
+            try:
+                self._dispatch_tool_call(tool, call)
+                tool_output = await tool.acall(**call.action_input)
+            except Exception as e:
+                tool_output = self._tool_error(tool, call, e)
+            event.on_end(payload={EventPayload.FUNCTION_OUTPUT: str(tool_output)})
+            span.set_attribute("tool.is_error", tool_output.is_error)
+        self._record_tool(call, started, tool_output)
+        return tool_output
+
+    def _call_tools(self, tools_dict: Dict[str, AsyncBaseTool], calls: List[ActionReasoningStep]) -> List[ToolOutput]:
+        outputs: List[Optional[ToolOutput]] = [None] * len(calls)
+        for batch in _batches(calls, self._serial_tools):
+            if len(batch) == 1:
+                index, call = batch[0]
+                outputs[index] = self._call_tool(tools_dict, call)
+                continue
+            # each thread runs in a copy of the request context (JWT, request loader, events)
+            with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                futures = [
+                    (index, executor.submit(contextvars.copy_context().run, self._call_tool, tools_dict, call))
+                    for index, call in batch
+                ]
+                for index, future in futures:
+                    outputs[index] = future.result()
+        return outputs
+
+    async def _acall_tools(self, tools_dict: Dict[str, AsyncBaseTool], calls: List[ActionReasoningStep]) -> List[ToolOutput]:
+        outputs: List[Optional[ToolOutput]] = [None] * len(calls)
+        for batch in _batches(calls, self._serial_tools):
+            results = await asyncio.gather(*(self._acall_tool(tools_dict, call) for _, call in batch))
+            for (index, _), tool_output in zip(batch, results):
+                outputs[index] = tool_output
+        return outputs
+
+    def _ends_run(self, task: Task, tools_dict: Dict[str, AsyncBaseTool], call: ActionReasoningStep) -> bool:
+        """Whether the output of this call can be the response of the run"""
+        tool = tools_dict.get(call.action)
+        if tool is None:
+            return False
+        if tool.metadata.return_direct:
+            return True
+        if call.action not in self._terminal_tools:
+            return False
+        if call.action in self._serial_tools:
+            return True
+        return not (_TRADE_REQUEST.search(task.input or "") or _TRADE_REQUEST.search(call.thought or ""))
+
+    def _observe(
+        self,
+        task: Task,
+        tools_dict: Dict[str, AsyncBaseTool],
+        current_reasoning: List[BaseReasoningStep],
+        calls: List[ActionReasoningStep],
+        tool_outputs: List[ToolOutput],
+    ) -> Tuple[List[BaseReasoningStep], bool]:
+        """Record the tool outputs of a step and add them as one observation"""
+        task.extra_state["sources"].extend(tool_outputs)
+        get_request_context().last_tool_outputs = len(tool_outputs)
+
+        if len(tool_outputs) == 1:
+            observation = str(tool_outputs[0])
+        else:
+            observation = "\n\n".join(
+                f"[{index}] {call.action} {call.action_input}\n{tool_output}"
+                for index, (call, tool_output) in enumerate(zip(calls, tool_outputs), start=1)
+            )
+        return_direct = bool(calls) and all(
+            not tool_output.is_error and self._ends_run(task, tools_dict, call)
+            for call, tool_output in zip(calls, tool_outputs)
+        )
+
+        observation_step = ObservationReasoningStep(observation=observation, return_direct=return_direct)
+        current_reasoning.append(observation_step)
+        if self._verbose:
+            print_text(f"{observation_step.get_content()}\n", color="blue")
+        return current_reasoning, return_direct
+
+    def _process_actions(
+        self,
+        task: Task,
+        tools: Sequence[AsyncBaseTool],
+        output: ChatResponse,
+        is_streaming: bool = False,
+    ) -> Tuple[List[BaseReasoningStep], bool]:
+        tools_dict = {tool.metadata.name: tool for tool in tools}
+        try:
+            _, current_reasoning, is_done = self._extract_reasoning_step(output, is_streaming)
+        except ValueError as exp:
+            failure = self._handle_reasoning_failure_fn(self.callback_manager, exp)
+            return self._observe(task, tools_dict, [], [], [failure])
+        if is_done:
+            return current_reasoning, True
+
+        calls = get_tool_calls(current_reasoning[-1])
+        return self._observe(task, tools_dict, current_reasoning, calls, self._call_tools(tools_dict, calls))
+
+    async def _aprocess_actions(
+        self,
+        task: Task,
+        tools: Sequence[AsyncBaseTool],
+        output: ChatResponse,
+        is_streaming: bool = False,
+    ) -> Tuple[List[BaseReasoningStep], bool]:
+        tools_dict = {tool.metadata.name: tool for tool in tools}
+        try:
+            _, current_reasoning, is_done = self._extract_reasoning_step(output, is_streaming)
+        except ValueError as exp:
+            failure = self._handle_reasoning_failure_fn(self.callback_manager, exp)
+            return self._observe(task, tools_dict, [], [], [failure])
+        if is_done:
+            return current_reasoning, True
+
+        calls = get_tool_calls(current_reasoning[-1])
+        tool_outputs = await self._acall_tools(tools_dict, calls)
+        return self._observe(task, tools_dict, current_reasoning, calls, tool_outputs)
@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from commons.request_loader import RequestLoader
+
+
+@dataclass
+class RequestContext:
+    """State scoped to a single agent run (one user message)."""
+    jwt_token: Optional[str] = None
+    # message being answered; set when the answer is delivered through the agent webhook
+    message_id: Optional[str] = None
+    # (reasoning step, ChatMessage) pairs already formatted during this run
+    reasoning_messages: List[Tuple[object, object]] = field(default_factory=list)
+    # upstream reads shared by the tools called during this run
+    loader: RequestLoader = field(default_factory=RequestLoader)
+    # receives (event, data) tuples while the run is streamed, see utils/agent_events.py
+    events: Optional[asyncio.Queue] = None
+    # number of tool outputs produced by the last reasoning step (several when run in parallel)
+    last_tool_outputs: int = 0
+    # prompt tokens of each LLM call made during this run
+    prompt_tokens: List[int] = field(default_factory=list)
+
+
+_current_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> RequestContext:
+    """
+    Get the context of the agent run in progress
+
+    Returns:
+        RequestContext: Current context, or an empty one outside of an agent run
+    """
+    return _current_context.get() or RequestContext()
+
+
+def get_request_loader() -> Optional[RequestLoader]:
+    """
+    Get the loader of the agent run in progress
+
+    Returns:
+        Optional[RequestLoader]: The run's loader, or None outside of an agent run
+    """
+    context = _current_context.get()
+    return context.loader if context is not None else None
+
+
+@contextmanager
+def request_context(**kwargs):
+    """
+    Set the request context for the duration of an agent run
+
+    Args:
+        **kwargs: RequestContext fields, e.g. jwt_token
+
+    Yields:
+        RequestContext: The context visible to tools called inside the block
+    """
+    context = RequestContext(**kwargs)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)